@@ -0,0 +1,213 @@
+"""
+수집 파이프라인 전체(crawler.crawler.master_crawl_thread) 오프라인 벤치마크.
+
+로컬 모의 사이트(benchmarks/mock_site.py)를 띄우고 임시 폴더의 새 DB로 HTTP 경로 수집을 실행한 뒤
+분당 에피소드 수, 다운로드 속도(MB/s), 에피소드 소요 시간 p50/p99, 최대 RSS를 출력합니다.
+에피소드 소요 시간은 수집 중 기록되는 메트릭 트레이스('episode' 단계)에서 읽습니다.
+모의 사이트는 브라우저 없이 받을 수 있으므로 브라우저는 띄우지 않으며, 필요해지면 실패로 처리됩니다.
+
+    python benchmarks/bench_crawl.py --episodes 40 --images 30 --threads 3
+    python benchmarks/bench_crawl.py --latency 0.05 --bandwidth-kb 2048 --fail-rate 0.02 --json
+    python benchmarks/bench_crawl.py --engine async --max-per-host 32 --latency 0.05   # 다운로드 엔진 비교
+    python benchmarks/bench_crawl.py --fail-rate 0.05 --no-http-cache   # 재시도 때 페이지를 다시 받는 경우와 비교
+"""
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_site import MockSite, MockSiteConfig  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def no_browser():
+    raise RuntimeError("벤치마크에서는 브라우저를 사용하지 않습니다.")
+
+
+def quantile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class RssSampler:
+    """실행 중 프로세스 RSS의 최댓값(MB)을 기록합니다. resource가 있으면 커널의 최댓값을 함께 봅니다."""
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="RssSampler", daemon=True)
+
+    def _run(self):
+        if psutil is None:
+            return
+        process = psutil.Process()
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, process.memory_info().rss / 1024 / 1024)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        if resource is not None:
+            # 리눅스에서 ru_maxrss는 KB 단위입니다.
+            self.peak_mb = max(self.peak_mb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def drain_events(events, verbose):
+    summary = None
+    while True:
+        try:
+            msg_type, data = events.get_nowait()
+        except queue.Empty:
+            return summary
+        if msg_type == 'summary':
+            summary = data
+        elif verbose and msg_type == 'log':
+            print(data)
+
+
+def run_benchmark(args, workdir):
+    import database as DB
+    from crawler.browser_pool import BrowserPool
+    from crawler.crawler import master_crawl_thread
+
+    DB.init_db(os.path.join(workdir, 'bench.db'))
+
+    config = MockSiteConfig(series=args.series, episodes=args.episodes, images=args.images,
+                            image_size=args.image_kb * 1024, latency=args.latency,
+                            bandwidth=args.bandwidth_kb * 1024, fail_rate=args.fail_rate, seed=args.seed)
+    download_path = os.path.join(workdir, 'download')
+    os.makedirs(download_path)
+    trace_path = os.path.join(workdir, 'metrics.jsonl')
+    events = queue.Queue()
+    stop_event = threading.Event()
+
+    with MockSite(config) as site:
+        for url in site.list_urls():
+            DB.add_series_job(url, download_path)
+        params = {
+            'target_url': '',
+            'download_path': download_path,
+            'num_threads': str(args.threads),
+            'page_fetcher': 'http',
+            'parser': args.parser,
+            'requests_per_second': args.rps,
+            'max_per_host': args.max_per_host,
+            'retry_backoff': args.retry_backoff,
+            'metrics_trace': trace_path,
+            'download_engine': args.engine,
+            'adaptive_concurrency': '0' if args.no_adaptive else '1',
+            'max_threads': args.max_threads,
+            'max_in_flight': args.max_in_flight,
+            'http_cache': '0' if args.no_http_cache else '1',
+        }
+        browser_pool = BrowserPool(max_size=args.threads, driver_factory=no_browser)
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            try:
+                master_crawl_thread(params, events, stop_event, browser_pool)
+            finally:
+                elapsed = time.perf_counter() - start
+                browser_pool.close()
+                DB.close_all_connections()
+        summary = drain_events(events, args.verbose) or {}
+        requests, failures = site.requests, site.failures
+        page_requests, not_modified = site.page_requests, site.not_modified
+
+    latencies = []
+    image_bytes = 0
+    with open(trace_path, encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry['stage'] == 'episode':
+                latencies.append(entry['seconds'])
+            elif entry['stage'] == 'image_download':
+                image_bytes += entry.get('bytes', 0)
+
+    return {
+        "episodes": summary.get('total', 0),
+        "success": summary.get('success', 0),
+        "failed": summary.get('failed', 0),
+        "seconds": round(elapsed, 2),
+        "episodes_per_min": round(summary.get('success', 0) / elapsed * 60, 1) if elapsed else 0.0,
+        "mb_per_s": round(image_bytes / 1024 / 1024 / elapsed, 2) if elapsed else 0.0,
+        "episode_p50": round(quantile(latencies, 0.5), 3),
+        "episode_p99": round(quantile(latencies, 0.99), 3),
+        "peak_rss_mb": round(rss.peak_mb, 1),
+        "requests": requests,
+        "page_requests": page_requests,
+        "not_modified": not_modified,
+        "injected_failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 사이트를 이용한 수집 파이프라인 벤치마크")
+    parser.add_argument('--series', type=int, default=1)
+    parser.add_argument('--episodes', type=int, default=20)
+    parser.add_argument('--images', type=int, default=30)
+    parser.add_argument('--image-kb', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help="모의 사이트 응답 지연 (초)")
+    parser.add_argument('--bandwidth-kb', type=int, default=0, help="연결당 대역폭 (KB/s, 0이면 무제한)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="503으로 실패시킬 요청 비율")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threads', type=int, default=3, help="시작 워커 스레드 수")
+    parser.add_argument('--max-threads', type=int, default=8, help="자동 조절 시 최대 워커 스레드 수")
+    parser.add_argument('--no-adaptive', action='store_true', help="워커/이미지 다운로드 수 자동 조절 끄기")
+    parser.add_argument('--parser', choices=('selectolax', 'lxml', 'bs4'))
+    parser.add_argument('--rps', type=float, default=1000.0, help="호스트당 초당 이미지 요청 수")
+    parser.add_argument('--max-per-host', type=int, default=8, help="호스트당 동시 이미지 다운로드 수")
+    parser.add_argument('--engine', choices=('thread', 'async'), default='thread', help="이미지 다운로드 엔진")
+    parser.add_argument('--max-in-flight', type=int, default=64, help="async 엔진의 전체 동시 이미지 전송 수")
+    parser.add_argument('--no-http-cache', action='store_true', help="목록/에피소드 페이지 HTTP 캐시 끄기")
+    parser.add_argument('--retry-backoff', type=float, default=0.2, help="실패한 에피소드 재시도 대기 (초)")
+    parser.add_argument('--keep', action='store_true', help="임시 폴더(DB, 이미지, 트레이스)를 지우지 않음")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 한 줄로 출력")
+    parser.add_argument('-v', '--verbose', action='store_true', help="수집 로그 출력")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_crawl_')
+    try:
+        result = run_benchmark(args, workdir)
+    finally:
+        if args.keep:
+            print(f"결과 폴더: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    print(f"[{args.engine}] 에피소드 {result['episodes']}개 (성공 {result['success']}, 실패 {result['failed']}) "
+          f"{result['seconds']:.1f}s")
+    print(f"  처리량     {result['episodes_per_min']:8.1f} 에피소드/분")
+    print(f"  다운로드   {result['mb_per_s']:8.2f} MB/s")
+    print(f"  소요 시간  p50 {result['episode_p50']:.3f}s  p99 {result['episode_p99']:.3f}s")
+    print(f"  최대 RSS   {result['peak_rss_mb']:8.1f} MB")
+    print(f"  요청 {result['requests']}건 (페이지 {result['page_requests']}건, 304 {result['not_modified']}건), "
+          f"주입한 실패 {result['injected_failures']}건")
+
+
+if __name__ == '__main__':
+    main()
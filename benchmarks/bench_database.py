@@ -0,0 +1,79 @@
+"""
+database.py 마이크로 벤치마크.
+
+매 호출마다 연결을 열고 닫던 기존 방식과 스레드별 영구 연결(WAL) 방식의
+조회 비용, 그리고 URL별 반복 조회와 get_crawled_urls() 일괄 조회를 비교합니다.
+
+    python benchmarks/bench_database.py --rows 100000 --lookups 5000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import database as DB  # noqa: E402
+
+
+def legacy_is_url_crawled(url):
+    """기존 구현: 호출마다 연결을 열고 닫습니다."""
+    conn = sqlite3.connect(DB.DB_FILE)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM crawled_urls WHERE url = ?", (url,))
+        return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def populate(num_rows):
+    with DB.get_db_connection() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawled_urls (url, page_title) VALUES (?, ?)",
+            ((f"https://example.com/comic/{i}", f"title {i}") for i in range(num_rows)),
+        )
+        conn.commit()
+
+
+def measure(label, func, urls):
+    start = time.perf_counter()
+    for url in urls:
+        func(url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {elapsed / len(urls) * 1e6:10.1f} us/call")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        DB.init_db(os.path.join(tmp_dir, 'bench.db'))
+        populate(args.rows)
+
+        step = max(1, args.rows // args.lookups)
+        urls = [f"https://example.com/comic/{i}" for i in range(0, args.rows, step)][:args.lookups]
+        urls += [f"https://example.com/missing/{i}" for i in range(len(urls) // 10)]
+
+        print(f"rows={args.rows} lookups={len(urls)}")
+        legacy = measure("open-per-call (legacy)", legacy_is_url_crawled, urls)
+        pooled = measure("thread connection (WAL)", DB.is_url_crawled, urls)
+        print(f"speedup: x{legacy / pooled:.1f}")
+
+        start = time.perf_counter()
+        DB.get_crawled_urls(urls)
+        bulk = time.perf_counter() - start
+        print(f"{'get_crawled_urls (bulk)':<28} {bulk:8.3f}s  {bulk / len(urls) * 1e6:10.1f} us/url")
+        print(f"speedup vs legacy loop: x{legacy / bulk:.1f}")
+
+        DB.close_all_connections()
+
+
+if __name__ == '__main__':
+    main()
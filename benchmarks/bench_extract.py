@@ -0,0 +1,93 @@
+"""
+crawler/extract.py 파서 백엔드 벤치마크.
+
+합성한 에피소드/목록 페이지를 백엔드별로 파싱하여 페이지당 파싱 시간과
+최대 메모리 사용량(tracemalloc)을 비교합니다. 설치되지 않은 백엔드는 건너뜁니다.
+
+    python benchmarks/bench_extract.py --images 120 --filler 3000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from crawler.extract import BACKEND_PREFERENCE, BACKENDS  # noqa: E402
+
+
+def make_episode_html(num_images, filler_blocks, title="테스트 만화 1화"):
+    """실제 에피소드 페이지와 비슷한 구조(광고/댓글 등 주변 마크업 포함)의 HTML을 만듭니다."""
+    filler = ''.join(
+        f'<div class="comment"><span class="name">user{i}</span><p>댓글 내용 {i} ' + 'lorem ipsum ' * 5 + '</p></div>'
+        for i in range(filler_blocks)
+    )
+    images = ''.join(
+        f'<img src="https://img.example.com/data/{i:04d}.jpg" alt="">' if i % 10 else
+        '<img src="/img/loading-image.gif" alt="">'
+        for i in range(num_images)
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>' + title + ' > 마나토끼 - 일본만화 허브</title></head><body>'
+        '<div id="header">' + filler[:len(filler) // 2] + '</div>'
+        '<div class="view-wrap"><h1>' + title + '</h1>'
+        '<article itemprop="articleBody"><section itemscope itemtype="http://schema.org/NewsArticle">'
+        '<div class="view-content">' + images + '</div></section></article></div>'
+        '<div id="comments">' + filler[len(filler) // 2:] + '</div></body></html>'
+    )
+
+
+def make_list_html(num_episodes, base_url="https://example.com/comic"):
+    items = ''.join(
+        f'<li><div class="wr-subject"><a href="{base_url}/{i}">에피소드 {i}화</a></div></li>'
+        for i in range(num_episodes, 0, -1)
+    )
+    return (
+        '<html><body><article itemprop="articleBody"><div class="serial-list"><ul>'
+        + items + '</ul></div></article></body></html>'
+    )
+
+
+def bench(func, html, repeat):
+    func(html)  # 워밍업
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=120)
+    parser.add_argument('--filler', type=int, default=3000, help="주변 마크업 블록 개수")
+    parser.add_argument('--episodes', type=int, default=1000, help="목록 페이지의 에피소드 개수")
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    episode_html = make_episode_html(args.images, args.filler)
+    list_html = make_list_html(args.episodes)
+    print(f"episode page: {len(episode_html) / 1024:.0f} KiB, list page: {len(list_html) / 1024:.0f} KiB")
+    print(f"{'backend':<12} {'page':<8} {'ms/page':>10} {'peak KiB':>10}  result")
+
+    for name in BACKEND_PREFERENCE:
+        try:
+            backend = BACKENDS[name]()
+        except ImportError:
+            print(f"{name:<12} (not installed)")
+            continue
+        elapsed, peak, episode = bench(backend.parse_episode, episode_html, args.repeat)
+        print(f"{name:<12} {'episode':<8} {elapsed * 1000:10.2f} {peak / 1024:10.0f}  "
+              f"{episode.title!r}, {len(episode.images)}/{episode.image_count} images")
+        elapsed, peak, links = bench(lambda html: list(backend.iter_list(html)), list_html, args.repeat)
+        print(f"{name:<12} {'list':<8} {elapsed * 1000:10.2f} {peak / 1024:10.0f}  {len(links)} links")
+
+
+if __name__ == '__main__':
+    main()
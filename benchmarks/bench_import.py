@@ -0,0 +1,89 @@
+"""
+시작 시간(모듈 가져오기 시간) 벤치마크.
+
+새 인터프리터에서 `python -X importtime -c "import <모듈>"`을 여러 번 실행해 누적 가져오기 시간의
+중앙값과 가장 오래 걸린 모듈들을 출력합니다. 창을 띄우기 전에 가져오면 안 되는 무거운 라이브러리
+(selenium, seleniumbase, google.generativeai, PIL, bs4, requests)가 가져와졌거나
+--budget-ms를 넘으면 종료 코드 1을 반환하므로 시작 시간이 다시 느려지는 것을 막는 데 쓸 수 있습니다.
+
+    python benchmarks/bench_import.py                       # main (GUI 진입점)
+    python benchmarks/bench_import.py --module cli --budget-ms 300
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# 창이 뜨기 전에는 가져오지 않아야 하는 모듈 (수집을 시작할 때 가져옴)
+HEAVY_MODULES = ('selenium', 'seleniumbase', 'google.generativeai', 'PIL', 'bs4', 'requests')
+
+
+def parse_importtime(stderr, module):
+    """
+    -X importtime 출력에서 module과 module이 가져온 모듈들의 {이름: (자체 us, 누적 us)}를 만듭니다.
+    인터프리터 시작 시(site 등) 가져온 모듈은 제외합니다.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    # 출력은 하위 모듈이 먼저 나오는 순서이므로, module 줄 앞에서 더 깊은 줄들이 module의 하위 모듈입니다.
+    end = max(i for i, entry in enumerate(entries) if entry[0] == module)
+    start = end
+    while start > 0 and entries[start - 1][1] > entries[end][1]:
+        start -= 1
+    return {name: (self_us, cumulative_us) for name, _, self_us, cumulative_us in entries[start:end + 1]}
+
+
+def measure(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', f'import {module}'],
+        cwd=SRC_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"'{module}'을(를) 가져오지 못했습니다:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr, module)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="-X importtime 기반 시작 시간 벤치마크")
+    parser.add_argument('--module', default='main', help="가져올 모듈 (src 기준, 기본값: main)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="오래 걸린 모듈을 몇 개 보여줄지")
+    parser.add_argument('--budget-ms', type=float, default=0, help="누적 시간 중앙값 한도 (0이면 검사 안 함)")
+    parser.add_argument('--allow-heavy', action='store_true', help="무거운 라이브러리를 가져와도 실패로 보지 않음")
+    args = parser.parse_args()
+
+    # 첫 실행은 .pyc 생성 등이 섞이므로 버립니다.
+    measure(args.module)
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    totals_ms = [run[args.module][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+    last = runs[-1]
+
+    print(f"import {args.module}: 중앙값 {median_ms:.1f}ms (최소 {min(totals_ms):.1f}ms, {args.repeat}회)")
+    print(f"  누적 시간이 긴 모듈 (상위 {args.top}개)")
+    slowest = sorted((item for item in last.items() if item[0] != args.module), key=lambda item: -item[1][1])
+    for name, (self_us, cumulative_us) in slowest[:args.top]:
+        print(f"    {cumulative_us / 1000:8.1f}ms  (자체 {self_us / 1000:6.1f}ms)  {name}")
+
+    failed = False
+    heavy_roots = [root for root in HEAVY_MODULES
+                   if any(name == root or name.startswith(root + '.') for name in last)]
+    if heavy_roots and not args.allow_heavy:
+        print(f"[실패] 시작할 때 무거운 라이브러리를 가져옵니다: {', '.join(heavy_roots)}")
+        failed = True
+    if args.budget_ms and median_ms > args.budget_ms:
+        print(f"[실패] 가져오기 시간 {median_ms:.1f}ms가 한도 {args.budget_ms:.0f}ms를 넘었습니다.")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+임대(lease) 작업 테이블로 여러 프로세스가 나눠 수집하는 벤치마크/검증 스크립트.
+
+모의 사이트(benchmarks/mock_site.py)를 띄우고 임시 DB에 `cli.py --work-mode enqueue`로 에피소드 작업을 등록한 뒤
+`cli.py --work-mode lease` 프로세스를 여러 개 실행합니다. --kill-after를 주면 첫 번째 작업자를 도중에 SIGKILL로
+종료시켜, 그 작업자가 임대한 에피소드가 임대 만료 후 다른 작업자에게 넘어가는지 확인합니다.
+
+끝나면 모든 에피소드 작업이 'done'인지, crawled_urls에 한 번씩 기록되었는지,
+작업자들이 완료로 기록한 수의 합이 에피소드 수를 넘지 않는지(중복 완료 없음) 확인하고 결과가 다르면 종료 코드 1을 반환합니다.
+
+    python benchmarks/bench_lease.py --workers 4 --episodes 40
+    python benchmarks/bench_lease.py --workers 3 --kill-after 1.5 --lease-seconds 3
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_site import MockSite, MockSiteConfig  # noqa: E402
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+DONE_PATTERN = re.compile(r"이 프로세스 (\d+)개")
+
+
+def cli_command(db_path, *args):
+    return [sys.executable, '-W', 'ignore', 'cli.py', '--db', db_path, '--events', 'jsonl', *args]
+
+
+def completed_count(events_path):
+    """작업자 이벤트 파일에서 그 프로세스가 완료로 기록한 에피소드 수를 읽습니다."""
+    count = 0
+    if not os.path.exists(events_path):
+        return count
+    with open(events_path, encoding='utf-8') as f:
+        for line in f:
+            event = json.loads(line)
+            if event['type'] == 'log':
+                match = DONE_PATTERN.search(str(event['data']))
+                if match:
+                    count = max(count, int(match.group(1)))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임대 작업 테이블 다중 프로세스 수집 벤치마크")
+    parser.add_argument('--workers', type=int, default=3, help="작업자 프로세스 수")
+    parser.add_argument('--threads', type=int, default=2, help="작업자 프로세스당 워커 스레드 수")
+    parser.add_argument('--series', type=int, default=2)
+    parser.add_argument('--episodes', type=int, default=20, help="만화당 에피소드 수")
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--image-kb', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help="모의 사이트 응답 지연 (초)")
+    parser.add_argument('--rps', type=float, default=1000.0, help="작업자당 호스트별 초당 이미지 요청 수")
+    parser.add_argument('--max-per-host', type=int, default=8, help="작업자당 호스트별 동시 이미지 다운로드 수")
+    parser.add_argument('--lease-seconds', type=float, default=5.0)
+    parser.add_argument('--kill-after', type=float, default=0, help="첫 번째 작업자를 SIGKILL할 시각 (초, 0이면 안 함)")
+    parser.add_argument('--keep', action='store_true', help="임시 폴더(DB, 이미지, 이벤트)를 지우지 않음")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_lease_')
+    db_path = os.path.join(workdir, 'lease.db')
+    download_path = os.path.join(workdir, 'download')
+    config = MockSiteConfig(series=args.series, episodes=args.episodes, images=args.images,
+                            image_size=args.image_kb * 1024, latency=args.latency)
+    try:
+        with MockSite(config) as site:
+            enqueue = subprocess.run(
+                cli_command(db_path, *site.list_urls(), '-d', download_path, '--work-mode', 'enqueue',
+                            '-o', os.path.join(workdir, 'enqueue.jsonl')),
+                cwd=SRC_DIR)
+            if enqueue.returncode != 0:
+                print(f"에피소드 작업 등록 실패 (종료 코드 {enqueue.returncode})")
+                return 1
+            # 작업자 프로세스들은 다운로더 설정을 DB의 app_config에서 읽습니다.
+            with sqlite3.connect(db_path) as conn:
+                conn.executemany("INSERT OR REPLACE INTO app_config (key, value) VALUES (?, ?)",
+                                 [('requests_per_second', str(args.rps)), ('max_per_host', str(args.max_per_host))])
+
+            start = time.perf_counter()
+            workers = [
+                subprocess.Popen(cli_command(
+                    db_path, '--work-mode', 'lease', '-t', str(args.threads),
+                    '--lease-seconds', str(args.lease_seconds),
+                    '-o', os.path.join(workdir, f'worker{i}.jsonl'),
+                    '--metrics-trace', os.path.join(workdir, f'worker{i}.metrics.jsonl'),
+                ), cwd=SRC_DIR)
+                for i in range(args.workers)
+            ]
+            if args.kill_after:
+                time.sleep(args.kill_after)
+                workers[0].send_signal(signal.SIGKILL)
+                print(f"작업자 0을 {args.kill_after:.1f}s에 강제 종료했습니다.")
+            exit_codes = [worker.wait() for worker in workers]
+            elapsed = time.perf_counter() - start
+
+        with sqlite3.connect(db_path) as conn:
+            states = dict(conn.execute("SELECT state, COUNT(*) FROM episode_jobs GROUP BY state").fetchall())
+            crawled = conn.execute("SELECT COUNT(*) FROM crawled_urls").fetchone()[0]
+            series_states = dict(conn.execute("SELECT state, COUNT(*) FROM series_jobs GROUP BY state").fetchall())
+
+        expected = args.series * args.episodes
+        per_worker = [completed_count(os.path.join(workdir, f'worker{i}.jsonl')) for i in range(args.workers)]
+        print(f"작업자 {args.workers}개 x 스레드 {args.threads}개, 에피소드 {expected}개: {elapsed:.1f}s "
+              f"({states.get('done', 0) / elapsed * 60:.1f} 에피소드/분)")
+        print(f"  작업자별 완료 {per_worker} (합계 {sum(per_worker)}), 종료 코드 {exit_codes}")
+        print(f"  에피소드 상태 {states}, 만화 상태 {series_states}, crawled_urls {crawled}건")
+
+        problems = []
+        if states.get('done', 0) != expected:
+            problems.append(f"완료된 에피소드가 {states.get('done', 0)}/{expected}개입니다.")
+        if crawled != expected:
+            problems.append(f"crawled_urls가 {crawled}/{expected}건입니다.")
+        # 강제 종료된 작업자는 DB에 완료를 기록한 직후 로그를 남기지 못했을 수 있으므로 합이 모자랄 수 있습니다.
+        if sum(per_worker) > expected or (not args.kill_after and sum(per_worker) != expected):
+            problems.append(f"작업자들이 완료로 기록한 수의 합({sum(per_worker)})이 에피소드 수와 다릅니다.")
+        if series_states.get('done', 0) != args.series:
+            problems.append(f"완료된 만화 작업이 {series_states.get('done', 0)}/{args.series}개입니다.")
+        for problem in problems:
+            print(f"[실패] {problem}")
+        if not problems:
+            print("[통과] 모든 에피소드가 정확히 한 번씩 완료되었습니다.")
+        return 1 if problems else 0
+    finally:
+        if args.keep:
+            print(f"결과 폴더: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+벤치마크용 로컬 모의 만화 사이트.
+
+마나토끼와 같은 구조의 목록 페이지(div.serial-list 링크)와 에피소드 페이지
+(NewsArticle 섹션 안의 img), 이미지 파일을 127.0.0.1에서 제공합니다.
+응답마다 지연 시간, 연결당 대역폭 제한, 무작위 실패(503)를 넣을 수 있습니다.
+HTML 페이지에는 ETag를 붙이고, If-None-Match가 맞으면 본문 없이 304로 응답합니다.
+이미지는 'Range: bytes=N-' 요청에 206(범위를 벗어나면 416)으로 응답합니다.
+
+    /comic/<series>            목록 페이지 (최신 에피소드 먼저)
+    /comic/<series>/<episode>  에피소드 페이지
+    /data/<series>/<episode>/<index>.jpg  이미지
+
+    python benchmarks/mock_site.py --port 8000 --latency 0.05 --fail-rate 0.02
+"""
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH_LIST = re.compile(r'^/comic/(\d+)/?$')
+PATH_EPISODE = re.compile(r'^/comic/(\d+)/(\d+)/?$')
+PATH_IMAGE = re.compile(r'^/data/(\d+)/(\d+)/(\d+)\.jpg$')
+RANGE_HEADER = re.compile(r'^bytes=(\d+)-$')
+WRITE_CHUNK_SIZE = 16 * 1024
+
+
+class MockSiteConfig:
+    """
+    latency: 응답 전 지연 (초), bandwidth: 연결당 전송 속도 (바이트/초, 0이면 무제한),
+    fail_rate: 503으로 실패시킬 요청 비율, filler_blocks: 페이지에 넣는 주변 마크업(댓글 등) 개수
+    """
+    def __init__(self, series=1, episodes=20, images=30, image_size=200 * 1024, latency=0.0,
+                 bandwidth=0, fail_rate=0.0, filler_blocks=200, seed=0):
+        self.series = series
+        self.episodes = episodes
+        self.images = images
+        self.image_size = image_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.fail_rate = fail_rate
+        self.filler_blocks = filler_blocks
+        self.seed = seed
+
+
+class MockSite:
+    """모의 사이트 서버. 백그라운드 스레드에서 실행되며 요청/실패 횟수와 전송 바이트를 셉니다."""
+    def __init__(self, config=None, port=0, host='127.0.0.1'):
+        self.config = config or MockSiteConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._filler = ''.join(
+            f'<div class="comment"><span class="name">user{i}</span><p>댓글 {i} ' + 'lorem ipsum ' * 5 + '</p></div>'
+            for i in range(self.config.filler_blocks)
+        )
+        self.requests = 0
+        self.page_requests = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.bytes_sent = 0
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive 연결을 재사용할 수 있도록 HTTP/1.1로 응답합니다.
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                site.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://{host}:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name="MockSite", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def list_url(self, series):
+        return f"{self.base_url}/comic/{series}"
+
+    def list_urls(self):
+        return [self.list_url(series) for series in range(1, self.config.series + 1)]
+
+    def _should_fail(self):
+        if self.config.fail_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.config.fail_rate
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+        if self.config.latency:
+            time.sleep(self.config.latency)
+
+        path = request.path.split('?', 1)[0]
+        body, content_type = self.render(path)
+        if body is None:
+            request.send_error(404)
+            return
+        if self._should_fail():
+            with self._lock:
+                self.failures += 1
+            request.send_error(503)
+            return
+
+        etag = None
+        if content_type.startswith('text/html'):
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            with self._lock:
+                self.page_requests += 1
+            if request.headers.get('If-None-Match') == etag:
+                with self._lock:
+                    self.not_modified += 1
+                request.send_response(304)
+                request.send_header('ETag', etag)
+                request.end_headers()
+                return
+
+        range_match = RANGE_HEADER.match(request.headers.get('Range') or '') if etag is None else None
+        if range_match:
+            start = int(range_match.group(1))
+            if start >= len(body):
+                request.send_response(416)
+                request.send_header('Content-Range', f'bytes */{len(body)}')
+                request.send_header('Content-Length', '0')
+                request.end_headers()
+                return
+            request.send_response(206)
+            request.send_header('Content-Type', content_type)
+            request.send_header('Content-Range', f'bytes {start}-{len(body) - 1}/{len(body)}')
+            request.send_header('Content-Length', str(len(body) - start))
+            request.end_headers()
+            self._write_throttled(request.wfile, body[start:])
+            return
+
+        request.send_response(200)
+        request.send_header('Content-Type', content_type)
+        if etag:
+            request.send_header('ETag', etag)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        self._write_throttled(request.wfile, body)
+
+    def _write_throttled(self, wfile, body):
+        bandwidth = self.config.bandwidth
+        start = time.monotonic()
+        try:
+            for offset in range(0, len(body), WRITE_CHUNK_SIZE):
+                chunk = body[offset:offset + WRITE_CHUNK_SIZE]
+                wfile.write(chunk)
+                if bandwidth:
+                    ahead = (offset + len(chunk)) / bandwidth - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        with self._lock:
+            self.bytes_sent += len(body)
+
+    def render(self, path):
+        """경로에 맞는 (본문 바이트, Content-Type)을 반환합니다. 없는 경로면 (None, None)."""
+        config = self.config
+        match = PATH_IMAGE.match(path)
+        if match:
+            series, episode, index = map(int, match.groups())
+            if series <= config.series and episode <= config.episodes and index <= config.images:
+                return self.image_bytes(series, episode, index), 'image/jpeg'
+            return None, None
+        match = PATH_EPISODE.match(path)
+        if match:
+            series, episode = map(int, match.groups())
+            if series <= config.series and episode <= config.episodes:
+                return self.episode_html(series, episode).encode('utf-8'), 'text/html; charset=utf-8'
+            return None, None
+        match = PATH_LIST.match(path)
+        if match and int(match.group(1)) <= config.series:
+            return self.list_html(int(match.group(1))).encode('utf-8'), 'text/html; charset=utf-8'
+        return None, None
+
+    def list_html(self, series):
+        items = ''.join(
+            f'<li><div class="wr-subject"><a href="{self.base_url}/comic/{series}/{episode}">'
+            f'만화 {series} {episode}화</a></div></li>'
+            for episode in range(self.config.episodes, 0, -1)
+        )
+        return (
+            f'<!DOCTYPE html><html><head><title>만화 {series} > 마나토끼 - 일본만화 허브</title></head><body>'
+            '<div id="header">' + self._filler[:len(self._filler) // 2] + '</div>'
+            '<article itemprop="articleBody"><div class="serial-list"><ul class="list-body">'
+            + items + '</ul></div></article>'
+            '<div id="footer">' + self._filler[len(self._filler) // 2:] + '</div></body></html>'
+        )
+
+    def episode_html(self, series, episode):
+        title = f"만화 {series} {episode}화"
+        # 실제 페이지처럼 섹션 앞쪽에 로딩용 gif가 섞여 있습니다.
+        images = '<img src="/img/loading-image.gif" alt="">' + ''.join(
+            f'<img src="{self.base_url}/data/{series}/{episode}/{index}.jpg" alt="">'
+            for index in range(1, self.config.images + 1)
+        )
+        return (
+            '<!DOCTYPE html><html><head><title>' + title + ' > 마나토끼 - 일본만화 허브</title></head><body>'
+            '<div id="header">' + self._filler[:len(self._filler) // 2] + '</div>'
+            '<div class="view-wrap"><h1>' + title + '</h1>'
+            '<article itemprop="articleBody"><section itemscope itemtype="http://schema.org/NewsArticle">'
+            '<div class="view-content">' + images + '</div></section></article></div>'
+            '<div id="comments">' + self._filler[len(self._filler) // 2:] + '</div></body></html>'
+        )
+
+    def image_bytes(self, series, episode, index):
+        """이미지마다 내용이 다른(해시가 겹치지 않는) 고정 크기 JPEG 모양의 바이트를 만듭니다."""
+        seed = hashlib.sha256(f"{series}/{episode}/{index}".encode()).digest()
+        body = seed * (self.config.image_size // len(seed) + 1)
+        return b'\xff\xd8\xff\xe0' + body[:max(0, self.config.image_size - 4)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 모의 만화 사이트")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--series', type=int, default=1)
+    parser.add_argument('--episodes', type=int, default=20)
+    parser.add_argument('--images', type=int, default=30)
+    parser.add_argument('--image-kb', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 지연 (초)")
+    parser.add_argument('--bandwidth-kb', type=int, default=0, help="연결당 대역폭 (KB/s, 0이면 무제한)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="503으로 실패시킬 요청 비율")
+    args = parser.parse_args()
+
+    config = MockSiteConfig(series=args.series, episodes=args.episodes, images=args.images,
+                            image_size=args.image_kb * 1024, latency=args.latency,
+                            bandwidth=args.bandwidth_kb * 1024, fail_rate=args.fail_rate)
+    site = MockSite(config, port=args.port).start()
+    print(f"모의 사이트: {', '.join(site.list_urls())}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.close()
+
+
+if __name__ == '__main__':
+    main()
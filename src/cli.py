@@ -0,0 +1,216 @@
+"""
+Tkinter 없이 수집을 실행하는 명령행/데몬 진입점.
+
+    python cli.py https://manatoki468.net/comic/2786463 -d ./download_mana --headless
+    python cli.py --daemon --interval 3600 --events jsonl --output events.jsonl
+
+여러 프로세스(같은 DB 파일을 쓰는 여러 기계)로 나눠 수집할 때는 목록 확인과 에피소드 수집을 나눕니다.
+
+    python cli.py https://manatoki468.net/comic/2786463 -d ./download_mana --work-mode enqueue
+    python cli.py --work-mode lease -t 3        # 원하는 만큼 여러 개 실행
+
+인자로 준 목록 URL을 작업 대기열에 추가한 뒤 대기열 전체를 수집합니다.
+--daemon이면 --interval초마다 대기열의 모든 만화(이미 끝난 작업 포함)의 목록을 다시 확인합니다 (새 에피소드만 수집).
+
+종료 코드: 0 성공, 1 실패한 에피소드나 목록을 읽지 못한 만화 있음, 2 잘못된 인자, 130 중지됨
+"""
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+
+import database as DB
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_STOPPED = 130
+
+
+class EventSink:
+    """이벤트를 stream에 한 줄씩 출력하는 sink의 공통 부분. 하위 클래스는 format()만 구현합니다."""
+    def __init__(self, stream):
+        self.stream = stream
+        # 시그널 핸들러에서 다시 들어올 수 있으므로 RLock을 사용합니다.
+        self._lock = threading.RLock()
+
+    def format(self, msg_type, data):
+        """출력할 한 줄을 반환합니다. None이면 이벤트를 출력하지 않습니다."""
+        raise NotImplementedError
+
+    def put(self, event):
+        line = self.format(*event)
+        if line is None:
+            return
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class TextEventSink(EventSink):
+    """log/show_info 이벤트를 사람이 읽는 텍스트로 출력합니다."""
+    def format(self, msg_type, data):
+        if msg_type not in ('log', 'show_info'):
+            return None
+        return f"{time.strftime('%Y-%m-%d %H:%M:%S')} {data}"
+
+
+class JsonLinesEventSink(EventSink):
+    """모든 이벤트를 한 줄에 하나씩 JSON으로 출력합니다."""
+    def format(self, msg_type, data):
+        return json.dumps({"ts": time.time(), "type": msg_type, "data": data}, ensure_ascii=False, default=str)
+
+
+class RunObserver:
+    """
+    master_crawl_thread의 이벤트를 sink로 넘기면서 실행 결과(summary/complete)를 기억합니다.
+    GUI의 gui_queue 자리에 그대로 넘길 수 있습니다.
+    """
+    def __init__(self, sink):
+        self.sink = sink
+        self.summary = None
+        self.completed = False
+
+    def put(self, event):
+        msg_type, data = event
+        if msg_type == 'summary':
+            self.summary = data
+        elif msg_type == 'complete':
+            self.completed = True
+        self.sink.put(event)
+
+
+EVENT_SINKS = {
+    'text': TextEventSink,
+    'jsonl': JsonLinesEventSink,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="마나토끼 수집기 (명령행/데몬 모드)")
+    parser.add_argument('urls', nargs='*', help="수집할 만화 목록 URL (생략하면 작업 대기열만 처리)")
+    parser.add_argument('-d', '--download-path', default='', help="이미지를 저장할 폴더")
+    parser.add_argument('-t', '--threads', type=int,
+                        help="워커 스레드 개수. 자동 조절 시 이 개수를 넘지 않음 (기본값: 자동, 3개로 시작)")
+    parser.add_argument('--max-threads', type=int,
+                        help="자동 조절 시 워커 스레드 최대 개수 (기본값: -t 값, 자동이면 8, 브라우저 페처는 4)")
+    parser.add_argument('--no-adaptive', action='store_true', help="워커/이미지 다운로드 수를 자동 조절하지 않음")
+    parser.add_argument('--priority', type=int, default=0, help="추가하는 만화 작업의 우선순위 (클수록 먼저)")
+    parser.add_argument('--db', help="데이터베이스 파일 경로 (기본값: crawled_pages.db)")
+    parser.add_argument('--headless', action='store_true', help="브라우저를 화면 없이 실행")
+    parser.add_argument('--page-fetcher', choices=('http', 'browser'), default='http')
+    parser.add_argument('--parser', choices=('selectolax', 'lxml', 'bs4'), help="HTML 파서 백엔드")
+    parser.add_argument('--full-refresh', action='store_true', help="목록 전체를 다시 확인")
+    parser.add_argument('--http-cache-mode', choices=('revalidate', 'prefer', 'offline'),
+                        help="페이지 HTTP 캐시 사용 방식 (기본값: revalidate, offline은 캐시된 페이지만 사용)")
+    parser.add_argument('--no-http-cache', action='store_true', help="목록/에피소드 페이지를 캐시하지 않음")
+    parser.add_argument('--work-mode', choices=('local', 'enqueue', 'lease'), default='local',
+                        help="local: 확인과 수집을 이 프로세스에서, enqueue: 에피소드 작업 등록만, "
+                             "lease: 등록된 작업을 임대해 수집 (여러 프로세스 가능)")
+    parser.add_argument('--lease-seconds', type=float, help="lease 모드의 임대 기간 (초, 기본값: 120)")
+    parser.add_argument('--events', choices=sorted(EVENT_SINKS), default='text', help="이벤트 출력 형식")
+    parser.add_argument('-o', '--output', help="이벤트를 기록할 파일 (기본값: 표준 출력)")
+    parser.add_argument('--download-engine', choices=('thread', 'async'),
+                        help="이미지 다운로드 엔진 (기본값: thread, async는 aiohttp 필요)")
+    parser.add_argument('--max-in-flight', type=int, help="async 엔진의 전체 동시 이미지 전송 수 (기본값: 64)")
+    parser.add_argument('--cbz', action='store_true', help="에피소드마다 CBZ(ComicInfo 포함) 파일 생성")
+    parser.add_argument('--image-format', choices=('webp', 'avif', 'jpeg'), help="CBZ 안의 이미지를 다시 인코딩할 형식")
+    parser.add_argument('--image-quality', type=int, help="다시 인코딩할 때의 품질 (기본값: 80)")
+    parser.add_argument('--max-image-width', type=int, help="CBZ 안의 이미지 최대 가로 크기 (픽셀)")
+    parser.add_argument('--metrics-port', type=int, help="Prometheus 형식 메트릭을 제공할 포트 (/metrics)")
+    parser.add_argument('--metrics-trace', help="단계별 소요 시간을 기록할 트레이스 파일 (JSON Lines, 기본값: 기록 안 함)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="--interval초마다 대기열의 모든 만화 목록을 다시 확인 (끝난 작업 포함)")
+    parser.add_argument('--interval', type=float, default=3600, help="데몬 모드의 반복 간격 (초)")
+    return parser
+
+
+def run_once(args, observer, stop_event, browser_pool):
+    """작업 대기열에 URL을 추가하고 한 번 수집합니다. 종료 코드를 반환합니다."""
+    from crawler.crawler import master_crawl_thread
+
+    # 데몬은 매번 대기열의 모든 만화를 다시 확인합니다. (lease 모드는 만화 목록을 보지 않음)
+    if args.daemon and args.work_mode != 'lease':
+        DB.requeue_finished_series_jobs()
+    for url in args.urls:
+        DB.add_series_job(url, args.download_path, args.priority)
+
+    params = {
+        'target_url': '',
+        'download_path': args.download_path,
+        'num_threads': str(args.threads) if args.threads else '자동',
+        'max_threads': args.max_threads,
+        'adaptive_concurrency': '0' if args.no_adaptive else None,
+        'page_fetcher': args.page_fetcher,
+        'parser': args.parser,
+        'full_refresh': args.full_refresh,
+        'http_cache': '0' if args.no_http_cache else None,
+        'http_cache_mode': args.http_cache_mode,
+        'work_mode': args.work_mode,
+        'lease_seconds': args.lease_seconds,
+        'postprocess': 'cbz' if args.cbz else None,
+        'download_engine': args.download_engine,
+        'max_in_flight': args.max_in_flight,
+        'image_format': args.image_format,
+        'image_quality': args.image_quality,
+        'max_image_width': args.max_image_width,
+        'metrics_port': args.metrics_port,
+        'metrics_trace': args.metrics_trace,
+    }
+    observer.summary = None
+    master_crawl_thread(params, observer, stop_event, browser_pool)
+
+    if stop_event.is_set():
+        return EXIT_STOPPED
+    # 목록 페이지를 읽지 못한 만화가 있으면 받을 에피소드가 없어도 실패로 알립니다. (사이트 장애 등)
+    if observer.summary and (observer.summary.get('failed') or observer.summary.get('failed_series')):
+        return EXIT_FAILURES
+    return EXIT_OK
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.threads is not None and args.threads < 1:
+        print("스레드 개수는 1 이상이어야 합니다.", file=sys.stderr)
+        return EXIT_USAGE
+    if args.work_mode == 'lease' and args.urls:
+        print("lease 모드는 목록 URL을 받지 않습니다. --work-mode enqueue로 먼저 등록하세요.", file=sys.stderr)
+        return EXIT_USAGE
+    DB.init_db(args.db)
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    observer = RunObserver(EVENT_SINKS[args.events](output))
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        observer.put(("log", f"종료 신호({signum})를 받았습니다. 진행 중인 작업을 정리합니다..."))
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    from crawler.browser_pool import BrowserPool
+    # 실행할 때마다 master_crawl_thread가 워커 최대 개수만큼 풀을 늘립니다.
+    browser_pool = BrowserPool(max_size=args.threads or 1, headless=args.headless)
+    try:
+        while True:
+            exit_code = run_once(args, observer, stop_event, browser_pool)
+            if not args.daemon or stop_event.is_set():
+                return exit_code
+            observer.put(("log", f"{args.interval:.0f}초 후에 다시 확인합니다."))
+            if stop_event.wait(args.interval):
+                return EXIT_STOPPED
+    finally:
+        browser_pool.close()
+        DB.close_all_connections()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    # PyInstaller로 묶은 실행 파일에서 후처리 프로세스 풀을 쓰기 위해 필요합니다.
+    multiprocessing.freeze_support()
+    sys.exit(main())
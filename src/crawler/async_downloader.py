@@ -0,0 +1,265 @@
+"""
+asyncio 기반 이미지 다운로드 엔진 (download_engine = 'async').
+
+모든 워커의 이미지 요청을 이벤트 루프 스레드 하나에서 aiohttp로 동시에 처리합니다.
+스레드 엔진(ImageDownloader)은 동시 전송 수만큼 스레드가 필요하지만, 이 엔진은 수백 개의 전송을
+스레드 몇 개로 처리합니다. 파일 쓰기/해시, 이미지 저장소, DB 기록은 작은 스레드 풀로 넘겨
+이벤트 루프를 막지 않습니다.
+
+워커 스레드와 브라우저 처리는 그대로이며, download_episode()/resume_episode()/close()는
+ImageDownloader와 같으므로 수집 흐름과 gui_queue 이벤트는 바뀌지 않습니다.
+aiohttp가 설치되어 있어야 합니다.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+import database as DB
+from crawler.downloader import (
+    CHUNK_SIZE, DEFAULT_MAX_PER_HOST, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_TIMEOUT, PART_SUFFIX,
+    IncompleteDownloadError, discard_part_file, downloader_settings, find_part_file, guess_image_extension,
+    is_manifest_entry_complete, is_resumed_response,
+)
+from crawler.image_store import ImageStore
+from crawler.metrics import NULL_METRICS
+
+# 전체 동시 전송 수 기본값 (호스트별 한도는 max_per_host)
+DEFAULT_MAX_IN_FLIGHT = 64
+# 파일 쓰기/해시/DB 기록을 처리하는 스레드 수
+DEFAULT_IO_THREADS = 4
+
+
+class AsyncRateLimiter:
+    """RateLimiter의 asyncio 버전. 이벤트 루프 스레드에서만 사용합니다."""
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_allowed = 0.0
+
+    async def acquire(self):
+        if self.interval <= 0:
+            return
+        now = time.monotonic()
+        wait = max(0.0, self._next_allowed - now)
+        self._next_allowed = max(now, self._next_allowed) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _open_part_file(part_path, resume_from, chunk_size):
+    """.part 파일을 열고, 이어받는 경우 기존 내용의 해시를 계산해 (파일, hasher)를 반환합니다."""
+    hasher = hashlib.sha256()
+    if resume_from:
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+    return open(part_path, 'ab' if resume_from else 'wb'), hasher
+
+
+def _write_chunk(f, hasher, chunk):
+    f.write(chunk)
+    hasher.update(chunk)
+
+
+def _finish_part_file(f):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+
+
+class AsyncImageDownloader:
+    """
+    ImageDownloader와 같은 인터페이스의 asyncio 다운로드 엔진.
+    여러 워커 스레드가 download_episode()를 동시에 호출하면 모든 이미지가 같은 이벤트 루프에서 처리됩니다.
+    """
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=DEFAULT_TIMEOUT, metrics=None,
+                 dedup=True, image_store_dir=None, io_threads=DEFAULT_IO_THREADS):
+        if aiohttp is None:
+            raise ImportError("asyncio 다운로드 엔진을 사용하려면 aiohttp가 필요합니다. (pip install aiohttp)")
+        self.max_per_host = max(1, int(max_per_host))
+        self.requests_per_second = float(requests_per_second)
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self.metrics = metrics or NULL_METRICS
+        self.dedup = dedup
+        self.image_store_dir = image_store_dir
+
+        self._io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=io_threads,
+                                                                  thread_name_prefix="img-io")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="AsyncImageDownloader", daemon=True)
+        self._thread.start()
+        self._host_limits = {}
+        self._session = self._run(self._create_session())
+
+    @classmethod
+    def from_params(cls, params, metrics=None):
+        """ImageDownloader.from_params와 같은 설정에 max_in_flight(전체 동시 전송 수)를 더해 읽습니다."""
+        max_in_flight = params.get('max_in_flight') or DB.get_app_config('max_in_flight')
+        settings = downloader_settings(params)
+        # 동시 전송 수는 스레드 비용이 없는 max_in_flight로 정하므로 자동 조절(adaptive)은 쓰지 않습니다.
+        settings.pop('adaptive')
+        return cls(metrics=metrics, max_in_flight=int(max_in_flight or DEFAULT_MAX_IN_FLIGHT), **settings)
+
+    def _run(self, coro):
+        """이벤트 루프에서 coro를 실행하고 결과를 기다립니다. (워커 스레드에서 호출)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _create_session(self):
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.max_per_host)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _io(self, func, *args):
+        return await self._loop.run_in_executor(self._io_executor, func, *args)
+
+    async def _update_manifest(self, labels, *args):
+        start = time.monotonic()
+        await self._io(DB.update_image_manifest, *args)
+        self.metrics.record('db_manifest', time.monotonic() - start, **labels)
+
+    def _limits_for(self, url):
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = (asyncio.Semaphore(self.max_per_host),
+                                       AsyncRateLimiter(self.requests_per_second))
+        return self._host_limits[host]
+
+    async def _write_response(self, response, file_path, stop_event, resume_from=0):
+        """write_response_atomically의 비동기 버전. 파일 쓰기와 해시 계산은 I/O 스레드에서 합니다."""
+        expected = response.headers.get('Content-Length')
+        part_path = file_path + PART_SUFFIX
+        f, hasher = await self._io(_open_part_file, part_path, resume_from, CHUNK_SIZE)
+        written = 0
+        try:
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if stop_event.is_set():
+                    raise IncompleteDownloadError(f"다운로드 중단: {response.url}")
+                await self._io(_write_chunk, f, hasher, chunk)
+                written += len(chunk)
+        finally:
+            await self._io(_finish_part_file, f)
+
+        # aiohttp는 압축을 풀어 주므로 Content-Encoding이 있으면 Content-Length와 비교하지 않습니다.
+        if expected is not None and not response.headers.get('Content-Encoding') and written != int(expected):
+            if written > int(expected):
+                await self._io(os.remove, part_path)
+            raise IncompleteDownloadError(f"크기 불일치 ({written}/{expected} bytes): {response.url}")
+
+        await self._io(os.replace, part_path, file_path)
+        return resume_from + written, hasher.hexdigest()
+
+    async def _download_one(self, index, img_url, download_dir, referer_url, stop_event, page_url, entry,
+                            labels, known):
+        if is_manifest_entry_complete(entry):
+            return entry['file_path']
+        if stop_event.is_set():
+            return None
+        store = ImageStore.for_download_dir(download_dir, self.image_store_dir) if self.dedup else None
+        if store is not None and known is not None:
+            img_filename = os.path.join(download_dir, f"{index:03d}{known['ext']}")
+            if await self._io(store.link, known['sha256'], known['ext'], img_filename):
+                if page_url:
+                    await self._update_manifest(labels, page_url, index, 'complete', img_filename,
+                                                known['size'], known['sha256'])
+                return img_filename
+
+        semaphore, rate_limiter = self._limits_for(img_url)
+        async with semaphore:
+            wait_start = time.monotonic()
+            await rate_limiter.acquire()
+            self.metrics.record('rate_limit_wait', time.monotonic() - wait_start, **labels)
+            if stop_event.is_set():
+                return None
+            headers = {'referer': referer_url}
+
+            # 이전 실행에서 남은 .part 파일이 있으면 Range 요청으로 이어받습니다.
+            resume_path = find_part_file(download_dir, index)
+            offset = os.path.getsize(resume_path + PART_SUFFIX) if resume_path else 0
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+
+            download_start = time.monotonic()
+            response = await self._session.get(img_url, headers=headers)
+            if offset and not is_resumed_response(response.status, response.headers.get('Content-Range'), offset):
+                # ImageDownloader._get_image와 같이 맞지 않는 이어받기 응답이면 .part를 지우고 처음부터 받습니다.
+                if response.status in (206, 416):
+                    response.release()
+                    await self._io(discard_part_file, resume_path + PART_SUFFIX)
+                    del headers['Range']
+                    response = await self._session.get(img_url, headers=headers)
+                offset = 0
+            async with response:
+                response.raise_for_status()
+                if offset:
+                    img_filename = resume_path
+                else:
+                    img_filename = os.path.join(download_dir, f"{index:03d}{guess_image_extension(response, img_url)}")
+                    if resume_path and img_filename != resume_path:
+                        await self._io(discard_part_file, resume_path + PART_SUFFIX)
+                size, digest = await self._write_response(response, img_filename, stop_event, offset)
+            self.metrics.record('image_download', time.monotonic() - download_start, num_bytes=size - offset,
+                                image=index, **labels)
+
+        adopted = store is not None and await self._io(store.adopt, img_filename, digest)
+        if page_url or adopted:
+            start = time.monotonic()
+            await self._io(DB.complete_image, page_url, index, img_filename, size, digest,
+                           img_url if adopted else None)
+            self.metrics.record('db_manifest', time.monotonic() - start, **labels)
+        return img_filename
+
+    async def _download_all(self, images, download_dir, referer_url, stop_event, page_url, manifest,
+                            known_hashes, labels):
+        tasks = [
+            self._download_one(index, img_url, download_dir, referer_url, stop_event, page_url,
+                               manifest.get(index), labels, known_hashes.get(img_url))
+            for index, img_url in images
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        failed = []
+        for (index, img_url), result in zip(images, results):
+            if isinstance(result, (aiohttp.ClientError, asyncio.TimeoutError, IncompleteDownloadError)):
+                failed.append((index, img_url, result))
+                if page_url:
+                    await self._io(DB.update_image_manifest, page_url, index, 'failed')
+            elif isinstance(result, BaseException):
+                raise result
+        return failed
+
+    def download_episode(self, images, download_dir, referer_url, stop_event, page_url=None):
+        """ImageDownloader.download_episode와 같습니다. 실패한 이미지의 (번호, URL, 예외) 목록을 반환합니다."""
+        manifest = {}
+        if page_url:
+            DB.register_episode_images(page_url, download_dir, images)
+            manifest = DB.get_image_manifest(page_url)
+        known_hashes = DB.get_image_hashes(img_url for _, img_url in images) if self.dedup else {}
+        return self._run(self._download_all(images, download_dir, referer_url, stop_event, page_url, manifest,
+                                            known_hashes, self.metrics.current_labels()))
+
+    def resume_episode(self, page_url, referer_url, stop_event):
+        """ImageDownloader.resume_episode와 같습니다."""
+        manifest = DB.get_image_manifest(page_url)
+        if not manifest:
+            return None
+        download_dir = next(iter(manifest.values()))['download_dir']
+        images = [(index, entry['image_url']) for index, entry in manifest.items()]
+        return download_dir, self.download_episode(images, download_dir, referer_url, stop_event, page_url)
+
+    def close(self):
+        try:
+            self._run(self._session.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._io_executor.shutdown(wait=True)
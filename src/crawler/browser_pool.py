@@ -0,0 +1,185 @@
+import threading
+import time
+
+from crawler.fetcher import create_driver
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_MAX_SIZE = 4
+# 이 페이지 수를 넘게 사용한 브라우저는 반납 시 종료하고 새로 띄웁니다.
+DEFAULT_MAX_PAGES = 200
+# 브라우저 프로세스 트리의 메모리(RSS)가 이 값을 넘으면 재생성합니다. (psutil 설치 시)
+DEFAULT_MAX_MEMORY_MB = 1500
+# 새 브라우저를 연달아 띄울 때의 최소 간격 (초)
+DEFAULT_START_INTERVAL = 2.0
+
+
+class PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.monotonic()
+
+
+class BrowserPool:
+    """
+    여러 번의 수집 실행과 워커들이 함께 쓰는 SeleniumBase 브라우저 풀.
+    checkout()으로 빌려 쓰고 checkin()으로 반납하며, 반납된 브라우저는 다음 실행까지 살아 있어
+    '시작'을 다시 눌렀을 때 브라우저를 새로 띄우는 비용이 들지 않습니다.
+    반납 시 상태 확인에 실패하거나 사용 페이지 수/메모리 한도를 넘은 브라우저는 종료합니다.
+    """
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, max_pages=DEFAULT_MAX_PAGES, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                 start_interval=DEFAULT_START_INTERVAL, headless=False, driver_factory=None):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.start_interval = start_interval
+        self.headless = headless
+        self.driver_factory = driver_factory or (lambda: create_driver(headless=self.headless))
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._starting = 0
+        self._closed = False
+        self._start_lock = threading.Lock()
+        self._last_start = 0.0
+
+    @property
+    def size(self):
+        return len(self._idle) + len(self._in_use) + self._starting
+
+    def ensure_capacity(self, size):
+        """최대 브라우저 개수를 최소 size개로 늘립니다."""
+        with self._cond:
+            self.max_size = max(self.max_size, size)
+            self._cond.notify_all()
+
+    def _start_browser(self):
+        # 브라우저가 동시에 여러 개 뜨면 봇 탐지/부하 문제가 생기므로 간격을 두고 띄웁니다.
+        with self._start_lock:
+            wait = self._last_start + self.start_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return PooledBrowser(self.driver_factory())
+            finally:
+                self._last_start = time.monotonic()
+
+    def warm_up(self, count=1):
+        """백그라운드에서 브라우저를 count개까지 미리 띄워 둡니다."""
+        def run():
+            while True:
+                with self._cond:
+                    if self._closed or len(self._idle) + self._starting >= count or self.size >= self.max_size:
+                        return
+                    self._starting += 1
+                browser = None
+                try:
+                    browser = self._start_browser()
+                except Exception as e:
+                    print(f"브라우저 예열 실패: {e}")
+                    return
+                finally:
+                    with self._cond:
+                        self._starting -= 1
+                        if browser is not None:
+                            if self._closed:
+                                self._quit(browser)
+                            else:
+                                self._idle.append(browser)
+                        self._cond.notify_all()
+        threading.Thread(target=run, name="BrowserPoolWarmUp", daemon=True).start()
+
+    def checkout(self, stop_event=None):
+        """
+        상태가 정상인 브라우저 드라이버를 빌려 줍니다. 남는 브라우저가 없고 한도에 여유가 있으면 새로 띄우며,
+        한도가 찼으면 반납될 때까지 기다립니다. 중지 요청 시 None을 반환합니다.
+        """
+        while True:
+            with self._cond:
+                while not self._idle and self.size >= self.max_size:
+                    if self._closed or (stop_event is not None and stop_event.is_set()):
+                        return None
+                    self._cond.wait(timeout=0.5)
+                if self._closed or (stop_event is not None and stop_event.is_set()):
+                    return None
+                if self._idle:
+                    browser = self._idle.pop()
+                    self._in_use[id(browser.driver)] = browser
+                else:
+                    browser = None
+                    self._starting += 1
+
+            if browser is not None:
+                if self._is_healthy(browser):
+                    return browser.driver
+                with self._cond:
+                    self._in_use.pop(id(browser.driver), None)
+                    self._cond.notify_all()
+                self._quit(browser)
+                continue
+
+            try:
+                browser = self._start_browser()
+            finally:
+                with self._cond:
+                    self._starting -= 1
+                    if browser is not None:
+                        self._in_use[id(browser.driver)] = browser
+                    self._cond.notify_all()
+            return browser.driver
+
+    def checkin(self, driver, pages_served=0):
+        """빌려 간 드라이버를 반납합니다. 재사용할 수 없는 브라우저는 종료합니다."""
+        with self._cond:
+            browser = self._in_use.pop(id(driver), None)
+        if browser is None:
+            return
+        browser.pages_served += pages_served
+        recycle = (self._closed or browser.pages_served >= self.max_pages
+                   or self._memory_mb(browser) > self.max_memory_mb or not self._is_healthy(browser))
+        if recycle:
+            self._quit(browser)
+        with self._cond:
+            if not recycle:
+                self._idle.append(browser)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _is_healthy(browser):
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _memory_mb(browser):
+        """드라이버와 브라우저 하위 프로세스들의 RSS 합계(MB). psutil이 없으면 0을 반환합니다."""
+        if psutil is None:
+            return 0
+        try:
+            process = psutil.Process(browser.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _quit(browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """대기 중인 브라우저를 모두 종료합니다. 사용 중인 브라우저는 반납될 때 종료됩니다."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for browser in idle:
+            self._quit(browser)
@@ -0,0 +1,198 @@
+"""
+수집 중 동시성을 자동으로 조절하는 AIMD 컨트롤러.
+
+AdaptiveLimit은 실행 중에 크기를 바꿀 수 있는 세마포어이고, AimdController는 일정 간격마다
+최근 결과(소요 시간, 오류, 429/503 응답)와 이 기계의 CPU/메모리 사용률을 보고 한도를 조절합니다.
+  - 스로틀링 응답, 높은 오류율, 기준보다 크게 늘어난 지연, CPU/메모리 부족: 한도를 절반으로 (multiplicative decrease)
+  - 그 외에 한도까지 모두 사용 중이었으면: 한도를 1 늘림 (additive increase)
+조절할 때마다 log_callback으로 이유와 함께 기록합니다.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 서버가 요청을 줄이라고 알리는 HTTP 상태 코드
+THROTTLE_STATUS = (429, 503)
+DEFAULT_INTERVAL = 5.0
+DEFAULT_MAX_ERROR_RATE = 0.2
+# 최근 창의 지연 중앙값이 기준(최근 창들 중 가장 낮은 중앙값)의 이 배수를 넘으면 줄입니다.
+DEFAULT_LATENCY_FACTOR = 2.0
+# 지연 기준으로 삼을 최근 창의 개수
+BASELINE_WINDOWS = 10
+# 이 비율(%)을 넘으면 CPU/메모리가 부족하다고 봅니다.
+DEFAULT_CPU_LIMIT = 90.0
+DEFAULT_MEMORY_LIMIT = 90.0
+
+
+def _memory_percent():
+    """사용 중인 메모리 비율(%)을 반환합니다. 알 수 없으면 None을 반환합니다."""
+    if psutil is not None:
+        return psutil.virtual_memory().percent
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            info = {line.split(':')[0]: int(line.split()[1]) for line in f}
+        return 100.0 * (1 - info['MemAvailable'] / info['MemTotal'])
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+
+# psutil이 없을 때 /proc/stat으로 CPU 사용률을 계산하기 위한 지난 호출의 (idle, total)
+_last_cpu_times = None
+
+
+def _cpu_percent():
+    """
+    지난 호출 이후의 전체 CPU 사용률(%)을 반환합니다. psutil이 없으면 /proc/stat(리눅스)으로 계산하고,
+    알 수 없거나 첫 호출이면 None을 반환합니다.
+    """
+    global _last_cpu_times
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None)
+    try:
+        with open('/proc/stat', encoding='ascii') as f:
+            values = [int(value) for value in f.readline().split()[1:9]]
+    except (OSError, ValueError):
+        return None
+    # user nice system idle iowait irq softirq steal
+    idle, total = values[3] + values[4], sum(values)
+    previous, _last_cpu_times = _last_cpu_times, (idle, total)
+    if previous is None or total <= previous[1]:
+        return None
+    return 100.0 * (1 - (idle - previous[0]) / (total - previous[1]))
+
+
+def system_pressure(cpu_limit=DEFAULT_CPU_LIMIT, memory_limit=DEFAULT_MEMORY_LIMIT):
+    """CPU나 메모리 사용률이 한도를 넘었으면 이유 문자열을, 아니면 None을 반환합니다."""
+    memory = _memory_percent()
+    if memory is not None and memory > memory_limit:
+        return f"메모리 사용률 {memory:.0f}%"
+    cpu = _cpu_percent()
+    if cpu is not None and cpu > cpu_limit:
+        return f"CPU 사용률 {cpu:.0f}%"
+    return None
+
+
+class AdaptiveLimit:
+    """실행 중에 한도를 바꿀 수 있는 세마포어. 한도를 줄이면 사용 중인 자리가 반납될 때까지 새로 들어오지 못합니다."""
+    def __init__(self, limit):
+        self._cond = threading.Condition()
+        self.limit = max(1, int(limit))
+        self.active = 0
+        # 마지막 확인 이후 동시에 사용된 자리 수의 최댓값 (한도까지 다 썼는지 판단용)
+        self.peak_active = 0
+
+    def acquire(self, stop_event=None):
+        """자리가 날 때까지 기다립니다. 기다리는 중에 중지되면 False를 반환합니다."""
+        with self._cond:
+            while self.active >= self.limit:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                self._cond.wait(timeout=0.5 if stop_event is not None else None)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            return True
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def set_limit(self, limit):
+        with self._cond:
+            self.limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def take_peak(self):
+        """마지막 호출 이후 최대 동시 사용 수를 반환하고 현재 사용 수로 초기화합니다."""
+        with self._cond:
+            peak, self.peak_active = self.peak_active, self.active
+            return peak
+
+
+class AimdController:
+    """
+    AdaptiveLimit 하나의 한도를 record()로 받은 결과에 따라 minimum~maximum 사이에서 조절합니다.
+    여러 스레드에서 record()를 호출할 수 있으며, interval초마다 한 번 한도를 다시 계산합니다.
+    """
+    def __init__(self, name, limit, minimum=1, maximum=16, interval=DEFAULT_INTERVAL, min_samples=3,
+                 max_error_rate=DEFAULT_MAX_ERROR_RATE, latency_factor=DEFAULT_LATENCY_FACTOR,
+                 pressure=system_pressure, log_callback=print):
+        self.name = name
+        self.limit = limit
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.interval = interval
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.latency_factor = latency_factor
+        self.pressure = pressure
+        self.log_callback = log_callback
+
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._errors = 0
+        self._throttled = 0
+        self._medians = deque(maxlen=BASELINE_WINDOWS)
+        self._window_start = time.monotonic()
+        self.adjustments = 0
+        limit.set_limit(min(self.maximum, max(self.minimum, limit.limit)))
+
+    def record(self, seconds, ok=True, throttled=False):
+        """요청/작업 하나의 결과를 기록하고, 창이 끝났으면 한도를 조절합니다."""
+        with self._lock:
+            if ok:
+                self._latencies.append(seconds)
+            else:
+                self._errors += 1
+            if throttled:
+                self._throttled += 1
+            if time.monotonic() - self._window_start < self.interval:
+                return
+            latencies, errors, throttled_count = self._latencies, self._errors, self._throttled
+            self._latencies, self._errors, self._throttled = [], 0, 0
+            self._window_start = time.monotonic()
+        self._adjust(latencies, errors, throttled_count)
+
+    def _decrease_reason(self, latencies, errors, throttled):
+        samples = len(latencies) + errors
+        if throttled:
+            return f"스로틀링 응답 {throttled}건"
+        if samples >= self.min_samples and errors / samples > self.max_error_rate:
+            return f"오류율 {errors / samples:.0%}"
+        if latencies:
+            median = statistics.median(latencies)
+            baseline = min(self._medians) if self._medians else None
+            self._medians.append(median)
+            if baseline and len(latencies) >= self.min_samples and median > baseline * self.latency_factor:
+                return f"지연 중앙값 {median:.2f}s (기준 {baseline:.2f}s)"
+        return self.pressure() if self.pressure else None
+
+    def _adjust(self, latencies, errors, throttled):
+        current = self.limit.limit
+        saturated = self.limit.take_peak() >= current
+        reason = self._decrease_reason(latencies, errors, throttled)
+        if reason:
+            new_limit = max(self.minimum, current // 2)
+        elif saturated and len(latencies) >= self.min_samples:
+            new_limit = min(self.maximum, current + 1)
+            reason = f"처리 {len(latencies)}건, 지연 중앙값 {statistics.median(latencies):.2f}s"
+        else:
+            return
+        if new_limit == current:
+            return
+        self.limit.set_limit(new_limit)
+        self.adjustments += 1
+        self.log_callback(f"[동시성] {self.name}: {current} → {new_limit} ({reason})")
@@ -1,24 +1,29 @@
 import concurrent.futures
 import io
-import mimetypes
 import os
 import random
 import re
+import threading
 import time
 from urllib.parse import urlparse
 
-import google.generativeai as genai
-import requests
-from PIL import Image
-from bs4 import BeautifulSoup
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from seleniumbase import Driver
-
 # from database import is_url_crawled, add_crawled_url, get_app_config
 import database as DB
+from crawler.browser_pool import BrowserPool
+from crawler.concurrency import THROTTLE_STATUS, AdaptiveLimit, AimdController
+from crawler.downloader import ImageDownloader
+from crawler.extract import get_backend, iter_list_page, list_content_hash, parse_episode_page
+from crawler.fetcher import (
+    CAPTCHA_URL_PART, EPISODE_WAIT_SELECTOR, LIST_WAIT_SELECTOR,
+    BrowserPageFetcher, FallbackPageFetcher, HttpPageFetcher,
+    has_article_body, has_article_images,
+)
+from crawler.http_cache import CacheMissError, HttpCache
+from crawler.metrics import NULL_METRICS, Metrics, MetricsServer
+from crawler.postprocess import PostProcessor, cbz_path_for
+from crawler.scheduler import (
+    DEFAULT_BASE_BACKOFF, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, LeaseWorkQueue, WorkQueue,
+)
 
 
 def gemini_ocr(captcha_img_data, log_callback):
@@ -35,6 +40,10 @@ def gemini_ocr(captcha_img_data, log_callback):
         return None
 
     try:
+        # OCR이 필요할 때만 가져옵니다. (가져오는 데 오래 걸리는 라이브러리)
+        import google.generativeai as genai
+        from PIL import Image
+
         genai.configure(api_key=API_KEY)
         model = genai.GenerativeModel('gemini-2.0-flash')
 
@@ -58,23 +67,89 @@ def gemini_ocr(captcha_img_data, log_callback):
 def create_text_file(download_path, content, file_name="list_url.txt"):
     abs_path = os.path.join(download_path, file_name)
     if not os.path.exists(abs_path):
+        # 명령행에서는 아직 없는 다운로드 경로를 줄 수 있습니다.
+        os.makedirs(download_path or '.', exist_ok=True)
         with open(abs_path, 'w') as file:
             file.write(content)
 
-def scroll_to_bottom_with_pagedown(driver, stop_event, max_scrolls=500, sleep_time=0.2):
-    body = driver.find_element(By.TAG_NAME, "body")
-    scroll_count = 0
-    while scroll_count < max_scrolls and not stop_event.is_set():
-        last_scroll_y = driver.execute_script("return window.scrollY")
-        body.send_keys(Keys.PAGE_DOWN)
-        scroll_count += 1
-        time.sleep(sleep_time)
-        new_scroll_y = driver.execute_script("return window.scrollY")
-        if new_scroll_y == last_scroll_y:
+ARTICLE_SECTION_SELECTOR = "section[itemtype='http://schema.org/NewsArticle']"
+DEFAULT_NUM_THREADS = 3
+# 스레드 개수가 '자동'일 때 페이지 워커의 최대 개수 기본값 (max_threads 설정으로 변경)
+DEFAULT_MAX_THREADS = 8
+# 브라우저 페처는 워커마다 브라우저를 띄우므로 '자동'일 때의 최대 개수를 예전 GUI 한도로 낮춥니다.
+BROWSER_MAX_THREADS = 4
+# 페이지 워커 수를 다시 계산하는 간격 (초)
+PAGE_ADAPTIVE_INTERVAL = 10.0
+
+# 본문 이미지를 약 한 프레임(16ms) 간격으로 하나씩 화면에 보이게 하여 지연 로딩을 한 번의 스크립트 호출로 모두 트리거합니다.
+# requestAnimationFrame은 창이 가려지거나 최소화되면 멈추므로 setTimeout을 사용합니다. 반환값은 본문 이미지 개수입니다.
+LAZY_LOAD_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const section = document.querySelector(arguments[0]);
+if (!section) { done(0); return; }
+const imgs = Array.from(section.querySelectorAll('img'));
+let i = 0;
+function step() {
+    if (i >= imgs.length) {
+        window.scrollTo(0, document.body.scrollHeight);
+        done(imgs.length);
+        return;
+    }
+    imgs[i].loading = 'eager';
+    imgs[i].scrollIntoView({block: 'end'});
+    i += 1;
+    setTimeout(step, 16);
+}
+step();
+"""
+
+# 본문 이미지 개수와 실제 src가 채워진 이미지 개수를 반환합니다.
+IMAGE_STATUS_SCRIPT = """
+const section = document.querySelector(arguments[0]);
+if (!section) return [0, 0];
+const imgs = Array.from(section.querySelectorAll('img'));
+const resolved = imgs.filter(img => {
+    const src = (img.getAttribute('src') || '').toLowerCase();
+    return src && !src.startsWith('data:') && !src.includes('.gif');
+});
+return [imgs.length, resolved.length];
+"""
+
+def load_lazy_images(driver, stop_event, timeout=20, poll_interval=0.25, stable_polls=4):
+    """
+    지연 로딩 이미지를 트리거하고, 이미지 개수와 src가 채워진 개수가 안정될 때까지 기다립니다.
+    본문 이미지가 없거나 모든 이미지의 src가 채워지면 즉시, 그렇지 않으면 stable_polls번 연속으로 변화가 없거나
+    timeout초가 지나면 끝납니다. (전체 이미지 수, src가 채워진 이미지 수)를 반환합니다.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    deadline = time.monotonic() + timeout
+    driver.set_script_timeout(timeout)
+    try:
+        if driver.execute_async_script(LAZY_LOAD_SCRIPT, ARTICLE_SECTION_SELECTOR) == 0:
+            return (0, 0)
+    except TimeoutException:
+        # 스크롤이 끝나지 않았어도 그때까지 트리거된 이미지의 상태를 한 번은 확인합니다.
+        pass
+
+    last_status = None
+    unchanged = 0
+    status = (0, 0)
+    while not stop_event.is_set():
+        status = tuple(driver.execute_script(IMAGE_STATUS_SCRIPT, ARTICLE_SECTION_SELECTOR))
+        total, resolved = status
+        if not total or resolved == total:
             break
-    time.sleep(2)
+        unchanged = unchanged + 1 if status == last_status else 0
+        if unchanged >= stable_polls or time.monotonic() >= deadline:
+            break
+        last_status = status
+        stop_event.wait(poll_interval)
+    return status
 
 def handle_captcha(driver, worker_id, log_callback, stop_event):
+    from selenium.webdriver.common.by import By
+
     max_retries = 3
     for i in range(max_retries):
         if "bbs/captcha.php" not in driver.current_url or stop_event.is_set():
@@ -117,123 +192,294 @@ def handle_captcha(driver, worker_id, log_callback, stop_event):
     while "bbs/captcha.php" in driver.current_url and not stop_event.is_set():
         time.sleep(5)
 
-def crawl_worker(worker_id, base_download_path, referer_url, url_list, log_callback, stop_event):
-    result = []
-    if not url_list:
-        return result
+class SeriesJob:
+    """작업 대기열의 만화(목록 URL) 하나와 이번 실행에서의 진행 상황."""
+    def __init__(self, job):
+        self.id = job['id']
+        self.list_url = job['list_url']
+        self.download_path = job['download_path']
+        self.priority = job['priority']
+        parsed_uri = urlparse(self.list_url)
+        self.referer_url = f'{parsed_uri.scheme}://{parsed_uri.netloc}/'
+        self.remaining = 0
+        self.failed_count = 0
+        # 이번 실행에서 목록 페이지를 읽지 못했는지 여부
+        self.list_failed = False
+
+class CrawlContext:
+    """
+    한 번의 수집 실행 동안 모든 워커가 공유하는 객체 묶음.
+    concurrency(AimdController)가 있으면 워커는 그 한도 안에서만 에피소드를 처리합니다.
+    result_writer가 None이면(lease 모드) 수집 완료는 작업 큐가 임대 토큰으로만 기록합니다.
+    """
+    def __init__(self, crawled_cache, result_writer, downloader, http_fetcher,
+                 browser_pool, parser, log_callback, stop_event, metrics=NULL_METRICS, postprocessor=None,
+                 concurrency=None):
+        self.crawled_cache = crawled_cache
+        self.result_writer = result_writer
+        self.downloader = downloader
+        self.http_fetcher = http_fetcher
+        self.browser_pool = browser_pool
+        self.parser = parser
+        self.log_callback = log_callback
+        self.stop_event = stop_event
+        self.metrics = metrics
+        self.postprocessor = postprocessor
+        self.concurrency = concurrency
+
+def process_episode(worker_id, url, series, context, page_fetcher):
+    """
+    만화 작업(series)의 에피소드 하나를 수집하고 결과 dict를 반환합니다.
+    결과의 "retry"가 False인 실패는 다시 시도하지 않습니다. 중지 요청으로 끝나지 못했으면 None을 반환합니다.
+    """
+    log_callback = context.log_callback
+    stop_event = context.stop_event
+    metrics = context.metrics
+    referer_url = series.referer_url
+
+    def succeed(post_title, message, download_dir, postprocess=True):
+        if postprocess and context.postprocessor:
+            # 후처리 대기열이 가득 차면 여기서 기다리므로 다운로드가 후처리보다 앞서 나가지 않습니다.
+            metadata = {"title": post_title, "series": os.path.basename(series.download_path.rstrip('/\\')),
+                        "url": url}
+            context.postprocessor.submit(download_dir, metadata, stop_event)
+        if context.result_writer:
+            context.result_writer.add(url, post_title)
+        context.crawled_cache.add(url)
+        log_callback(f"워커 {worker_id}: [SUCCESS] {message} - {post_title}")
+        return {"state": "SUCCESS", "message": "성공", "title": post_title, "url": url}
+
+    if url in context.crawled_cache:
+        log_callback(f"워커 {worker_id}: 이미 수집된 URL입니다: {url}")
+        return {"state": "SUCCESS", "message": "이미 수집됨", "title": "", "url": url}
 
-    time.sleep(worker_id * 5)
-
-    driver = None
     try:
-        driver = Driver(uc=True, headless=False)
-        while not stop_event.is_set():
-            for url in url_list:
-                if len(url_list) == 0:
-                    continue
-
-                try:
-                    if DB.is_url_crawled(url):
-                        log_callback(f"워커 {worker_id}: 이미 수집된 URL입니다: {url}")
-                        continue
-
-                    log_callback(f"워커 {worker_id}: Navigating to: {url}")
-                    driver.get(url)
-
-
-                    combined_css_selector = "article[itemprop='articleBody'], img[src*='kcaptcha_image.php']"
-
-                    WebDriverWait(driver, 30).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, combined_css_selector))
-                    )
-
-                    if stop_event.is_set():
+        # 이미지를 지우고 CBZ만 남긴 에피소드는 CBZ가 있으면 다시 받지 않습니다.
+        packaged_dir = DB.get_packaged_episode_dir(url)
+        if packaged_dir and os.path.exists(cbz_path_for(packaged_dir)):
+            return succeed(os.path.basename(packaged_dir), "CBZ로 묶인 에피소드", packaged_dir, postprocess=False)
+
+        # 이전 실행에서 중단된 에피소드는 manifest의 이미지 목록으로 바로 이어받습니다.
+        resumed = context.downloader.resume_episode(url, referer_url, stop_event)
+        if resumed is not None:
+            download_dir, failed = resumed
+            if stop_event.is_set():
+                return None
+            if not failed:
+                return succeed(os.path.basename(download_dir), "이어받기 완료", download_dir)
+            log_callback(f"워커 {worker_id}: 이어받기 중 {len(failed)}개 이미지 실패. 페이지를 다시 엽니다.")
+
+        episode_start = time.monotonic()
+        log_callback(f"워커 {worker_id}: Navigating to: {url}")
+        page_source = page_fetcher.fetch(url, stop_event, referer_url)
+        if page_source is None or stop_event.is_set():
+            return None
+        log_callback(f"워커 {worker_id}: 페이지 로딩 방식: {page_fetcher.last_fetcher}")
+
+        with metrics.timer('parse'):
+            episode = parse_episode_page(page_source, context.parser)
+        post_title = episode.title or f"untitled_post_{random.randint(1000, 9999)}"
+        log_callback(f"워커 {worker_id}: Post Title: {post_title}")
+
+        if not episode.has_section:
+            log_callback(f"워커 {worker_id}: [FAIL] mana_section이 없습니다. {url}")
+            return {"state": "STOPED", "message": "mana_section이 없습니다.", "title": post_title, "url": url}
+
+        download_dir = os.path.join(series.download_path, post_title)
+        os.makedirs(download_dir, exist_ok=True)
+        log_callback(f"워커 {worker_id}: Found {episode.image_count} images.")
+
+        failed = context.downloader.download_episode(episode.images, download_dir, referer_url, stop_event, page_url=url)
+        for _, img_url, req_err in failed:
+            log_callback(f"워커 {worker_id}: Error downloading {img_url}: {req_err}")
+
+        elapsed = time.monotonic() - episode_start
+        waited = page_fetcher.last_wait_seconds
+        metrics.record('episode', elapsed, images=len(episode.images), failed=len(failed),
+                       fetcher=page_fetcher.last_fetcher)
+        log_callback(f"워커 {worker_id}: 소요 {elapsed:.1f}s (대기 {waited:.1f}s / 작업 {elapsed - waited:.1f}s)")
+
+        if stop_event.is_set():
+            return None
+        if failed:
+            # 완료 처리하지 않으므로 다음 시도에서는 실패한 이미지만 다시 받습니다.
+            log_callback(f"워커 {worker_id}: [FAIL] 이미지 {len(failed)}개 다운로드 실패 - {post_title}")
+            return {"state": "FAIL", "message": f"이미지 {len(failed)}개 실패", "title": post_title, "url": url}
+        return succeed(post_title, "수집 완료", download_dir)
+
+    except CacheMissError as e:
+        # offline 모드에서는 다시 시도해도 같은 캐시를 읽으므로 바로 실패로 끝냅니다.
+        log_callback(f"워커 {worker_id}: [FAIL] {e}")
+        return {"state": "FAIL", "message": str(e), "title": "", "url": url, "retry": False}
+    except Exception as e:
+        log_callback(f"워커 {worker_id}: [FAIL] 처리 중 오류 발생 {url}. {e}")
+        return {"state": "FAIL", "message": f"[FAIL] 처리 중 오류 발생. {e}", "title": "", "url": url}
+
+def crawl_worker(worker_id, context, work_queue):
+    """작업 큐에서 에피소드를 하나씩 가져와 처리합니다. 실패한 에피소드는 큐에 다시 넣어 재시도합니다."""
+    log_callback = context.log_callback
+    stop_event = context.stop_event
+    metrics = context.metrics
+
+    def prepare_page(driver, stop_event):
+        if CAPTCHA_URL_PART in driver.current_url:
+            with metrics.timer('captcha'):
+                handle_captcha(driver, worker_id, log_callback, stop_event)
+        with metrics.timer('lazy_load') as fields:
+            total, resolved = load_lazy_images(driver, stop_event)
+            fields.update(images=total, resolved=resolved)
+        log_callback(f"워커 {worker_id}: 지연 로딩 이미지 {resolved}/{total}개 준비됨")
+
+    # HTTP로 먼저 받아보고, 이미지가 있는 본문이 없을 때만 브라우저를 띄웁니다.
+    browser_fetcher = BrowserPageFetcher(wait_selector=EPISODE_WAIT_SELECTOR, prepare_page=prepare_page,
+                                         pool=context.browser_pool, stop_event=stop_event, metrics=metrics)
+    # 에피소드 페이지는 잘 바뀌지 않으므로 캐시 유효 시간 안에는 재시도/재실행에서도 다시 받지 않습니다.
+    http_cache = context.http_fetcher.cache if context.http_fetcher else None
+    page_fetcher = FallbackPageFetcher(context.http_fetcher, browser_fetcher, has_article_images, log_callback,
+                                       max_age=http_cache.max_age if http_cache else None)
+    concurrency = context.concurrency
+    work_queue.register_worker(worker_id)
+    try:
+        while True:
+            # 동시성 한도가 줄었으면 다른 워커가 자리를 반납할 때까지 여기서 기다립니다.
+            if concurrency:
+                with metrics.timer('concurrency_wait', worker=worker_id):
+                    if not concurrency.limit.acquire(stop_event):
                         break
-
-                    if "bbs/captcha.php" in driver.current_url:
-                        handle_captcha(driver, worker_id, log_callback, stop_event)
-
-                    scroll_to_bottom_with_pagedown(driver, stop_event)
-
-                    page_source = driver.page_source
-                    soup = BeautifulSoup(page_source, 'html.parser')
-
-                    title_element = soup.find('h1') or soup.find('div', class_='view-title')
-                    if title_element:
-                        post_title = title_element.get_text(strip=True)
-                        if "마나토끼 -" in post_title:
-                            post_title = post_title.replace(" > 마나토끼 - 일본만화 허브", "").strip()
-                    else:
-                        post_title = f"untitled_post_{random.randint(1000, 9999)}"
-                    log_callback(f"워커 {worker_id}: Post Title: {post_title}")
-
-                    download_dir = os.path.join(base_download_path, post_title)
-                    os.makedirs(download_dir, exist_ok=True)
-
-                    html_mana_section = soup.find('section', itemtype='http://schema.org/NewsArticle')
-                    if html_mana_section:
-                        img_tags = html_mana_section.find_all('img')
-                        log_callback(f"워커 {worker_id}: Found {len(img_tags)} images.")
-
-                        for i, img in enumerate(img_tags):
-                            if stop_event.is_set():
-                                break
-                            img_url = img.get('src')
-                            if img_url and '.gif' not in img_url.lower():
-                                try:
-                                    header = {'referer': referer_url}
-                                    response = requests.get(img_url, stream=True, headers=header, timeout=30)
-                                    response.raise_for_status()
-
-                                    content_type = response.headers.get('Content-Type')
-                                    ext = mimetypes.guess_extension(content_type) or os.path.splitext(img_url)[1] or ".jpg"
-                                    img_filename = os.path.join(download_dir, f"{i + 1:03d}{ext}")
-                                    with open(img_filename, 'wb') as f:
-                                        f.write(response.content)
-                                except requests.exceptions.RequestException as req_err:
-                                    log_callback(f"워커 {worker_id}: Error downloading {img_url}: {req_err}")
-
-                        if not stop_event.is_set():
-                            DB.add_crawled_url(url, post_title)
-                            log_callback(f"워커 {worker_id}: [SUCCESS] 수집 완료 - {post_title}")
-                            result.append({"state": "SUCCESS", "message": "성공", "title": post_title, "url": url})
-                    else:
-                        log_callback(f"워커 {worker_id}: [FAIL] mana_section이 없습니다. {url}")
-                        result.append({"state": "STOPED", "message": "mana_section이 없습니다.", "title": post_title, "url": url})
-
-                except Exception as e:
-                    log_callback(f"워커 {worker_id}: [FAIL] 처리 중 오류 발생 {url}. {e}")
-                    result.append({"state": "FAIL", "message": f"[FAIL] 처리 중 오류 발생. {e}", "title": "", "url": url})
-            return result
+            try:
+                with metrics.timer('queue_wait', worker=worker_id):
+                    item = work_queue.get(worker_id, stop_event)
+                if item is None:
+                    break
+                page_fetcher.last_fetcher = page_fetcher.last_status = None
+                episode_start = time.monotonic()
+                with metrics.bind(worker=worker_id, episode=item.url):
+                    result = process_episode(worker_id, item.url, item.data, context, page_fetcher)
+                if result is None:
+                    work_queue.release(item)
+                    break
+                # 이미 수집된/이어받기로 끝난 에피소드처럼 페이지를 받지 않은 경우는 지연에 넣지 않습니다.
+                if concurrency and (result["state"] != "SUCCESS" or page_fetcher.last_fetcher):
+                    concurrency.record(time.monotonic() - episode_start, ok=result["state"] == "SUCCESS",
+                                       throttled=page_fetcher.last_status in THROTTLE_STATUS)
+                if result["state"] == "SUCCESS" or not result.get("retry", True):
+                    work_queue.complete(item, result)
+                elif work_queue.retry(item, worker_id, result):
+                    log_callback(f"워커 {worker_id}: 재시도 대기열에 추가 ({item.attempts}/{work_queue.max_attempts}) {item.url}")
+            finally:
+                if concurrency:
+                    concurrency.limit.release()
     finally:
-        if driver:
-            driver.quit()
+        work_queue.unregister_worker(worker_id)
+        page_fetcher.close()
+        DB.close_thread_connection()
         log_callback(f"워커 {worker_id}: 종료")
 
-def get_target_pages(driver, target_url, log_callback):
+def get_target_pages(page_fetcher, series, log_callback, stop_event, parser=None, full_refresh=False,
+                     metrics=NULL_METRICS):
+    """
+    만화 목록 페이지에서 새로 올라온 에피소드 URL 목록을 반환합니다.
+    목록 부분의 해시가 지난번과 같으면 파싱하지 않고 빈 목록을 반환하며,
+    목록을 최신 에피소드부터 읽다가 이미 알고 있는 에피소드를 만나면 멈춥니다.
+    full_refresh이면 해시와 기존 에피소드를 무시하고 전체 목록을 반환합니다.
+    목록을 읽지 못하면 None을 반환합니다.
+    """
     try:
-        log_callback(f"수집 대상 목록을 조회합니다: {target_url}")
-        driver.get(target_url)
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "article[itemprop='articleBody']"))
-        )
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        article_body = soup.find('article', itemprop='articleBody')
-        if article_body:
-            serial_list_div = article_body.find('div', class_='serial-list')
-            links = serial_list_div.find_all('a', href=True) if serial_list_div else []
-            article_urls = [link['href'] for link in links]
-            log_callback(f"총 {len(article_urls)}개의 에피소드를 찾았습니다.")
-            return article_urls
-        else:
-            log_callback("만화 목록을 찾을 수 없습니다.")
+        log_callback(f"수집 대상 목록을 조회합니다: {series.list_url}")
+        with metrics.timer('list_page', url=series.list_url):
+            page_source = page_fetcher.fetch(series.list_url, stop_event)
+        if page_source is None:
+            return None
+
+        content_hash = list_content_hash(page_source)
+        index = DB.get_series_index(series.list_url)
+        if not full_refresh and index and index['content_hash'] == content_hash:
+            log_callback(f"목록이 지난 확인({index['checked_at']}) 이후 바뀌지 않았습니다.")
+            DB.update_series_index(series.list_url, content_hash)
             return []
+
+        links = iter_list_page(page_source, parser)
+        if links is None:
+            log_callback("만화 목록을 찾을 수 없습니다.")
+            return None
+
+        known_urls = set() if full_refresh else DB.get_known_episode_urls(series.id)
+        article_urls = []
+        for url in links:
+            if url in known_urls:
+                break
+            article_urls.append(url)
+
+        # 에피소드 작업을 먼저 저장한 뒤 해시를 기록해야 중단되어도 새 에피소드를 놓치지 않습니다.
+        DB.add_episode_jobs(series.id, article_urls)
+        DB.update_series_index(series.list_url, content_hash, article_urls[0] if article_urls else None)
+        if known_urls:
+            log_callback(f"새 에피소드 {len(article_urls)}개를 찾았습니다.")
+        else:
+            log_callback(f"총 {len(article_urls)}개의 에피소드를 찾았습니다.")
+        return article_urls
     except Exception as e:
         log_callback(f"목록 페이지 로딩 중 에러가 발생했습니다: {e}")
-        return []
+        return None
 
-def master_crawl_thread(params, gui_queue, stop_event):
+def queue_series_episodes(series, list_fetcher, work_queue, parser, log_callback, stop_event, full_refresh=False,
+                          metrics=NULL_METRICS):
+    """
+    만화 작업의 목록 페이지에서 새 에피소드를 찾아 저장하고, 아직 수집하지 않은 에피소드를 작업 큐에 넣습니다.
+    목록을 읽지 못해도 이전 실행에서 저장해 둔 미완료 에피소드는 이어서 수집합니다.
+    """
+    new_urls = get_target_pages(list_fetcher, series, log_callback, stop_event, parser, full_refresh, metrics)
+    if new_urls is not None:
+        create_text_file(series.download_path, series.list_url)
+    elif not stop_event.is_set():
+        series.list_failed = True
+
+    # 수집 기록을 지웠거나 기록 전에 중단된 에피소드는 완료 상태로 남아 있어도 다시 받습니다.
+    reopened = DB.reopen_uncrawled_episode_jobs(series.id)
+    if reopened:
+        log_callback(f"수집 기록이 없는 완료 에피소드 {reopened}개를 다시 수집합니다.")
+    unfinished_urls = DB.get_unfinished_episode_urls(series.id)
+    crawled = DB.get_crawled_urls(unfinished_urls)
+    DB.set_episode_job_states(series.id, [url for url in unfinished_urls if url in crawled], 'done')
+    target_urls = [url for url in unfinished_urls if url not in crawled]
+
+    if target_urls:
+        log_callback(f"미완료 에피소드 {len(unfinished_urls)}개중 이미 수집완료된 {len(crawled)}개는 제외합니다.")
+        # 지난 실행에서 실패한 에피소드도 다른 프로세스(work_mode='lease')가 다시 임대할 수 있게 합니다.
+        DB.requeue_episode_jobs(series.id, target_urls)
+
+    if not target_urls:
+        if new_urls is not None:
+            DB.set_series_job_state(series.id, 'done')
+        elif not stop_event.is_set():
+            DB.set_series_job_state(series.id, 'failed', "만화 목록을 찾을 수 없습니다.")
+        return 0
+
+    series.remaining = len(target_urls)
+    for url in target_urls:
+        work_queue.add(url, series)
+    return len(target_urls)
+
+def create_downloader(params, metrics, log_callback):
+    """
+    download_engine 설정(수집 파라미터 → app_config)에 맞는 이미지 다운로더를 만듭니다.
+    'thread'(기본값): 스레드 풀 + requests, 'async': asyncio + aiohttp (없으면 스레드 엔진으로 대체)
+    """
+    engine = params.get('download_engine') or DB.get_app_config('download_engine') or 'thread'
+    if engine == 'async':
+        from crawler.async_downloader import AsyncImageDownloader
+        try:
+            downloader = AsyncImageDownloader.from_params(params, metrics)
+        except ImportError as e:
+            log_callback(f"{e} 스레드 다운로드 엔진을 사용합니다.")
+        else:
+            log_callback(f"다운로드 엔진: async (동시 전송 최대 {downloader.max_in_flight}개)")
+            return downloader
+    elif engine != 'thread':
+        log_callback(f"알 수 없는 다운로드 엔진 '{engine}' 대신 스레드 엔진을 사용합니다.")
+    return ImageDownloader.from_params(params, metrics, log_callback)
+
+def master_crawl_thread(params, gui_queue, stop_event, browser_pool=None):
     def log_callback(message):
         gui_queue.put(("log", message))
 
@@ -246,94 +492,224 @@ def master_crawl_thread(params, gui_queue, stop_event):
     def show_info_callback(message):
         gui_queue.put(("show_info", message))
 
-    target_url = params['target_url']
-    download_path = params['download_path']
+    # num_threads는 시작할 때의 워커 수입니다. adaptive_concurrency가 켜져 있으면(기본값) 수집 중 지연, 오류,
+    # 429/503 응답, CPU/메모리 사용률에 따라 1~max_threads개 사이에서 자동으로 조절합니다.
+    # max_threads는 설정값이 있으면 그 값, 스레드 개수를 숫자로 정했으면 그 개수이고,
+    # '자동'이면 DEFAULT_MAX_THREADS(브라우저 페처는 BROWSER_MAX_THREADS)입니다.
+    num_threads = DEFAULT_NUM_THREADS
+    raw_threads = str(params.get('num_threads') or '').strip()
+    explicit_threads = raw_threads.isdigit() and int(raw_threads) > 0
+    if explicit_threads:
+        num_threads = int(raw_threads)
+    elif raw_threads.lower() not in ('', 'auto', '자동'):
+        print("Warning: 'num_threads' value is not a positive integer string. Using default value.")
+    adaptive = str(params.get('adaptive_concurrency') or DB.get_app_config('adaptive_concurrency') or '1').lower() \
+        not in ('0', 'false', 'off')
+    max_threads = num_threads
+    if adaptive:
+        if explicit_threads:
+            default_max = num_threads
+        elif params.get('page_fetcher') == 'browser':
+            default_max = BROWSER_MAX_THREADS
+        else:
+            default_max = DEFAULT_MAX_THREADS
+        max_threads = max(num_threads, int(params.get('max_threads') or DB.get_app_config('max_threads')
+                                            or default_max))
 
-    parsed_uri = urlparse(target_url)
-    referer_url = f'{parsed_uri.scheme}://{parsed_uri.netloc}/'
+    log_callback("수집을 시작합니다...")
 
-    num_threads = 3
-    if 'num_threads' in params and isinstance(params['num_threads'], str) and params['num_threads'].isdigit():
-        num_threads = int(params['num_threads'])
+    # work_mode
+    #   'local'(기본값): 목록을 확인하고 찾은 에피소드를 이 프로세스의 워커들이 수집합니다.
+    #   'enqueue': 목록만 확인해 에피소드 작업을 DB에 등록하고 끝납니다.
+    #   'lease': 목록은 보지 않고 DB의 에피소드 작업을 임대해 수집합니다. 여러 프로세스를 함께 실행할 수 있습니다.
+    work_mode = params.get('work_mode') or 'local'
+    if work_mode == 'lease':
+        series_jobs = []
+        log_callback("임대 작업자 모드: 작업 테이블의 에피소드를 나눠 수집합니다.")
     else:
-        print("Warning: 'num_threads' value is not a positive integer string. Using default value.")
+        # 입력한 URL은 작업 대기열에 추가하고, 대기열의 모든 만화를 우선순위 순으로 수집합니다.
+        # 이전 실행이 중단되어 진행 중으로 남은 작업도 다시 대기 상태로 돌려 이어서 처리합니다.
+        DB.reset_interrupted_jobs()
+        if params.get('target_url'):
+            DB.add_series_job(params['target_url'], params.get('download_path', ''), int(params.get('priority') or 0))
+        series_jobs = [SeriesJob(job) for job in DB.claim_pending_series_jobs()]
+        if not series_jobs:
+            log_callback("수집할 만화가 없습니다.")
+            on_complete_callback(False)
+            return
+        log_callback(f"대기열의 만화 {len(series_jobs)}개를 수집합니다.")
 
-    log_callback("수집을 시작합니다...")
+    # 파서 백엔드: 'selectolax', 'lxml', 'bs4' 중 선택 (미지정 시 설치된 가장 빠른 백엔드)
+    parser = get_backend(params.get('parser'))
+    log_callback(f"HTML 파서: {parser.name}")
 
-    list_driver = None
+    # 단계별 소요 시간을 모아 끝날 때 요약하고, metrics_trace(파일 경로)를 지정하면 JSON Lines 트레이스로도 남깁니다.
+    # metrics_port가 있으면 Prometheus 형식으로도 제공합니다.
+    metrics = Metrics(params.get('metrics_trace') or DB.get_app_config('metrics_trace'))
+    metrics_server = None
+    if params.get('metrics_port'):
+        try:
+            metrics_server = MetricsServer(metrics, int(params['metrics_port']))
+            log_callback(f"메트릭: http://127.0.0.1:{int(params['metrics_port'])}/metrics")
+        except (OSError, ValueError) as e:
+            log_callback(f"메트릭 서버를 시작하지 못했습니다: {e}")
+
+    # 'http'(기본값): HTTP 우선 + 브라우저 대체, 'browser': 항상 브라우저 사용
+    http_fetcher = None
+    if params.get('page_fetcher', 'http') != 'browser':
+        # 받은 목록/에피소드 페이지는 디스크 캐시에 남기고 다음 요청부터 조건부 요청으로 확인합니다.
+        try:
+            http_cache = HttpCache.from_params(params)
+        except ValueError as e:
+            log_callback(f"HTTP 캐시 설정 오류로 캐시 없이 수집합니다: {e}")
+            http_cache = None
+        if http_cache:
+            log_callback(f"HTTP 캐시: {http_cache.root} ({http_cache.mode}, "
+                         f"최대 {http_cache.max_bytes / 1024 / 1024:.0f}MB)")
+        http_fetcher = HttpPageFetcher(metrics=metrics, cache=http_cache)
+
+    # 브라우저 풀을 넘겨받지 않았으면 이번 실행 동안만 쓰는 풀을 만듭니다.
+    owns_browser_pool = browser_pool is None
+    if owns_browser_pool:
+        browser_pool = BrowserPool(max_size=max_threads)
+    browser_pool.ensure_capacity(max_threads)
+
+    series_lock = threading.Lock()
+
+    def on_item_done(item, done, total):
+        series = item.data
+        succeeded = item.result["state"] == "SUCCESS"
+        if not succeeded:
+            log_callback(f"[FAIL] {item.attempts}회 시도 후 실패: {item.url}")
+        # crawled_urls 기록과 같은 기록기를 거쳐 같은 순서로 커밋되므로 워커가 DB 커밋을 기다리지 않습니다.
+        result_writer.set_episode_job_state(series.id, item.url, 'done' if succeeded else 'failed')
+        with series_lock:
+            series.remaining -= 1
+            series.failed_count += 0 if succeeded else 1
+            series_finished = series.remaining == 0
+        if series_finished:
+            # 만화 작업을 끝내기 전에 에피소드 기록을 먼저 커밋합니다. (만화마다 한 번만 기다림)
+            result_writer.flush()
+            if series.failed_count:
+                DB.set_series_job_state(series.id, 'failed', f"에피소드 {series.failed_count}개 실패")
+            else:
+                DB.set_series_job_state(series.id, 'done')
+            log_callback(f"만화 작업 완료: {series.list_url} (실패 {series.failed_count}개)")
+        log_callback(f"성공: {work_queue.success_count}, 실패: {work_queue.failed_count} "
+                     f"({done}/{total}, {work_queue.throughput():.1f}개/분)")
+        update_progress_callback(done / total * 100)
+
+    def on_lease_item_done(item, done, total):
+        if item.result["state"] != "SUCCESS":
+            log_callback(f"[FAIL] {item.attempts}회 시도 후 실패: {item.url}")
+        for list_url, failed_count in DB.finish_completed_series_jobs():
+            log_callback(f"만화 작업 완료: {list_url} (실패 {failed_count}개)")
+        log_callback(f"성공: {work_queue.success_count}, 실패: {work_queue.failed_count} "
+                     f"(이 프로세스 {done}개, 남은 작업 {total - done}개, {work_queue.throughput():.1f}개/분)")
+        update_progress_callback(done / total * 100 if total else 100)
+
+    def on_lease_lost(item):
+        log_callback(f"[임대 만료] 다른 작업자가 가져간 에피소드이므로 완료로 기록하지 않습니다: {item.url}")
+
+    max_attempts = int(params.get('max_attempts', DEFAULT_MAX_ATTEMPTS))
+    base_backoff = float(params.get('retry_backoff', DEFAULT_BASE_BACKOFF))
+    if work_mode == 'lease':
+        lease_seconds = float(params.get('lease_seconds') or DEFAULT_LEASE_SECONDS)
+        work_queue = LeaseWorkQueue(SeriesJob, lease_seconds=lease_seconds, max_attempts=max_attempts,
+                                    base_backoff=base_backoff, on_item_done=on_lease_item_done,
+                                    on_lease_lost=on_lease_lost)
+        log_callback(f"작업자 id: {work_queue.owner}, 남은 에피소드 작업 {work_queue.total}개")
+    else:
+        work_queue = WorkQueue(max_attempts=max_attempts, base_backoff=base_backoff, on_item_done=on_item_done)
+    # lease 모드에서는 임대가 유효할 때만 complete_episode_job이 crawled_urls에 기록하므로
+    # 임대를 잃은 작업자가 완료를 기록하지 않도록 별도의 기록기를 쓰지 않습니다.
+    result_writer = None
+    if work_mode != 'lease':
+        result_writer = DB.CrawlResultWriter(
+            stop_event=stop_event, on_commit=lambda count, seconds: metrics.record('db_commit', seconds, rows=count))
+    downloader = create_downloader(params, metrics, log_callback)
     try:
-        list_driver = Driver(uc=True, headless=False)
-        article_urls = get_target_pages(list_driver, target_url, log_callback)
+        postprocessor = PostProcessor.from_params(params, log_callback, metrics)
+    except ValueError as e:
+        log_callback(f"후처리 설정 오류로 후처리 없이 수집합니다: {e}")
+        postprocessor = None
+    concurrency = None
+    if adaptive:
+        concurrency = AimdController("페이지 워커", AdaptiveLimit(num_threads), maximum=max_threads,
+                                     interval=PAGE_ADAPTIVE_INTERVAL, min_samples=2, log_callback=log_callback)
+    context = CrawlContext(DB.CrawledUrlCache(), result_writer, downloader, http_fetcher,
+                           browser_pool, parser, log_callback, stop_event, metrics, postprocessor, concurrency)
+    try:
+        list_browser = BrowserPageFetcher(wait_selector=LIST_WAIT_SELECTOR, pool=browser_pool, stop_event=stop_event,
+                                          metrics=metrics)
+        list_fetcher = FallbackPageFetcher(http_fetcher, list_browser, has_article_body, log_callback)
+        try:
+            with metrics.bind(worker='master'):
+                for series in series_jobs:
+                    if stop_event.is_set():
+                        break
+                    queue_series_episodes(series, list_fetcher, work_queue, parser, log_callback, stop_event,
+                                          full_refresh=bool(params.get('full_refresh')), metrics=metrics)
+        finally:
+            list_fetcher.close()
+
+        if work_mode == 'enqueue':
+            log_callback(f"에피소드 작업 {work_queue.total}개를 등록했습니다. 임대 작업자(work_mode='lease')로 수집합니다.")
+        elif work_queue.total > 0 and not stop_event.is_set():
+            if concurrency:
+                log_callback(f"{work_queue.total}개의 작업을 {num_threads}개의 스레드로 시작합니다. "
+                             f"(1~{max_threads}개 사이에서 자동 조절)")
+            else:
+                log_callback(f"{work_queue.total}개의 작업을 {num_threads}개의 스레드로 시작합니다.")
+            # 한도보다 많은 워커는 concurrency 자리가 날 때까지 기다리므로 최대 개수만큼 미리 띄워 둡니다.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
+                futures = [executor.submit(crawl_worker, worker_id, context, work_queue)
+                           for worker_id in range(1, max_threads + 1)]
+
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        log_callback(f"[치명적 오류] 워커 실행 중 오류: {exc}")
     finally:
-        if list_driver:
-            list_driver.quit()
-
-    if not article_urls:
+        if work_mode == 'lease':
+            work_queue.close()
+        # 중지/종료 시에도 완료된 에피소드 기록이 유실되지 않도록 모두 커밋합니다.
+        if result_writer:
+            result_writer.close()
+        downloader.close()
+        if postprocessor:
+            if not stop_event.is_set():
+                log_callback("남은 CBZ 후처리가 끝나기를 기다립니다...")
+            postprocessor.close(cancel=stop_event.is_set())
+        if http_fetcher:
+            if http_fetcher.cache:
+                log_callback(http_fetcher.cache_summary())
+            http_fetcher.close()
+        if owns_browser_pool:
+            browser_pool.close()
+        for line in metrics.summary_lines():
+            log_callback(line)
+        if metrics_server:
+            metrics_server.close()
+        metrics.close()
+
+    gui_queue.put(("summary", {
+        "total": work_queue.total,
+        "success": work_queue.success_count,
+        "failed": work_queue.failed_count,
+        "failed_series": sum(1 for series in series_jobs if series.list_failed),
+        "stopped": stop_event.is_set(),
+    }))
+
+    if work_queue.total == 0 and not stop_event.is_set():
         log_callback("수집할 에피소드가 없습니다.")
         on_complete_callback(False)
         return
-
-    create_text_file(download_path, target_url)
-
-    total_articles = len(article_urls)
-    crawled_urls = 0
-    target_article_urls = []
-
-    for url in article_urls:
-        if DB.is_url_crawled(url):
-            crawled_urls += 1
-        else:
-            target_article_urls.append(url)
-
-    target_article_num = len(target_article_urls)
-
-    log_callback(f"총 {total_articles}개중 이미 수집완료된 {crawled_urls}개는 제외합니다.")
-
-    if target_article_num <= 0:
-        log_callback("수집할 에피소드가 없습니다.")
-        on_complete_callback(False)
+    if work_mode == 'enqueue':
+        on_complete_callback(True)
         return
 
-    log_callback(f"{len(target_article_urls)}개의 작업을 {num_threads}개의 스레드로 시작합니다.")
-
-    completed_tasks = 0
-    success_count = 0
-    failed_count = 0
-
-    worker_urls = {i + 1: [] for i in range(num_threads)}
-    for i, url in enumerate(target_article_urls):
-        worker_id = (i % num_threads) + 1
-        worker_urls[worker_id].append(url)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
-        future_to_url = {
-            executor.submit(crawl_worker, worker_id, download_path, referer_url, url_list_for_worker, log_callback, stop_event): url_list_for_worker
-            for worker_id, url_list_for_worker in worker_urls.items()
-        }
-
-        for future in concurrent.futures.as_completed(future_to_url):
-            if stop_event.is_set():
-                break
-
-            try:
-                results = future.result()
-                completed_tasks += len(results)
-                for result in results:
-                    if result["state"] == "SUCCESS":
-                        success_count += 1
-                    else:
-                        failed_count += 1
-                
-                log_callback(f"성공: {success_count}, 실패: {failed_count}")
-
-            except Exception as exc:
-                failed_count += 1
-                log_callback(f"[치명적 오류] {future_to_url[future]}: {exc}")
-
-            if target_article_num > 0:
-                progress = (completed_tasks / target_article_num) * 100
-                update_progress_callback(progress)
-
     if not stop_event.is_set():
         update_progress_callback(100)
         log_callback("\n\n🎉🎉🎉 모든 수집 작업이 완료되었습니다.")
@@ -342,4 +718,4 @@ def master_crawl_thread(params, gui_queue, stop_event):
         log_callback("수집 작업이 중지되었습니다.")
         show_info_callback("수집이 중지되었습니다.")
 
-    on_complete_callback(True)
\ No newline at end of file
+    on_complete_callback(True)
@@ -0,0 +1,341 @@
+import concurrent.futures
+import glob
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import database as DB
+from crawler.concurrency import THROTTLE_STATUS, AdaptiveLimit, AimdController
+from crawler.image_store import ImageStore
+from crawler.metrics import NULL_METRICS
+
+# 호스트별 동시 다운로드 개수 기본값 (adaptive이면 시작값이며 pool_size까지 자동으로 조절)
+DEFAULT_MAX_PER_HOST = 4
+# adaptive일 때 호스트별 동시 다운로드 수를 다시 계산하는 간격 (초)
+ADAPTIVE_INTERVAL = 2.0
+# 호스트별 초당 요청 수 기본값 (0 이하이면 제한 없음)
+DEFAULT_REQUESTS_PER_SECOND = 8.0
+# 전체 다운로드 스레드/커넥션 풀 크기 기본값
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 30
+# 스트리밍 저장 시 한 번에 기록하는 청크 크기 (워커당 최대 메모리 사용량을 일정하게 유지)
+CHUNK_SIZE = 64 * 1024
+# 저장이 끝나기 전의 임시 파일 접미사
+PART_SUFFIX = '.part'
+
+
+class IncompleteDownloadError(requests.exceptions.RequestException):
+    """받은 바이트 수가 Content-Length와 다르거나 다운로드가 중단된 경우 발생합니다."""
+
+
+def guess_image_extension(response, img_url):
+    """응답의 Content-Type 또는 URL에서 이미지 확장자를 추측합니다."""
+    content_type = (response.headers.get('Content-Type') or '').split(';')[0].strip()
+    ext = mimetypes.guess_extension(content_type) if content_type else None
+    return ext or os.path.splitext(urlparse(img_url).path)[1] or ".jpg"
+
+
+def write_response_atomically(response, file_path, stop_event=None, chunk_size=CHUNK_SIZE, resume_from=0):
+    """
+    응답 본문을 고정 크기 청크로 '<파일>.part'에 스트리밍한 뒤 fsync 하고 원래 이름으로 원자적으로 바꿉니다.
+    resume_from이 0보다 크면 기존 .part 파일 뒤에 이어 씁니다 (HTTP Range 206 응답).
+    중간에 끊기면 이어받기를 위해 .part 파일을 남기고, 손상된 경우에만 지웁니다.
+    최종 이름의 파일은 항상 완전한 파일입니다. 반환값은 (전체 크기, sha256 hex) 입니다.
+    """
+    expected = response.headers.get('Content-Length')
+    part_path = file_path + PART_SUFFIX
+    hasher = hashlib.sha256()
+    if resume_from:
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+
+    written = 0
+    with open(part_path, 'ab' if resume_from else 'wb') as f:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if stop_event is not None and stop_event.is_set():
+                raise IncompleteDownloadError(f"다운로드 중단: {response.url}")
+            if chunk:
+                f.write(chunk)
+                hasher.update(chunk)
+                written += len(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Content-Encoding이 있으면 Content-Length는 압축된 크기이므로 비교하지 않습니다.
+    if expected is not None and not response.headers.get('Content-Encoding') and written != int(expected):
+        if written > int(expected):
+            os.remove(part_path)
+        raise IncompleteDownloadError(f"크기 불일치 ({written}/{expected} bytes): {response.url}")
+
+    os.replace(part_path, file_path)
+    return resume_from + written, hasher.hexdigest()
+
+
+def find_part_file(download_dir, index):
+    """
+    이전 실행에서 index번 이미지를 받다가 남긴 '<번호><확장자>.part' 파일을 찾아 최종 파일 경로를 반환합니다.
+    없으면 None을 반환합니다. (받는 중인 파일 이름은 DB에 기록하지 않으므로 폴더에서 찾습니다.)
+    """
+    pattern = os.path.join(glob.escape(download_dir), f"{index:03d}.*{PART_SUFFIX}")
+    for part_path in glob.glob(pattern):
+        return part_path[:-len(PART_SUFFIX)]
+    return None
+
+
+def is_resumed_response(status, content_range, offset):
+    """Range 요청에 대한 응답이 offset부터 이어지는 206 응답인지 확인합니다."""
+    return status == 206 and (content_range or '').startswith(f'bytes {offset}-')
+
+
+def discard_part_file(part_path):
+    try:
+        os.remove(part_path)
+    except FileNotFoundError:
+        pass
+
+
+def is_manifest_entry_complete(entry):
+    """manifest 항목이 완료 상태이고 디스크의 파일 크기도 일치하는지 확인합니다."""
+    if not entry or entry.get('status') != 'complete' or not entry.get('file_path'):
+        return False
+    try:
+        return os.path.getsize(entry['file_path']) == entry['size']
+    except OSError:
+        return False
+
+
+class RateLimiter:
+    """호스트 하나에 대한 요청 간 최소 간격을 보장하는 간단한 속도 제한기."""
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_allowed - now)
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        if wait > 0:
+            if stop_event is not None:
+                stop_event.wait(wait)
+            else:
+                time.sleep(wait)
+
+
+def downloader_settings(params):
+    """
+    이미지 다운로더 설정을 수집 파라미터(dict) → app_config 테이블 → 기본값 순으로 읽어 생성자 인자로 반환합니다.
+    """
+    def raw_setting(key):
+        return params.get(key) or DB.get_app_config(key)
+
+    def setting(key, default):
+        value = raw_setting(key)
+        try:
+            return float(value) if value not in (None, '') else default
+        except (TypeError, ValueError):
+            return default
+
+    return {
+        'max_per_host': int(setting('max_per_host', DEFAULT_MAX_PER_HOST)),
+        'requests_per_second': setting('requests_per_second', DEFAULT_REQUESTS_PER_SECOND),
+        'dedup': str(raw_setting('image_dedup') or '1').lower() not in ('0', 'false', 'off'),
+        'image_store_dir': raw_setting('image_store_dir'),
+        'adaptive': str(raw_setting('adaptive_concurrency') or '1').lower() not in ('0', 'false', 'off'),
+    }
+
+
+class ImageDownloader:
+    """
+    모든 워커가 공유하는 이미지 다운로드 단계.
+    keep-alive 커넥션 풀을 가진 requests.Session 하나를 재사용하고,
+    에피소드의 이미지들을 호스트별 동시성/속도 제한 안에서 병렬로 내려받습니다.
+    """
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, metrics=None,
+                 dedup=True, image_store_dir=None, adaptive=False, log_callback=print):
+        self.max_per_host = max(1, int(max_per_host))
+        # adaptive이면 호스트별 동시 다운로드 수를 지연/오류/429·503 응답에 따라 1~pool_size 사이에서 조절합니다.
+        # 이미지 다운로드는 I/O 작업이므로 CPU/메모리 사용률은 페이지 워커 쪽에서만 봅니다.
+        self.adaptive = adaptive
+        self.pool_size = pool_size
+        self.log_callback = log_callback
+        # dedup이면 받은 이미지를 내용 해시 저장소에 넣고 에피소드 폴더에는 하드링크를 둡니다.
+        # image_store_dir이 없으면 만화 다운로드 경로마다 저장소를 둡니다.
+        self.dedup = dedup
+        self.image_store_dir = image_store_dir
+        self.metrics = metrics or NULL_METRICS
+        self.requests_per_second = float(requests_per_second)
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="img")
+        self._hosts_lock = threading.Lock()
+        self._host_limits_by_host = {}
+
+    @classmethod
+    def from_params(cls, params, metrics=None, log_callback=print):
+        """
+        수집 파라미터(dict) → app_config 테이블 → 기본값 순으로 설정을 읽어 생성합니다.
+        """
+        return cls(metrics=metrics, log_callback=log_callback, **downloader_settings(params))
+
+    def _host_limits(self, url):
+        """호스트의 (동시 다운로드 한도, 속도 제한기, 한도 컨트롤러 또는 None)을 반환합니다."""
+        host = urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._host_limits_by_host:
+                limit = AdaptiveLimit(self.max_per_host)
+                controller = None
+                if self.adaptive:
+                    controller = AimdController(f"이미지 다운로드 {host}", limit, maximum=self.pool_size,
+                                                interval=ADAPTIVE_INTERVAL, min_samples=5, pressure=None,
+                                                log_callback=self.log_callback)
+                self._host_limits_by_host[host] = (limit, RateLimiter(self.requests_per_second), controller)
+            return self._host_limits_by_host[host]
+
+    def _link_known_image(self, store, index, known, download_dir, page_url, labels):
+        """URL의 내용 해시를 알고 저장소에 객체가 있으면 네트워크 요청 없이 연결합니다. 연결한 파일 경로를 반환합니다."""
+        img_filename = os.path.join(download_dir, f"{index:03d}{known['ext']}")
+        with self.metrics.timer('image_dedup', **labels):
+            if not store.link(known['sha256'], known['ext'], img_filename):
+                return None
+        if page_url:
+            with self.metrics.timer('db_manifest', **labels):
+                DB.update_image_manifest(page_url, index, 'complete', file_path=img_filename,
+                                         size=known['size'], sha256=known['sha256'])
+        return img_filename
+
+    def _get_image(self, img_url, header, offset, resume_path):
+        """
+        이미지를 요청하고 (응답, 이어받을 위치)를 반환합니다. offset부터 이어지는 206 응답이 아니면 처음부터 받습니다.
+        .part가 이미 끝까지 받은 파일이면(416) 또는 다른 위치부터 응답하면 .part를 지우고 Range 없이 다시 요청합니다.
+        """
+        response = self.session.get(img_url, headers=header, stream=True, timeout=self.timeout)
+        if not offset or is_resumed_response(response.status_code, response.headers.get('Content-Range'), offset):
+            return response, offset
+        if response.status_code in (206, 416):
+            response.close()
+            discard_part_file(resume_path + PART_SUFFIX)
+            header = {name: value for name, value in header.items() if name != 'Range'}
+            response = self.session.get(img_url, headers=header, stream=True, timeout=self.timeout)
+        return response, 0
+
+    def _download_one(self, index, img_url, download_dir, referer_url, stop_event, page_url=None, entry=None,
+                      labels=None, known=None):
+        if is_manifest_entry_complete(entry):
+            return entry['file_path']
+        if stop_event.is_set():
+            return None
+        labels = labels or {}
+        store = ImageStore.for_download_dir(download_dir, self.image_store_dir) if self.dedup else None
+        if store is not None and known is not None:
+            img_filename = self._link_known_image(store, index, known, download_dir, page_url, labels)
+            if img_filename:
+                return img_filename
+        semaphore, rate_limiter, controller = self._host_limits(img_url)
+        with semaphore:
+            with self.metrics.timer('rate_limit_wait', **labels):
+                rate_limiter.acquire(stop_event)
+            if stop_event.is_set():
+                return None
+            header = {'referer': referer_url}
+
+            # 이전 실행에서 남은 .part 파일이 있으면 Range 요청으로 이어받습니다.
+            resume_path = find_part_file(download_dir, index)
+            offset = os.path.getsize(resume_path + PART_SUFFIX) if resume_path else 0
+            if offset:
+                header['Range'] = f'bytes={offset}-'
+
+            download_start = time.monotonic()
+            try:
+                response, offset = self._get_image(img_url, header, offset, resume_path)
+                with response:
+                    response.raise_for_status()
+                    if offset:
+                        img_filename = resume_path
+                    else:
+                        img_filename = os.path.join(download_dir,
+                                                    f"{index:03d}{guess_image_extension(response, img_url)}")
+                        if resume_path and img_filename != resume_path:
+                            # 확장자가 바뀌어 다른 이름으로 받으면 이어받지 못한 .part가 남지 않게 지웁니다.
+                            discard_part_file(resume_path + PART_SUFFIX)
+                    size, digest = write_response_atomically(response, img_filename, stop_event, resume_from=offset)
+            except requests.exceptions.RequestException as e:
+                if controller and not stop_event.is_set():
+                    status = e.response.status_code if e.response is not None else None
+                    controller.record(time.monotonic() - download_start, ok=False,
+                                      throttled=status in THROTTLE_STATUS)
+                raise
+            elapsed = time.monotonic() - download_start
+            if controller:
+                controller.record(elapsed)
+            self.metrics.record('image_download', elapsed, num_bytes=size - offset, image=index, **labels)
+
+        # 저장소에 넣은 이미지만 URL별 해시를 남기고, manifest와 함께 한 번에 커밋합니다.
+        adopted = store is not None and store.adopt(img_filename, digest)
+        if page_url or adopted:
+            with self.metrics.timer('db_manifest', **labels):
+                DB.complete_image(page_url, index, img_filename, size, digest, img_url if adopted else None)
+        return img_filename
+
+    def download_episode(self, images, download_dir, referer_url, stop_event, page_url=None):
+        """
+        (번호, 이미지 URL) 목록을 병렬로 내려받습니다.
+        page_url을 주면 이미지 단위 manifest에 진행 상황을 기록하고, 이미 완료된 이미지는 건너뜁니다.
+        실패한 이미지의 (번호, URL, 예외) 목록을 반환합니다.
+        """
+        manifest = {}
+        if page_url:
+            DB.register_episode_images(page_url, download_dir, images)
+            manifest = DB.get_image_manifest(page_url)
+
+        known_hashes = DB.get_image_hashes(img_url for _, img_url in images) if self.dedup else {}
+
+        # 이미지 다운로드 스레드에서도 호출한 워커/에피소드 라벨로 기록되도록 넘겨 줍니다.
+        labels = self.metrics.current_labels()
+        futures = {
+            self._executor.submit(self._download_one, index, img_url, download_dir, referer_url, stop_event,
+                                  page_url, manifest.get(index), labels, known_hashes.get(img_url)): (index, img_url)
+            for index, img_url in images
+        }
+        failed = []
+        for future in concurrent.futures.as_completed(futures):
+            index, img_url = futures[future]
+            try:
+                future.result()
+            except requests.exceptions.RequestException as req_err:
+                failed.append((index, img_url, req_err))
+                if page_url:
+                    DB.update_image_manifest(page_url, index, 'failed')
+        return failed
+
+    def resume_episode(self, page_url, referer_url, stop_event):
+        """
+        manifest에 기록된 이미지 목록만으로 에피소드를 이어받습니다 (페이지 재탐색 없음).
+        manifest가 없으면 None, 있으면 (다운로드 폴더, 실패 목록)을 반환합니다.
+        """
+        manifest = DB.get_image_manifest(page_url)
+        if not manifest:
+            return None
+        download_dir = next(iter(manifest.values()))['download_dir']
+        images = [(index, entry['image_url']) for index, entry in manifest.items()]
+        return download_dir, self.download_episode(images, download_dir, referer_url, stop_event, page_url)
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,199 @@
+"""
+목록/에피소드 페이지 HTML에서 필요한 값만 뽑아내는 추출 모듈.
+
+설치된 라이브러리에 따라 가장 빠른 파서 백엔드를 사용합니다.
+    selectolax > lxml > BeautifulSoup(SoupStrainer로 필요한 부분만 파싱)
+"""
+import hashlib
+import re
+from collections import namedtuple
+
+NEWS_ARTICLE_ITEMTYPE = 'http://schema.org/NewsArticle'
+TITLE_SUFFIX = " > 마나토끼 - 일본만화 허브"
+
+# list_content_hash가 해시하는 목록 부분: articleBody 안의 <ul class="list-body"> 요소
+# (태그로 찾으므로 <style>/<script> 안의 'serial-list' 같은 문자열에는 맞지 않습니다.)
+_ARTICLE_BODY_TAG_RE = re.compile(r"""<article\b[^>]*\bitemprop=["']articleBody["']""", re.IGNORECASE)
+_LIST_BODY_TAG_RE = re.compile(r"""<ul\b[^>]*\bclass=["'][^"']*\blist-body\b[^"']*["'][^>]*>""", re.IGNORECASE)
+_LIST_BODY_END_RE = re.compile(r"</ul\s*>", re.IGNORECASE)
+
+# title: 제목 (없으면 None), images: gif/빈 src를 제외한 (번호, src) 목록,
+# image_count: 섹션 안의 전체 img 개수, has_section: NewsArticle 섹션 존재 여부
+EpisodePage = namedtuple('EpisodePage', 'title images image_count has_section')
+
+
+def clean_title(title):
+    if title and "마나토끼 -" in title:
+        title = title.replace(TITLE_SUFFIX, "").strip()
+    return title or None
+
+
+def build_episode_page(title, srcs, has_section):
+    """백엔드가 찾은 제목과 img src 목록으로 EpisodePage를 만듭니다. 번호는 섹션 내 img 순서(1부터)입니다."""
+    images = [(i + 1, src) for i, src in enumerate(srcs) if src and '.gif' not in src.lower()]
+    return EpisodePage(clean_title(title), images, len(srcs), has_section)
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def __init__(self):
+        from selectolax.parser import HTMLParser
+        self._parser = HTMLParser
+
+    def parse_episode(self, html):
+        tree = self._parser(html)
+        title_node = tree.css_first('h1') or tree.css_first('div.view-title')
+        title = title_node.text(strip=True) if title_node else None
+        section = tree.css_first(f"section[itemtype='{NEWS_ARTICLE_ITEMTYPE}']")
+        srcs = [img.attributes.get('src') for img in section.css('img')] if section else []
+        return build_episode_page(title, srcs, section is not None)
+
+    def iter_list(self, html):
+        tree = self._parser(html)
+        article = tree.css_first("article[itemprop='articleBody']")
+        if article is None:
+            return None
+        serial_list = article.css_first('div.serial-list')
+        if serial_list is None:
+            return iter(())
+        return (a.attributes['href'] for a in serial_list.css('a[href]'))
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    _CLASS_XPATH = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+    def __init__(self):
+        import lxml.html
+        self._fromstring = lxml.html.fromstring
+
+    @staticmethod
+    def _text(element):
+        return ''.join(text.strip() for text in element.itertext())
+
+    def parse_episode(self, html):
+        root = self._fromstring(html)
+        title_nodes = root.xpath('//h1') or root.xpath(f"//div[{self._CLASS_XPATH.format('view-title')}]")
+        title = self._text(title_nodes[0]) if title_nodes else None
+        sections = root.xpath(f"//section[@itemtype='{NEWS_ARTICLE_ITEMTYPE}']")
+        srcs = [img.get('src') for img in sections[0].iter('img')] if sections else []
+        return build_episode_page(title, srcs, bool(sections))
+
+    def iter_list(self, html):
+        root = self._fromstring(html)
+        articles = root.xpath("//article[@itemprop='articleBody']")
+        if not articles:
+            return None
+        serial_lists = articles[0].xpath(f".//div[{self._CLASS_XPATH.format('serial-list')}]")
+        if not serial_lists:
+            return iter(())
+        return (a.get('href') for a in serial_lists[0].iter('a') if a.get('href') is not None)
+
+
+class SoupBackend:
+    """BeautifulSoup 백엔드. SoupStrainer로 제목과 본문 섹션만 트리로 만듭니다."""
+    name = 'bs4'
+
+    def __init__(self, features=None):
+        from bs4 import BeautifulSoup, SoupStrainer
+        self._BeautifulSoup = BeautifulSoup
+        self._SoupStrainer = SoupStrainer
+        if features is None:
+            try:
+                import lxml  # noqa: F401
+                features = 'lxml'
+            except ImportError:
+                features = 'html.parser'
+        self.features = features
+
+    def _soup(self, html, strainer):
+        return self._BeautifulSoup(html, self.features, parse_only=strainer)
+
+    def parse_episode(self, html):
+        soup = self._soup(html, self._SoupStrainer(['h1', 'section']))
+        title_element = soup.find('h1')
+        if title_element is None:
+            title_element = self._soup(html, self._SoupStrainer('div', class_='view-title')).find('div')
+        title = title_element.get_text(strip=True) if title_element else None
+        section = soup.find('section', itemtype=NEWS_ARTICLE_ITEMTYPE)
+        srcs = [img.get('src') for img in section.find_all('img')] if section else []
+        return build_episode_page(title, srcs, section is not None)
+
+    def iter_list(self, html):
+        article_body = self._soup(html, self._SoupStrainer('article', itemprop='articleBody')).find('article')
+        if article_body is None:
+            return None
+        serial_list_div = article_body.find('div', class_='serial-list')
+        if serial_list_div is None:
+            return iter(())
+        return (link['href'] for link in serial_list_div.find_all('a', href=True))
+
+
+BACKENDS = {
+    SelectolaxBackend.name: SelectolaxBackend,
+    LxmlBackend.name: LxmlBackend,
+    SoupBackend.name: SoupBackend,
+}
+# 자동 선택 시 시도하는 순서 (빠른 순)
+BACKEND_PREFERENCE = (SelectolaxBackend.name, LxmlBackend.name, SoupBackend.name)
+
+_default_backend = None
+
+
+def available_backends():
+    """현재 환경에서 사용할 수 있는 백엔드 이름 목록을 반환합니다."""
+    names = []
+    for name in BACKEND_PREFERENCE:
+        try:
+            BACKENDS[name]()
+            names.append(name)
+        except ImportError:
+            continue
+    return names
+
+
+def get_backend(name=None):
+    """
+    이름으로 파서 백엔드를 생성합니다. name이 없으면 사용 가능한 가장 빠른 백엔드를 반환합니다.
+    """
+    global _default_backend
+    if name:
+        return BACKENDS[name]()
+    if _default_backend is None:
+        _default_backend = BACKENDS[available_backends()[0]]()
+    return _default_backend
+
+
+def parse_episode_page(html, backend=None):
+    """에피소드 페이지에서 제목과 본문 이미지 목록을 추출합니다."""
+    return (backend or get_backend()).parse_episode(html)
+
+
+def iter_list_page(html, backend=None):
+    """
+    목록 페이지의 에피소드 링크를 페이지 순서(최신 에피소드 먼저)대로 돌려주는 iterator를 반환합니다.
+    articleBody가 없으면 None을 반환합니다. 호출자는 이미 아는 에피소드에서 순회를 멈출 수 있습니다.
+    """
+    return (backend or get_backend()).iter_list(html)
+
+
+def parse_list_page(html, backend=None):
+    """목록 페이지의 에피소드 링크 목록을 반환합니다. articleBody가 없으면 None을 반환합니다."""
+    links = iter_list_page(html, backend)
+    return list(links) if links is not None else None
+
+
+def list_content_hash(html):
+    """
+    목록 페이지에서 에피소드 목록 요소(articleBody 안의 <ul class="list-body">)의 해시를 반환합니다.
+    광고 등 페이지의 다른 부분이 바뀌어도 목록이 같으면 같은 값이 나옵니다. 목록 요소가 없으면 페이지 전체를 해시합니다.
+    """
+    region = html
+    article = _ARTICLE_BODY_TAG_RE.search(html)
+    start = _LIST_BODY_TAG_RE.search(html, article.end()) if article else None
+    end = _LIST_BODY_END_RE.search(html, start.end()) if start else None
+    if end:
+        region = html[start.start():end.end()]
+    return hashlib.sha256(region.encode('utf-8', 'replace')).hexdigest()
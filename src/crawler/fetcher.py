@@ -0,0 +1,277 @@
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawler.http_cache import CacheMissError
+from crawler.metrics import NULL_METRICS
+
+LIST_WAIT_SELECTOR = "article[itemprop='articleBody']"
+EPISODE_WAIT_SELECTOR = "article[itemprop='articleBody'], img[src*='kcaptcha_image.php']"
+CAPTCHA_URL_PART = "bbs/captcha.php"
+
+DEFAULT_HTTP_TIMEOUT = 15
+DEFAULT_BROWSER_TIMEOUT = 30
+
+# HTTP 응답만으로 쓸 수 있는 페이지인지 빠르게 판단하기 위한 패턴
+_ARTICLE_BODY_RE = re.compile(r"""<article[^>]+itemprop=["']articleBody["']""", re.IGNORECASE)
+_NEWS_ARTICLE_RE = re.compile(r"""<section[^>]+itemtype=["']http://schema\.org/NewsArticle["']""", re.IGNORECASE)
+_IMG_SRC_RE = re.compile(r"""<img[^>]+src=["']([^"']+)["']""", re.IGNORECASE)
+
+
+def has_article_body(html):
+    """목록 페이지로 사용할 수 있는지 (articleBody가 있는지) 확인합니다."""
+    return bool(html) and _ARTICLE_BODY_RE.search(html) is not None
+
+
+def has_article_images(html):
+    """
+    에피소드 페이지로 사용할 수 있는지 확인합니다.
+    NewsArticle 섹션이 있고, 그 안에 gif가 아닌 실제 이미지 src가 하나 이상 있어야 합니다.
+    (지연 로딩으로 src가 아직 채워지지 않은 페이지는 브라우저로 다시 받아야 합니다.)
+    """
+    if not html:
+        return False
+    match = _NEWS_ARTICLE_RE.search(html)
+    if not match:
+        return False
+    end = html.find('</section>', match.end())
+    section = html[match.end():end if end != -1 else len(html)]
+    return any('.gif' not in src.lower() for src in _IMG_SRC_RE.findall(section))
+
+
+def create_driver(headless=False):
+    """봇 탐지를 우회하는 SeleniumBase 드라이버를 생성합니다."""
+    # 가져오는 데 오래 걸리므로 브라우저가 처음 필요할 때 가져옵니다.
+    from seleniumbase import Driver
+    return Driver(uc=True, headless=headless)
+
+
+class HttpPageFetcher:
+    """
+    requests.Session으로 페이지 HTML을 가져오는 가벼운 페처.
+    브라우저에서 통과한 쿠키와 User-Agent를 가져와 재사용할 수 있습니다.
+    여러 워커가 하나의 인스턴스를 공유합니다.
+    cache(HttpCache)가 있으면 캐시된 페이지를 조건부 요청으로 확인하고, 304 응답이면 캐시의 본문을 사용합니다.
+    """
+    name = 'http'
+    # 브라우저 대기 시간과 비교하기 위한 값 (HTTP 경로는 대기 없이 바로 응답을 사용)
+    last_wait_seconds = 0.0
+
+    def __init__(self, session=None, timeout=DEFAULT_HTTP_TIMEOUT, metrics=None, cache=None):
+        self.timeout = timeout
+        self.metrics = metrics or NULL_METRICS
+        self.cache = cache
+        # 캐시 사용 결과별 횟수 (hit: 네트워크 없이 사용, revalidated: 304로 확인, fetched: 새로 받음)
+        self.cache_counts = {'hit': 0, 'revalidated': 0, 'fetched': 0}
+        self._counts_lock = threading.Lock()
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    def import_browser_session(self, driver):
+        """브라우저 드라이버의 쿠키와 User-Agent를 세션에 복사합니다."""
+        try:
+            user_agent = driver.execute_script("return navigator.userAgent")
+            if user_agent:
+                self.session.headers['User-Agent'] = user_agent
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(cookie['name'], cookie['value'],
+                                         domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        except Exception as e:
+            print(f"브라우저 세션 정보를 가져오지 못했습니다: {e}")
+
+    @property
+    def offline(self):
+        """캐시된 페이지만 사용하는 (http_cache_mode='offline') 페처인지 여부."""
+        return self.cache is not None and self.cache.mode == 'offline'
+
+    def _count(self, outcome):
+        with self._counts_lock:
+            self.cache_counts[outcome] += 1
+
+    def fetch(self, url, stop_event, referer=None, max_age=None):
+        """
+        페이지 HTML을 반환합니다. 캡챠 페이지로 이동되면 None을 반환합니다.
+        캐시에 max_age초 안에 확인한 항목이 있으면 요청 없이 그 본문을 반환합니다. (None이면 항상 서버에 확인)
+        """
+        if stop_event.is_set():
+            return None
+        cache = self.cache
+        entry = cache.lookup(url) if cache else None
+        if entry is not None and cache.is_fresh(entry, max_age):
+            with self.metrics.timer('http_cache_read', url=url):
+                html = cache.read(url, entry)
+            if html is not None:
+                cache.touch(url)
+                self._count('hit')
+                return html
+            entry = None
+        if self.offline:
+            raise CacheMissError(f"HTTP 캐시에 없는 페이지입니다: {url}")
+
+        headers = {'referer': referer} if referer else {}
+        if entry is not None:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        with self.metrics.timer('http_fetch', url=url) as fields:
+            response = self.session.get(url, headers=headers or None, timeout=self.timeout)
+            fields['status'] = response.status_code
+            if cache:
+                fields['cache'] = 'revalidated' if response.status_code == 304 else 'fetched'
+        if response.status_code == 304 and entry is not None:
+            html = cache.read(url, entry)
+            if html is None:
+                # 확인하는 사이에 본문 파일이 지워졌으면 조건 없이 다시 받습니다.
+                return self.fetch(url, stop_event, referer)
+            cache.touch(url, revalidated=True)
+            self._count('revalidated')
+            return html
+        response.raise_for_status()
+        if CAPTCHA_URL_PART in response.url:
+            return None
+        if cache and response.status_code == 200:
+            cache.store(url, response.text, response.headers)
+            self._count('fetched')
+        return response.text
+
+    def remember(self, url, html):
+        """다른 페처(브라우저)로 받은 페이지를 캐시에 저장합니다. 검증용 헤더가 없으므로 다음 확인 때는 새로 받습니다."""
+        if self.cache and self.cache.mode != 'offline':
+            self.cache.store(url, html)
+
+    def cache_summary(self):
+        """캐시 사용 결과를 로그에 남길 한 줄로 반환합니다. 캐시를 쓰지 않으면 None을 반환합니다."""
+        if not self.cache:
+            return None
+        counts = self.cache_counts
+        return (f"[HTTP 캐시] 요청 없이 사용 {counts['hit']}건, 304로 확인 {counts['revalidated']}건, "
+                f"새로 받음 {counts['fetched']}건 ({self.cache.mode})")
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserPageFetcher:
+    """
+    SeleniumBase 브라우저로 페이지를 여는 페처.
+    드라이버는 처음 필요할 때 생성하며, prepare_page 콜백으로 캡챠 처리나 스크롤을 수행합니다.
+    BrowserPool을 주면 드라이버를 풀에서 빌려 쓰고 close() 시 종료하지 않고 반납합니다.
+    """
+    name = 'browser'
+
+    def __init__(self, driver_factory=create_driver, wait_selector=EPISODE_WAIT_SELECTOR, prepare_page=None,
+                 timeout=DEFAULT_BROWSER_TIMEOUT, pool=None, stop_event=None, metrics=None):
+        self.pool = pool
+        self.metrics = metrics or NULL_METRICS
+        if pool is not None:
+            driver_factory = lambda: pool.checkout(stop_event)  # noqa: E731
+        self.driver_factory = driver_factory
+        self.pages_served = 0
+        self.wait_selector = wait_selector
+        self.prepare_page = prepare_page
+        self.timeout = timeout
+        self.driver = None
+        # 마지막 fetch에서 셀렉터 대기와 prepare_page(캡챠/지연 로딩)에 쓴 시간
+        self.last_wait_seconds = 0.0
+
+    def get_driver(self):
+        if self.driver is None:
+            with self.metrics.timer('browser_checkout'):
+                self.driver = self.driver_factory()
+        return self.driver
+
+    def fetch(self, url, stop_event, referer=None):
+        """페이지를 열고 준비가 끝난 뒤의 page_source를 반환합니다. 중지 요청 시 None을 반환합니다."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if stop_event.is_set():
+            return None
+        driver = self.get_driver()
+        if driver is None:
+            return None
+        with self.metrics.timer('navigate', url=url):
+            driver.get(url)
+        self.pages_served += 1
+        wait_start = time.monotonic()
+        try:
+            with self.metrics.timer('selector_wait'):
+                WebDriverWait(driver, self.timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, self.wait_selector))
+                )
+            if stop_event.is_set():
+                return None
+            if self.prepare_page:
+                self.prepare_page(driver, stop_event)
+        finally:
+            self.last_wait_seconds = time.monotonic() - wait_start
+        return driver.page_source
+
+    def close(self):
+        if self.driver:
+            if self.pool is not None:
+                self.pool.checkin(self.driver, self.pages_served)
+            else:
+                self.driver.quit()
+            self.driver = None
+            self.pages_served = 0
+
+
+class FallbackPageFetcher:
+    """
+    HTTP 페처를 먼저 시도하고, 결과가 is_usable 검사를 통과하지 못할 때만 브라우저 페처를 사용합니다.
+    브라우저로 받은 뒤에는 쿠키를 HTTP 세션에 다시 가져와 다음 요청이 가벼운 경로를 타도록 하고,
+    받은 페이지를 HTTP 캐시에 저장합니다. max_age는 HTTP 페처에 넘기는 캐시 유효 시간입니다.
+    HTTP 페처가 offline 모드이면 네트워크를 쓰지 않도록 브라우저로 넘어가지 않고,
+    캐시에 없거나 캐시된 페이지가 is_usable 검사를 통과하지 못하면 CacheMissError를 발생시킵니다.
+    """
+    def __init__(self, primary, fallback, is_usable, log_callback=None, max_age=None):
+        self.primary = primary
+        self.max_age = max_age
+        self.fallback = fallback
+        self.is_usable = is_usable
+        self.log_callback = log_callback
+        self.last_fetcher = None
+        self.last_wait_seconds = 0.0
+        # HTTP 페처가 마지막으로 실패한 응답의 상태 코드 (429/503이면 동시성 조절에서 스로틀링으로 봅니다)
+        self.last_status = None
+
+    def fetch(self, url, stop_event, referer=None):
+        if self.primary is not None:
+            try:
+                html = self.primary.fetch(url, stop_event, referer, self.max_age)
+                if html and self.is_usable(html):
+                    self.last_fetcher = self.primary.name
+                    self.last_wait_seconds = self.primary.last_wait_seconds
+                    return html
+                if self.primary.offline:
+                    raise CacheMissError(f"HTTP 캐시의 페이지를 사용할 수 없습니다: {url}")
+            except requests.exceptions.RequestException as e:
+                if e.response is not None:
+                    self.last_status = e.response.status_code
+                if self.log_callback:
+                    self.log_callback(f"HTTP 요청 실패, 브라우저로 다시 시도합니다: {url} ({e})")
+            if stop_event.is_set():
+                return None
+
+        html = self.fallback.fetch(url, stop_event, referer)
+        self.last_fetcher = self.fallback.name
+        self.last_wait_seconds = self.fallback.last_wait_seconds
+        if html and self.primary is not None:
+            if self.fallback.driver is not None:
+                self.primary.import_browser_session(self.fallback.driver)
+            if self.is_usable(html):
+                self.primary.remember(url, html)
+        return html
+
+    def close(self):
+        self.fallback.close()
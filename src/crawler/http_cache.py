@@ -0,0 +1,138 @@
+"""
+목록/에피소드 페이지의 디스크 HTTP 캐시.
+
+URL마다 본문(zlib 압축), 일부 응답 헤더, ETag/Last-Modified, 본문 내용 해시(sha256)를 저장합니다.
+색인은 DB의 http_cache 테이블에, 본문은 '<root>/ab/<sha256(URL)>.z' 파일에 둡니다.
+  - HttpPageFetcher는 저장된 ETag/Last-Modified로 조건부 요청(If-None-Match/If-Modified-Since)을 보내고,
+    304 응답이면 본문을 다시 받지 않고 캐시의 본문을 사용합니다.
+  - max_age 안에 확인한 항목은 네트워크 요청 없이 바로 사용합니다. (재시도, 재실행)
+  - 본문 크기의 합계가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다. (LRU)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+import database as DB
+
+# 기본 캐시 폴더 이름 (DB 파일과 같은 폴더에 만듭니다)
+DEFAULT_CACHE_DIRNAME = '.http_cache'
+DEFAULT_MAX_MB = 256
+# 에피소드 페이지를 서버에 다시 확인하지 않고 쓰는 기본 시간 (초)
+DEFAULT_MAX_AGE = 3600
+# 제거할 때 max_bytes의 이 비율까지 줄여 저장할 때마다 제거가 일어나지 않게 합니다.
+EVICT_TARGET_RATIO = 0.9
+# 캐시 항목에 함께 저장하는 응답 헤더
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date')
+# http_cache_mode 값
+#   'revalidate'(기본값): 목록은 항상, 에피소드는 max_age가 지나면 조건부 요청으로 확인
+#   'prefer': 캐시에 있으면 나이와 상관없이 사용하고 없을 때만 받음
+#   'offline': 캐시만 사용 (없으면 CacheMissError)
+CACHE_MODES = ('revalidate', 'prefer', 'offline')
+
+
+class CacheMissError(Exception):
+    """offline 모드에서 캐시에 없는 페이지를 요청한 경우 발생합니다."""
+
+
+class HttpCache:
+    """
+    URL을 키로 하는 페이지 캐시. 여러 워커 스레드와 같은 DB를 쓰는 여러 프로세스가 함께 사용할 수 있습니다.
+    본문 파일은 임시 파일에 쓴 뒤 교체하고, 읽을 때 내용 해시를 확인하여 색인과 맞지 않으면 없는 것으로 봅니다.
+    """
+    def __init__(self, root, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, mode='revalidate', max_age=DEFAULT_MAX_AGE):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"알 수 없는 HTTP 캐시 모드입니다: {mode}")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # 이 프로세스가 아는 본문 크기 합계 (처음 저장할 때 DB에서 읽음)
+        self._total = None
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        수집 파라미터 → app_config → 기본값 순으로 설정을 읽어 캐시를 만듭니다.
+        http_cache가 '0'이면 None을 반환합니다.
+        """
+        def setting(key):
+            return params.get(key) or DB.get_app_config(key)
+
+        if str(setting('http_cache') or '1').lower() in ('0', 'false', 'off'):
+            return None
+        root = setting('http_cache_dir') or os.path.join(os.path.dirname(os.path.abspath(DB.DB_FILE)),
+                                                         DEFAULT_CACHE_DIRNAME)
+        max_mb = float(setting('http_cache_max_mb') or DEFAULT_MAX_MB)
+        max_age = float(setting('http_cache_max_age') or DEFAULT_MAX_AGE)
+        return cls(root, int(max_mb * 1024 * 1024), setting('http_cache_mode') or 'revalidate', max_age)
+
+    def body_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, key[:2], key + '.z')
+
+    def lookup(self, url):
+        """URL의 색인 항목(etag, last_modified, content_hash, size, headers, fetched_at)을 반환합니다."""
+        return DB.get_http_cache_entry(url)
+
+    def is_fresh(self, entry, max_age):
+        """항목을 서버에 확인한 지 max_age초가 지나지 않았는지 확인합니다. (prefer/offline 모드는 항상 True)"""
+        if self.mode != 'revalidate':
+            return True
+        return max_age is not None and time.time() - entry['fetched_at'] < max_age
+
+    def read(self, url, entry):
+        """entry의 본문을 읽어 문자열로 반환합니다. 파일이 없거나 해시가 맞지 않으면 항목을 지우고 None을 반환합니다."""
+        try:
+            with open(self.body_path(url), 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            body = None
+        if body is None or hashlib.sha256(body).hexdigest() != entry['content_hash']:
+            DB.delete_http_cache_entry(url)
+            return None
+        return body.decode('utf-8')
+
+    def touch(self, url, revalidated=False):
+        """캐시 항목을 사용했음을 기록합니다. 304 응답으로 확인했으면 revalidated=True로 호출합니다."""
+        DB.touch_http_cache_entry(url, revalidated)
+
+    def store(self, url, text, headers=None):
+        """페이지 본문과 응답 헤더를 저장하고, 합계가 max_bytes를 넘으면 오래된 항목을 지웁니다."""
+        body = text.encode('utf-8')
+        data = zlib.compress(body)
+        path = self.body_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        headers = headers or {}
+        stored_headers = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+        previous_size = DB.put_http_cache_entry(
+            url, headers.get('ETag'), headers.get('Last-Modified'), hashlib.sha256(body).hexdigest(), len(data),
+            json.dumps(stored_headers, ensure_ascii=False))
+        with self._lock:
+            if self._total is None:
+                self._total = DB.get_http_cache_size()
+            else:
+                self._total += len(data) - previous_size
+            over_limit = self._total > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """가장 오래 사용하지 않은 항목부터 지워 합계를 max_bytes의 EVICT_TARGET_RATIO 이하로 줄입니다."""
+        evicted, total = DB.evict_http_cache(int(self.max_bytes * EVICT_TARGET_RATIO))
+        for url in evicted:
+            try:
+                os.remove(self.body_path(url))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._total = total
+        return len(evicted)
@@ -0,0 +1,74 @@
+import os
+import shutil
+
+# 다운로드 경로 안에 만드는 기본 저장소 폴더 이름
+DEFAULT_STORE_DIRNAME = '.image_store'
+
+
+class ImageStore:
+    """
+    이미지 내용(sha256)을 이름으로 쓰는 저장소. 객체는 '<root>/ab/cd/<sha256><확장자>'에 한 번만 저장하고,
+    에피소드 폴더의 이미지 파일은 객체의 하드링크로 만듭니다.
+    같은 이미지를 다시 받거나 제목이 바뀐 폴더에 받아도 디스크에는 한 벌만 남습니다.
+    하드링크를 만들 수 없는 파일 시스템이면 에피소드 폴더에 일반 파일로 남기거나 복사합니다.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    @classmethod
+    def for_download_dir(cls, download_dir, root=None):
+        """root를 지정하지 않으면 에피소드 폴더의 상위 폴더(만화 다운로드 경로)에 저장소를 둡니다."""
+        if not root:
+            root = os.path.join(os.path.dirname(os.path.abspath(download_dir)), DEFAULT_STORE_DIRNAME)
+        return cls(root)
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + ext)
+
+    def has(self, digest, ext):
+        return os.path.exists(self.object_path(digest, ext))
+
+    @staticmethod
+    def _link_or_copy(src, dst):
+        """dst를 src의 하드링크로 원자적으로 바꿉니다. 하드링크가 안 되면 복사합니다."""
+        tmp_path = dst + '.link'
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dst)
+
+    def adopt(self, file_path, digest):
+        """
+        방금 받은 파일을 저장소에 넣습니다. 같은 내용의 객체가 이미 있으면 file_path를 그 객체의 하드링크로 바꾸고,
+        없으면 file_path를 객체로 하드링크합니다. 저장소에 넣지 못하면 False를 반환합니다. (파일은 그대로 남음)
+        """
+        ext = os.path.splitext(file_path)[1]
+        object_path = self.object_path(digest, ext)
+        try:
+            if os.path.exists(object_path):
+                if not os.path.samefile(object_path, file_path):
+                    self._link_or_copy(object_path, file_path)
+                return True
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            os.link(file_path, object_path)
+            return True
+        except FileExistsError:
+            # 다른 스레드가 같은 이미지를 먼저 저장했습니다.
+            self._link_or_copy(object_path, file_path)
+            return True
+        except OSError as e:
+            print(f"이미지 저장소에 넣지 못했습니다 ({file_path}): {e}")
+            return False
+
+    def link(self, digest, ext, file_path):
+        """저장소의 객체를 file_path로 연결합니다. 객체가 없으면 False를 반환합니다."""
+        object_path = self.object_path(digest, ext)
+        if not os.path.exists(object_path):
+            return False
+        if os.path.exists(file_path) and os.path.samefile(object_path, file_path):
+            return True
+        self._link_or_copy(object_path, file_path)
+        return True
@@ -0,0 +1,181 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus 히스토그램 버킷 경계 (초)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = 'manatoki'
+
+
+class StageStats:
+    """단계 하나의 소요 시간 분포와 누적 바이트 수."""
+    def __init__(self):
+        self.durations = []
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.total_seconds = 0.0
+        self.total_bytes = 0
+
+    def add(self, seconds, num_bytes=0):
+        self.durations.append(seconds)
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total_seconds += seconds
+        self.total_bytes += num_bytes
+
+    def quantile(self, q):
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Metrics:
+    """
+    수집 단계별(페이지 이동, 셀렉터 대기, 지연 로딩, 파싱, 이미지 다운로드, DB, 캡챠 등) 소요 시간 기록기.
+    기록마다 워커/에피소드 라벨과 함께 JSON Lines 트레이스에 쓰고, 단계별 히스토그램을 메모리에 모읍니다.
+    라벨은 bind()로 현재 스레드에 묶어 두면 timer()/record()에서 자동으로 붙습니다.
+    """
+    def __init__(self, trace_path=None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._trace = open(trace_path, 'a', encoding='utf-8') if trace_path else None
+        self.started_at = time.monotonic()
+
+    @contextmanager
+    def bind(self, **labels):
+        """with 블록 동안 현재 스레드의 기록에 labels(worker, episode 등)를 붙입니다."""
+        previous = getattr(self._local, 'labels', {})
+        self._local.labels = {**previous, **labels}
+        try:
+            yield
+        finally:
+            self._local.labels = previous
+
+    def current_labels(self):
+        """현재 스레드의 라벨을 반환합니다. 다른 스레드로 작업을 넘길 때 함께 전달합니다."""
+        return dict(getattr(self._local, 'labels', {}))
+
+    @contextmanager
+    def timer(self, stage, **fields):
+        """with 블록의 소요 시간을 stage로 기록합니다."""
+        start = time.monotonic()
+        try:
+            yield fields
+        finally:
+            self.record(stage, time.monotonic() - start, **fields)
+
+    def record(self, stage, seconds, num_bytes=0, **fields):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds, num_bytes)
+            if self._trace:
+                entry = {"ts": round(time.time(), 3), "stage": stage, "seconds": round(seconds, 4)}
+                entry.update(self.current_labels())
+                entry.update(fields)
+                if num_bytes:
+                    entry["bytes"] = num_bytes
+                self._trace.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def summary_lines(self):
+        """단계별 횟수/합계/분위수와 히스토그램 버킷 분포를 사람이 읽을 수 있는 줄 목록으로 반환합니다."""
+        with self._lock:
+            stages = sorted(self._stages.items(), key=lambda item: -item[1].total_seconds)
+            elapsed = time.monotonic() - self.started_at
+            lines = [f"[메트릭] 전체 {elapsed:.1f}s, 단계별 소요 시간 (합계 큰 순)"]
+            for stage, stats in stages:
+                line = (f"  {stage:<16} n={len(stats.durations):<6} 합계 {stats.total_seconds:8.1f}s  "
+                        f"p50 {stats.quantile(0.5):6.2f}s  p99 {stats.quantile(0.99):6.2f}s  "
+                        f"max {max(stats.durations):6.2f}s")
+                if stats.total_bytes:
+                    rate = stats.total_bytes / stats.total_seconds / 1024 / 1024 if stats.total_seconds else 0
+                    line += f"  {stats.total_bytes / 1024 / 1024:.1f}MB ({rate:.2f}MB/s per stream)"
+                lines.append(line)
+                buckets = ' '.join(
+                    f"≤{le:g}s:{count}" for le, count in zip(BUCKETS + (float('inf'),), stats.bucket_counts) if count
+                )
+                lines.append(f"  {'':<16} {buckets}")
+            return lines
+
+    def prometheus_text(self):
+        """Prometheus text exposition 형식의 메트릭 문자열을 반환합니다."""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per crawl stage.", f"# TYPE {name} histogram"]
+        byte_lines = []
+        with self._lock:
+            for stage, stats in sorted(self._stages.items()):
+                cumulative = 0
+                for le, count in zip(BUCKETS, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {len(stats.durations)}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total_seconds:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {len(stats.durations)}')
+                if stats.total_bytes:
+                    byte_lines.append(f'{METRIC_PREFIX}_stage_bytes_total{{stage="{stage}"}} {stats.total_bytes}')
+        if byte_lines:
+            lines += [f"# HELP {METRIC_PREFIX}_stage_bytes_total Bytes transferred per crawl stage.",
+                      f"# TYPE {METRIC_PREFIX}_stage_bytes_total counter"] + byte_lines
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._trace:
+                self._trace.close()
+                self._trace = None
+
+
+class NullMetrics:
+    """메트릭을 쓰지 않을 때 사용하는 아무 일도 하지 않는 기록기."""
+    @contextmanager
+    def bind(self, **labels):
+        yield
+
+    def current_labels(self):
+        return {}
+
+    @contextmanager
+    def timer(self, stage, **fields):
+        yield fields
+
+    def record(self, stage, seconds, num_bytes=0, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class MetricsServer:
+    """/metrics 경로로 Prometheus 텍스트를 제공하는 간단한 HTTP 서버 (백그라운드 스레드)."""
+    def __init__(self, metrics, port, host='127.0.0.1'):
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_ref.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
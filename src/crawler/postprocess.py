@@ -0,0 +1,218 @@
+"""
+다운로드가 끝난 에피소드 폴더의 후처리 단계.
+
+에피소드마다 ComicInfo.xml을 넣은 CBZ(zip) 파일을 만들고, 설정에 따라 Pillow로 이미지를
+WebP/AVIF로 다시 인코딩하거나 가로 크기를 줄입니다. 인코딩은 CPU를 많이 쓰므로
+ProcessPoolExecutor에서 실행하며, 대기 중인 작업 수를 제한해 후처리가 밀리면 워커가 기다립니다.
+
+에피소드 폴더의 이미지는 이미지 저장소의 하드링크일 수 있으므로 원본 파일은 수정하지 않고,
+다시 인코딩한 이미지는 CBZ 안에만 넣습니다.
+"""
+import concurrent.futures
+import io
+import os
+import threading
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from crawler.metrics import NULL_METRICS
+
+CBZ_SUFFIX = '.cbz'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif', '.bmp')
+# Pillow 저장 형식 이름 (image_format 설정값 → Pillow format, 확장자)
+ENCODE_FORMATS = {
+    'webp': ('WEBP', '.webp'),
+    'avif': ('AVIF', '.avif'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+DEFAULT_QUALITY = 80
+# 실행 중(프로세스에 넘긴) 작업 외에 대기할 수 있는 에피소드 수
+DEFAULT_MAX_PENDING = 4
+
+
+class PostProcessOptions:
+    """
+    image_format: 다시 인코딩할 형식 ('webp', 'avif', 'jpeg', 없으면 원본 그대로)
+    max_width: 이보다 넓은 이미지는 비율을 유지해 줄입니다 (0이면 그대로)
+    keep_images: False면 CBZ를 만든 뒤 에피소드 폴더의 이미지를 지웁니다
+    """
+    def __init__(self, image_format=None, quality=DEFAULT_QUALITY, max_width=0, keep_images=True):
+        if image_format and image_format not in ENCODE_FORMATS:
+            raise ValueError(f"지원하지 않는 이미지 형식입니다: {image_format}")
+        self.image_format = image_format or None
+        self.quality = int(quality)
+        self.max_width = int(max_width or 0)
+        self.keep_images = keep_images
+
+    def check_encoder(self):
+        """설치된 Pillow가 image_format으로 저장할 수 있는지 확인합니다."""
+        if self.image_format:
+            from PIL import Image
+            Image.init()
+            pil_format = ENCODE_FORMATS[self.image_format][0]
+            if pil_format not in Image.SAVE:
+                raise ValueError(f"설치된 Pillow가 {pil_format} 저장을 지원하지 않습니다.")
+
+
+def build_comic_info(title, series=None, web=None, page_count=0):
+    """ComicRack 형식의 ComicInfo.xml 내용을 만듭니다."""
+    fields = [('Title', title), ('Series', series), ('Web', web), ('PageCount', page_count),
+              ('LanguageISO', 'ko'), ('Manga', 'YesAndRightToLeft')]
+    body = ''.join(f"  <{name}>{escape(str(value))}</{name}>\n" for name, value in fields if value)
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ComicInfo xmlns:xsd="http://www.w3.org/2001/XMLSchema" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n' + body + '</ComicInfo>\n')
+
+
+def cbz_path_for(download_dir):
+    """에피소드 폴더를 묶은 CBZ 파일 경로를 반환합니다."""
+    return download_dir.rstrip('/\\') + CBZ_SUFFIX
+
+
+def list_episode_images(download_dir):
+    return sorted(
+        name for name in os.listdir(download_dir)
+        if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS and os.path.isfile(os.path.join(download_dir, name))
+    )
+
+
+def encode_image(path, options):
+    """이미지를 options에 맞게 다시 인코딩해 (바이트, 확장자)를 반환합니다."""
+    from PIL import Image
+    pil_format, ext = ENCODE_FORMATS[options.image_format or 'jpeg']
+    with Image.open(path) as image:
+        if options.max_width and image.width > options.max_width:
+            height = round(image.height * options.max_width / image.width)
+            image = image.resize((options.max_width, height), Image.LANCZOS)
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, pil_format, quality=options.quality)
+    return buffer.getvalue(), ext
+
+
+def package_episode(download_dir, metadata, options):
+    """
+    에피소드 폴더를 '<폴더>.cbz'로 묶습니다. 프로세스 풀에서 실행됩니다.
+    (CBZ 경로, 원본 바이트 수, CBZ 안 이미지 바이트 수, 페이지 수)를 반환합니다.
+    """
+    names = list_episode_images(download_dir)
+    if not names:
+        raise ValueError(f"이미지가 없습니다: {download_dir}")
+    re_encode = bool(options.image_format or options.max_width)
+    cbz_path = cbz_path_for(download_dir)
+    part_path = cbz_path + '.part'
+    original_bytes = packed_bytes = 0
+
+    # 이미지는 이미 압축되어 있으므로 다시 압축하지 않고 저장합니다.
+    with zipfile.ZipFile(part_path, 'w', zipfile.ZIP_STORED) as archive:
+        for page, name in enumerate(names, start=1):
+            path = os.path.join(download_dir, name)
+            original_bytes += os.path.getsize(path)
+            if re_encode:
+                data, ext = encode_image(path, options)
+            else:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                ext = os.path.splitext(name)[1].lower()
+            archive.writestr(f"{page:03d}{ext}", data)
+            packed_bytes += len(data)
+        archive.writestr('ComicInfo.xml', build_comic_info(
+            metadata.get('title') or os.path.basename(download_dir),
+            metadata.get('series'), metadata.get('url'), len(names)), zipfile.ZIP_DEFLATED)
+    os.replace(part_path, cbz_path)
+
+    if not options.keep_images:
+        for name in names:
+            os.remove(os.path.join(download_dir, name))
+        try:
+            os.rmdir(download_dir)
+        except OSError:
+            pass
+    return cbz_path, original_bytes, packed_bytes, len(names)
+
+
+class PostProcessor:
+    """
+    에피소드 후처리 작업을 프로세스 풀에 넘기는 단계. 여러 워커 스레드가 함께 씁니다.
+    풀에 넘긴 작업이 max_workers + max_pending개를 넘으면 submit()이 자리가 날 때까지 기다립니다.
+    """
+    def __init__(self, options, max_workers=None, max_pending=DEFAULT_MAX_PENDING, log_callback=print,
+                 metrics=NULL_METRICS):
+        options.check_encoder()
+        self.options = options
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.log_callback = log_callback
+        self.metrics = metrics
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers)
+        self.done_count = 0
+        self.failed_count = 0
+
+    @classmethod
+    def from_params(cls, params, log_callback=print, metrics=NULL_METRICS):
+        """
+        수집 파라미터(dict) → app_config 순으로 설정을 읽습니다. postprocess가 'cbz'가 아니면 None을 반환합니다.
+        """
+        # 자식 프로세스는 DB를 쓰지 않으므로 모듈을 가져올 때가 아니라 여기서 가져옵니다.
+        import database as DB
+
+        def setting(key, default=None):
+            value = params.get(key)
+            if value in (None, ''):
+                value = DB.get_app_config(key)
+            return default if value in (None, '') else value
+
+        if setting('postprocess') != 'cbz':
+            return None
+        options = PostProcessOptions(
+            image_format=setting('image_format'),
+            quality=setting('image_quality', DEFAULT_QUALITY),
+            max_width=setting('max_image_width', 0),
+            keep_images=str(setting('keep_images', '1')).lower() not in ('0', 'false', 'off'),
+        )
+        workers = setting('postprocess_workers')
+        return cls(options, max_workers=int(workers) if workers else None, log_callback=log_callback,
+                   metrics=metrics)
+
+    def submit(self, download_dir, metadata, stop_event=None):
+        """
+        에피소드 폴더의 후처리를 예약합니다. 대기열이 가득 차면 기다리며, 중지 요청 시 예약하지 않고 False를 반환합니다.
+        """
+        with self.metrics.timer('postprocess_wait'):
+            while not self._slots.acquire(timeout=0.5):
+                if stop_event is not None and stop_event.is_set():
+                    return False
+        submitted_at = time.monotonic()
+        try:
+            future = self._executor.submit(package_episode, download_dir, metadata, self.options)
+        except RuntimeError:
+            self._slots.release()
+            return False
+        future.add_done_callback(lambda f: self._on_done(f, download_dir, metadata, submitted_at))
+        return True
+
+    def _on_done(self, future, download_dir, metadata, submitted_at):
+        self._slots.release()
+        if future.cancelled():
+            return
+        try:
+            cbz_path, original_bytes, packed_bytes, pages = future.result()
+        except Exception as e:
+            self.failed_count += 1
+            self.log_callback(f"[후처리 실패] {download_dir}: {e}")
+            return
+        if not self.options.keep_images and metadata.get('url'):
+            # 이미지를 지웠으므로 manifest를 'packaged'로 바꿔 다음 실행에서 CBZ를 완료된 에피소드로 봅니다.
+            import database as DB
+            DB.mark_episode_packaged(metadata['url'])
+        self.done_count += 1
+        self.metrics.record('postprocess', time.monotonic() - submitted_at, num_bytes=packed_bytes,
+                            pages=pages, original_bytes=original_bytes)
+        ratio = packed_bytes / original_bytes * 100 if original_bytes else 100
+        self.log_callback(f"CBZ 생성: {os.path.basename(cbz_path)} ({pages}쪽, 원본 대비 {ratio:.0f}%)")
+
+    def close(self, cancel=False):
+        """남은 후처리가 끝날 때까지 기다린 뒤 프로세스 풀을 종료합니다. cancel이면 시작하지 않은 작업은 취소합니다."""
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
@@ -0,0 +1,290 @@
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import database as DB
+
+DEFAULT_MAX_ATTEMPTS = 3
+# 재시도 대기 시간 = base_backoff * 2^(시도 횟수 - 1)
+DEFAULT_BASE_BACKOFF = 5.0
+# 실패한 워커와 다른 워커가 가져가기를 기다리는 최대 시간 (이후에는 아무 워커나 가져갑니다)
+DEFAULT_AFFINITY_TIMEOUT = 30.0
+# 임대 기간 (초). 하트비트가 이 시간의 1/3마다 연장하며, 프로세스가 죽으면 이 시간 뒤 다른 프로세스가 가져갑니다.
+DEFAULT_LEASE_SECONDS = 120.0
+# 임대할 에피소드가 없을 때 다시 확인하는 간격 (초)
+DEFAULT_LEASE_POLL_INTERVAL = 2.0
+
+
+class WorkItem:
+    """작업 큐의 에피소드 하나. data에는 에피소드가 속한 만화 작업 등 호출자 정보를 담습니다."""
+    def __init__(self, url, data=None):
+        self.url = url
+        self.data = data
+        self.attempts = 0
+        self.failed_workers = set()
+        self.not_before = 0.0
+        self.requeued_at = 0.0
+        self.result = None
+
+
+class WorkQueue:
+    """
+    모든 워커가 공유하는 에피소드 작업 큐.
+    워커는 끝날 때마다 다음 항목을 하나씩 가져가므로 느린 에피소드가 있어도 다른 워커가 나머지를 처리합니다.
+    실패한 항목은 지수 백오프 후, 가능하면 실패하지 않은 다른 워커에게 다시 배정됩니다.
+    항목이 끝날 때마다 on_item_done(item, done, total) 콜백이 호출됩니다.
+    """
+    def __init__(self, urls=(), max_attempts=DEFAULT_MAX_ATTEMPTS, base_backoff=DEFAULT_BASE_BACKOFF,
+                 affinity_timeout=DEFAULT_AFFINITY_TIMEOUT, on_item_done=None):
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.affinity_timeout = affinity_timeout
+        self.on_item_done = on_item_done
+
+        self._pending = deque(WorkItem(url) for url in urls)
+        self._cond = threading.Condition()
+        self._in_progress = 0
+        self._active_workers = set()
+        self.total = len(self._pending)
+        self.done = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.started_at = time.monotonic()
+
+    def add(self, url, data=None):
+        """작업 항목을 큐 끝에 추가합니다."""
+        with self._cond:
+            self._pending.append(WorkItem(url, data))
+            self.total += 1
+            self._cond.notify_all()
+
+    def register_worker(self, worker_id):
+        with self._cond:
+            self._active_workers.add(worker_id)
+
+    def unregister_worker(self, worker_id):
+        with self._cond:
+            self._active_workers.discard(worker_id)
+            self._cond.notify_all()
+
+    def _pick(self, worker_id, now):
+        """지금 이 워커가 가져갈 수 있는 항목과 다음 확인까지 기다릴 시간을 반환합니다."""
+        others_alive = bool(self._active_workers - {worker_id})
+        wait = None
+        for item in self._pending:
+            ready_at = item.not_before
+            if worker_id in item.failed_workers and others_alive:
+                ready_at = max(ready_at, item.requeued_at + self.affinity_timeout)
+            if ready_at <= now:
+                self._pending.remove(item)
+                return item, None
+            wait = ready_at - now if wait is None else min(wait, ready_at - now)
+        return None, wait
+
+    def get(self, worker_id, stop_event):
+        """다음 작업 항목을 반환합니다. 남은 작업이 없거나 중지되면 None을 반환합니다."""
+        with self._cond:
+            while not stop_event.is_set():
+                if not self._pending and not self._in_progress:
+                    return None
+                item, wait = self._pick(worker_id, time.monotonic())
+                if item is not None:
+                    item.attempts += 1
+                    self._in_progress += 1
+                    return item
+                # 진행 중인 항목이 재시도로 돌아오거나 백오프가 끝날 때까지 기다립니다.
+                self._cond.wait(timeout=min(wait, 1.0) if wait is not None else 1.0)
+            return None
+
+    def complete(self, item, result):
+        """항목을 최종 완료(성공 또는 재시도 소진) 처리합니다."""
+        with self._cond:
+            self._in_progress -= 1
+            item.result = result
+            self.done += 1
+            if result.get("state") == "SUCCESS":
+                self.success_count += 1
+            else:
+                self.failed_count += 1
+            done, total = self.done, self.total
+            self._cond.notify_all()
+        if self.on_item_done:
+            self.on_item_done(item, done, total)
+
+    def retry(self, item, worker_id, result):
+        """
+        실패한 항목을 백오프 후 다시 큐에 넣습니다. 재시도 횟수를 다 썼으면 실패로 완료 처리합니다.
+        다시 넣었으면 True를 반환합니다.
+        """
+        if item.attempts >= self.max_attempts:
+            self.complete(item, result)
+            return False
+        with self._cond:
+            self._in_progress -= 1
+            now = time.monotonic()
+            item.failed_workers.add(worker_id)
+            item.requeued_at = now
+            item.not_before = now + self.base_backoff * (2 ** (item.attempts - 1))
+            item.result = result
+            self._pending.append(item)
+            self._cond.notify_all()
+        return True
+
+    def release(self, item):
+        """중지 요청 등으로 처리하지 못한 항목을 결과 없이 큐에 되돌립니다."""
+        with self._cond:
+            self._in_progress -= 1
+            item.attempts -= 1
+            self._pending.appendleft(item)
+            self._cond.notify_all()
+
+    def throughput(self):
+        """시작 후 분당 완료 에피소드 수를 반환합니다."""
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
+
+
+class LeaseWorkQueue:
+    """
+    여러 프로세스(또는 같은 DB 파일을 쓰는 여러 기계)가 episode_jobs 테이블을 함께 쓰는 작업 큐.
+    WorkQueue와 같은 인터페이스이므로 crawl_worker를 그대로 쓸 수 있습니다.
+
+    에피소드는 lease_seconds초 동안 임대되고, 하트비트 스레드가 처리 중인 임대를 계속 연장합니다.
+    프로세스가 죽으면 연장이 끊겨 임대가 만료되고 다른 프로세스가 다시 가져갑니다.
+    완료는 임대 토큰이 유효할 때만 기록되므로 한 에피소드는 한 번만 완료됩니다.
+    make_data(job)는 임대한 에피소드의 만화 작업 dict로 WorkItem.data를 만듭니다 (만화 id별로 한 번 호출).
+    """
+    def __init__(self, make_data, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 base_backoff=DEFAULT_BASE_BACKOFF, poll_interval=DEFAULT_LEASE_POLL_INTERVAL,
+                 on_item_done=None, on_lease_lost=None):
+        self.make_data = make_data
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.poll_interval = poll_interval
+        self.on_item_done = on_item_done
+        # 임대를 잃은 항목(다른 프로세스가 가져감)을 완료하려 할 때 item으로 호출됩니다.
+        self.on_lease_lost = on_lease_lost
+
+        self._lock = threading.Lock()
+        self._data = {}
+        self._held = {}
+        self._in_progress = 0
+        self._open_jobs = DB.count_open_episode_jobs()
+        self.done = 0
+        self.success_count = 0
+        self.failed_count = 0
+        self.lost_count = 0
+        self.started_at = time.monotonic()
+
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat = threading.Thread(target=self._run_heartbeat, name="LeaseHeartbeat", daemon=True)
+        self._heartbeat.start()
+
+    @property
+    def total(self):
+        """이 프로세스가 끝낸 항목 + 마지막으로 확인한 DB의 남은 항목 (처리 중인 항목과 다른 프로세스 몫 포함)."""
+        with self._lock:
+            return self.done + self._open_jobs
+
+    def register_worker(self, worker_id):
+        pass
+
+    def unregister_worker(self, worker_id):
+        pass
+
+    def _run_heartbeat(self):
+        try:
+            while not self._stop_heartbeat.wait(self.lease_seconds / 3):
+                with self._lock:
+                    tokens = list(self._held)
+                if tokens:
+                    DB.renew_episode_leases(tokens, self.lease_seconds)
+        finally:
+            DB.close_thread_connection()
+
+    def get(self, worker_id, stop_event):
+        """다음 에피소드를 임대해 반환합니다. DB에 남은 작업이 없거나 중지되면 None을 반환합니다."""
+        while not stop_event.is_set():
+            job = DB.claim_episode_job(self.owner, self.lease_seconds)
+            open_jobs = DB.count_open_episode_jobs()
+            with self._lock:
+                self._open_jobs = open_jobs
+                if job is not None:
+                    if job['series_id'] not in self._data:
+                        self._data[job['series_id']] = self.make_data(job)
+                    item = WorkItem(job['url'], self._data[job['series_id']])
+                    item.attempts = job['claims']
+                    item.token = job['token']
+                    self._held[item.token] = item
+                    self._in_progress += 1
+                    return item
+            if not open_jobs:
+                return None
+            # 다른 프로세스가 처리 중이거나 백오프 중인 항목이 끝나기를 기다립니다.
+            stop_event.wait(self.poll_interval)
+        return None
+
+    def _finish(self, item, result, completed):
+        open_jobs = DB.count_open_episode_jobs()
+        with self._lock:
+            self._open_jobs = open_jobs
+            self._held.pop(item.token, None)
+            self._in_progress -= 1
+            if not completed:
+                self.lost_count += 1
+            else:
+                item.result = result
+                self.done += 1
+                if result.get("state") == "SUCCESS":
+                    self.success_count += 1
+                else:
+                    self.failed_count += 1
+            done = self.done
+        if not completed:
+            if self.on_lease_lost:
+                self.on_lease_lost(item)
+            return
+        if self.on_item_done:
+            self.on_item_done(item, done, self.total)
+
+    def complete(self, item, result):
+        """항목을 최종 완료(성공 또는 재시도 소진) 처리합니다. 임대를 이미 잃었으면 기록하지 않습니다."""
+        succeeded = result.get("state") == "SUCCESS"
+        completed = DB.complete_episode_job(item.token, item.url, 'done' if succeeded else 'failed',
+                                            result.get("title") or None)
+        self._finish(item, result, completed)
+
+    def retry(self, item, worker_id, result):
+        """
+        실패한 항목의 임대를 풀고 백오프 후 (어느 프로세스든) 다시 가져갈 수 있게 합니다.
+        임대 횟수를 다 썼으면 실패로 완료 처리합니다. 다시 넣었으면 True를 반환합니다.
+        """
+        state = DB.retry_episode_job(item.token, self.max_attempts, self.base_backoff)
+        if state == 'pending':
+            with self._lock:
+                self._held.pop(item.token, None)
+                self._in_progress -= 1
+            return True
+        self._finish(item, result, state is not None)
+        return False
+
+    def release(self, item):
+        """중지 요청 등으로 처리하지 못한 항목의 임대를 풉니다."""
+        DB.release_episode_job(item.token)
+        with self._lock:
+            self._held.pop(item.token, None)
+            self._in_progress -= 1
+
+    def close(self):
+        """하트비트를 멈춥니다. 아직 임대 중인 항목은 만료 후 다른 프로세스가 가져갑니다."""
+        self._stop_heartbeat.set()
+        self._heartbeat.join()
+
+    def throughput(self):
+        """시작 후 분당 완료 에피소드 수를 반환합니다."""
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
@@ -1,20 +1,129 @@
-
+import atexit
+import os
+import queue
 import sqlite3
+import threading
+import time
+import uuid
 from contextlib import contextmanager
 
 DB_FILE = 'crawled_pages.db'
 
+# 새 연결마다 적용할 PRAGMA 설정 (WAL 모드 + 읽기 위주 튜닝)
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA busy_timeout=5000",
+)
+# 연결별로 캐시할 prepared statement 개수
+STATEMENT_CACHE_SIZE = 256
+# IN (...) 조회 한 번에 바인딩할 URL 개수 (SQLite 변수 한도 999 미만)
+IN_QUERY_CHUNK_SIZE = 500
+# 이보다 짧은 검색어는 trigram 전문 검색 색인을 쓸 수 없어 LIKE로 검색합니다.
+FTS_MIN_TERM_LENGTH = 3
+
+_local = threading.local()
+_init_lock = threading.Lock()
+# init_db()로 스키마를 준비한 DB 파일 경로
+_initialized_files = set()
+# 열려 있는 연결의 (소유 스레드, 연결) 목록
+_connections = []
+_connections_lock = threading.Lock()
+# close_all_connections() 호출 시 증가하여 다른 스레드가 다음 사용 때 새 연결을 열게 합니다. (init_db()로 파일을 바꾼 경우)
+_generation = 0
+
+
+def _open_connection():
+    """PRAGMA가 적용된 새 연결을 엽니다."""
+    conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_thread_connection():
+    """현재 스레드 전용의 영구 연결을 반환합니다. 없으면 새로 엽니다."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and getattr(_local, 'generation', None) != _generation:
+        close_thread_connection()
+        conn = None
+    if conn is None:
+        conn = _open_connection()
+        _local.conn = conn
+        _local.generation = _generation
+        with _connections_lock:
+            _connections.append((threading.current_thread(), conn))
+    return conn
+
+
+def close_thread_connection():
+    """현재 스레드의 연결을 닫습니다. 워커 스레드가 끝날 때 호출합니다."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        return
+    _local.conn = None
+    with _connections_lock:
+        _connections[:] = [entry for entry in _connections if entry[1] is not conn]
+    conn.close()
+
+
+def close_all_connections():
+    """
+    호출한 스레드의 연결과 소유 스레드가 이미 끝난 연결을 닫습니다. 애플리케이션 종료 시 호출됩니다.
+    실행 중인 스레드의 연결은 사용 중일 수 있으므로 닫지 않고, 그 스레드가 끝날 때 close_thread_connection()으로
+    닫거나 다음 호출에서 닫습니다. 모든 연결을 닫으려면 워커 스레드와 쓰기 스레드(CrawlResultWriter.close())를
+    먼저 끝낸 뒤 호출합니다.
+    """
+    global _generation
+    current = threading.current_thread()
+    with _connections_lock:
+        _generation += 1
+        connections = [conn for thread, conn in _connections if thread is current or not thread.is_alive()]
+        _connections[:] = [entry for entry in _connections if entry[1] not in connections]
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.conn = None
+
+
+atexit.register(close_all_connections)
+
+
+def init_db(db_file=None):
+    """
+    DB 파일을 정하고 스키마(테이블/인덱스)를 준비합니다. 프로그램 시작 시 한 번 호출합니다.
+    같은 파일에 대해 다시 호출하면 아무 일도 하지 않습니다. db_file을 주면 기존 연결을 닫고 그 파일로 바꿉니다.
+    """
+    global DB_FILE
+    with _init_lock:
+        if db_file and db_file != DB_FILE:
+            close_all_connections()
+            DB_FILE = db_file
+        path = os.path.abspath(DB_FILE)
+        if path in _initialized_files:
+            return
+        create_tables()
+        _initialized_files.add(path)
+
+
 @contextmanager
 def get_db_connection():
-    """데이터베이스 연결을 관리하는 컨텍스트 매니저"""
-    conn = sqlite3.connect(DB_FILE)
+    """현재 스레드의 영구 연결을 제공하는 컨텍스트 매니저 (연결은 닫지 않고 재사용)"""
+    conn = get_thread_connection()
     try:
         yield conn
-    finally:
-        conn.close()
+    except Exception:
+        conn.rollback()
+        raise
 
 def create_tables():
-    """'crawled_urls'와 'app_config' 테이블을 생성합니다."""
+    """'crawled_urls', 'app_config', 'image_manifest', 'http_cache', 작업 대기열 테이블들을 생성합니다."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
@@ -31,8 +140,196 @@ def create_tables():
                 value TEXT
             )
         """)
+        # 에피소드 이미지 단위의 다운로드 진행 기록 (재실행 시 완료된 이미지는 건너뜀)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_manifest (
+                page_url TEXT NOT NULL,
+                image_index INTEGER NOT NULL,
+                image_url TEXT NOT NULL,
+                download_dir TEXT NOT NULL,
+                file_path TEXT,
+                size INTEGER,
+                sha256 TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (page_url, image_index)
+            )
+        """)
+        # 이미지 URL별 내용 해시 (이미지 저장소에 있는 이미지는 다시 받지 않음)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS image_hashes (
+                image_url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                ext TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # 목록/에피소드 페이지의 HTTP 캐시 색인 (본문은 crawler/http_cache.py가 파일로 저장)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                headers TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_accessed_at ON http_cache (accessed_at)")
+        # 여러 만화(목록 URL)를 순서대로 수집하기 위한 작업 대기열
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS series_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                list_url TEXT NOT NULL UNIQUE,
+                download_path TEXT NOT NULL DEFAULT '',
+                priority INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # lease_*: 여러 프로세스가 에피소드를 나눠 가질 때의 임대 정보 (lease_expires, not_before는 time.time() 초)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS episode_jobs (
+                series_id INTEGER NOT NULL REFERENCES series_jobs (id) ON DELETE CASCADE,
+                url TEXT NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                not_before REAL NOT NULL DEFAULT 0,
+                claims INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (series_id, url)
+            )
+        """)
+        _add_missing_columns(cursor, 'episode_jobs', EPISODE_LEASE_COLUMNS)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_series_jobs_state ON series_jobs (state, priority DESC, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_episode_jobs_state ON episode_jobs (state, not_before)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_episode_jobs_lease_token ON episode_jobs (lease_token)")
+        # DB 보기 창의 정렬(수집일시 최신순)과 제목 검색/정렬용 인덱스
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawled_urls_crawled_at ON crawled_urls (crawled_at, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_crawled_urls_page_title ON crawled_urls (page_title)")
+        _create_title_search_index(cursor)
+        # 만화별 목록 페이지 해시와 마지막으로 본 최신 에피소드 (증분 새로고침용)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS series_index (
+                list_url TEXT PRIMARY KEY,
+                content_hash TEXT,
+                last_seen_url TEXT,
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
         conn.commit()
 
+# 임대 컬럼이 없던 예전 DB의 episode_jobs에 추가할 컬럼
+EPISODE_LEASE_COLUMNS = (
+    ('lease_owner', 'TEXT'),
+    ('lease_token', 'TEXT'),
+    ('lease_expires', 'REAL'),
+    ('not_before', 'REAL NOT NULL DEFAULT 0'),
+    ('claims', 'INTEGER NOT NULL DEFAULT 0'),
+)
+
+def _add_missing_columns(cursor, table, columns):
+    """예전 버전에서 만든 테이블에 없는 컬럼을 추가합니다."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+# create_tables()에서 FTS5 색인을 만들 수 있었는지 여부
+_title_search_enabled = False
+
+def _create_title_search_index(cursor):
+    """
+    제목 검색용 FTS5(trigram) 색인과 crawled_urls 변경을 따라가는 트리거를 만듭니다.
+    색인을 새로 만들었으면 기존 데이터로 채웁니다. FTS5/trigram을 지원하지 않는 SQLite면 LIKE 검색을 사용합니다.
+    """
+    global _title_search_enabled
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crawled_urls_fts'")
+    exists = cursor.fetchone() is not None
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS crawled_urls_fts USING fts5 (
+                page_title, content='crawled_urls', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"제목 전문 검색 색인을 사용할 수 없습니다. LIKE 검색을 사용합니다: {e}")
+        _title_search_enabled = False
+        return
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS crawled_urls_fts_insert AFTER INSERT ON crawled_urls BEGIN
+            INSERT INTO crawled_urls_fts (rowid, page_title) VALUES (new.id, new.page_title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS crawled_urls_fts_delete AFTER DELETE ON crawled_urls BEGIN
+            INSERT INTO crawled_urls_fts (crawled_urls_fts, rowid, page_title) VALUES ('delete', old.id, old.page_title);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS crawled_urls_fts_update AFTER UPDATE OF page_title ON crawled_urls BEGIN
+            INSERT INTO crawled_urls_fts (crawled_urls_fts, rowid, page_title) VALUES ('delete', old.id, old.page_title);
+            INSERT INTO crawled_urls_fts (rowid, page_title) VALUES (new.id, new.page_title);
+        END
+    """)
+    if not exists:
+        cursor.execute("INSERT INTO crawled_urls_fts (crawled_urls_fts) VALUES ('rebuild')")
+    _title_search_enabled = True
+
+def _title_search_clause(search_term):
+    """제목 검색 조건 (WHERE 절, 바인딩 값 목록)을 반환합니다. 검색어가 없으면 ('', [])."""
+    if not search_term:
+        return "", []
+    if _title_search_enabled and len(search_term) >= FTS_MIN_TERM_LENGTH:
+        phrase = '"' + search_term.replace('"', '""') + '"'
+        return "id IN (SELECT rowid FROM crawled_urls_fts WHERE crawled_urls_fts MATCH ?)", [phrase]
+    return "page_title LIKE ?", [f"%{search_term}%"]
+
+def count_crawled_urls(search_term=""):
+    """수집된 URL 수(검색어가 있으면 제목이 일치하는 수)를 반환합니다."""
+    where, params = _title_search_clause(search_term)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM crawled_urls" + (f" WHERE {where}" if where else ""), params)
+        return cursor.fetchone()[0]
+
+def get_crawled_urls_page(search_term="", after=None, limit=200):
+    """
+    수집된 URL을 수집일시 최신순으로 limit개씩 반환합니다. 각 행은 (id, page_title, crawled_at, url)입니다.
+    다음 페이지는 이전 페이지 마지막 행의 (crawled_at, id)를 after로 넘겨 이어서 읽습니다. (OFFSET 없이 인덱스 사용)
+    """
+    where, params = _title_search_clause(search_term)
+    conditions = [where] if where else []
+    if after is not None:
+        conditions.append("(crawled_at, id) < (?, ?)")
+        params = params + list(after)
+    query = "SELECT id, page_title, crawled_at, url FROM crawled_urls"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY crawled_at DESC, id DESC LIMIT ?"
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params + [limit])
+        return cursor.fetchall()
+
+def get_crawled_url_ids(search_term=""):
+    """검색 조건에 맞는 모든 수집 URL의 ID 집합을 반환합니다."""
+    where, params = _title_search_clause(search_term)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM crawled_urls" + (f" WHERE {where}" if where else ""), params)
+        return {row[0] for row in cursor}
+
 def get_app_config(key):
     """app_config 테이블에서 값을 가져옵니다."""
     with get_db_connection() as conn:
@@ -55,6 +352,46 @@ def is_url_crawled(url):
         cursor.execute("SELECT 1 FROM crawled_urls WHERE url = ?", (url,))
         return cursor.fetchone() is not None
 
+def get_crawled_urls(urls):
+    """주어진 URL 중 이미 수집된 URL의 집합을 한 번의 조회로 반환합니다."""
+    urls = list(dict.fromkeys(urls))
+    crawled = set()
+    if not urls:
+        return crawled
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # SQLite 바인딩 변수 한도를 넘지 않도록 나누어 조회합니다.
+        for start in range(0, len(urls), IN_QUERY_CHUNK_SIZE):
+            chunk = urls[start:start + IN_QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"SELECT url FROM crawled_urls WHERE url IN ({placeholders})", chunk)
+            crawled.update(row[0] for row in cursor)
+    return crawled
+
+
+class CrawledUrlCache:
+    """
+    한 번의 수집 실행 동안 사용하는 '수집 완료 URL' 메모리 캐시.
+    수집 대상은 episode_jobs에서 이미 수집된 URL을 뺀 뒤 정해지므로, 보통은 비어 있는 상태로 만들어
+    이번 실행에서 완료한 URL(재시도 중 중복 처리 방지)만 담습니다. urls를 주면 그 URL들을 한 번에 조회해 둡니다.
+    """
+    def __init__(self, urls=()):
+        self._lock = threading.Lock()
+        self._crawled = get_crawled_urls(urls)
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._crawled
+
+    def __len__(self):
+        with self._lock:
+            return len(self._crawled)
+
+    def add(self, url):
+        with self._lock:
+            self._crawled.add(url)
+
+
 def add_crawled_url(url, page_title):
     """수집 완료된 URL을 데이터베이스에 추가합니다."""
     with get_db_connection() as conn:
@@ -68,18 +405,580 @@ def add_crawled_url(url, page_title):
             print(f"이미 데이터베이스에 존재: {url}")
 
 
+class CrawlResultWriter:
+    """
+    수집 완료 기록을 큐로 받아 전용 쓰기 스레드 하나에서 배치로 커밋하는 write-behind 기록기.
+    워커는 add()/set_episode_job_state()만 호출하므로 DB I/O 때문에 대기하지 않습니다.
+    기록은 넣은 순서대로 커밋되므로 에피소드 작업의 'done' 상태는 그 crawled_urls 기록보다 먼저 커밋되지 않습니다.
+    (기록 전에 프로세스가 죽으면 둘 다 남지 않아 다음 실행에서 다시 수집합니다.)
+    배치는 batch_size개가 모이거나 flush_interval초가 지나면 커밋되며,
+    stop_event가 설정되었거나 close()/종료 시에는 즉시 모두 기록합니다.
+    """
+    _STOP = object()
+
+    def __init__(self, batch_size=50, flush_interval=1.0, stop_event=None, on_commit=None):
+        self.batch_size = batch_size
+        # 배치를 커밋할 때마다 (건수, 소요 초)로 호출됩니다. (메트릭 기록용)
+        self.on_commit = on_commit
+        self.flush_interval = flush_interval
+        self.stop_event = stop_event
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="CrawlResultWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, url, page_title):
+        """수집 완료된 URL을 기록 대기열에 넣습니다."""
+        self._queue.put(('crawled', url, page_title))
+
+    def set_episode_job_state(self, series_id, url, state):
+        """에피소드 작업의 상태 변경('done', 'failed')을 기록 대기열에 넣습니다."""
+        self._queue.put(('episode_job', series_id, url, state))
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 기록이 모두 커밋될 때까지 기다립니다."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        """남은 기록을 모두 커밋하고 쓰기 스레드를 종료합니다."""
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        try:
+            while True:
+                timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is self._STOP:
+                    break
+                if isinstance(item, threading.Event):
+                    batch = self._write(batch)
+                    deadline = None
+                    item.set()
+                    continue
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                stopping = self.stop_event is not None and self.stop_event.is_set()
+                if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    batch = self._write(batch)
+                    deadline = None if not batch else time.monotonic() + self.flush_interval
+        finally:
+            self._write(batch)
+            close_thread_connection()
+
+    def _write(self, batch):
+        """배치를 한 트랜잭션으로 커밋합니다. 실패하면 다음에 다시 시도하도록 배치를 돌려줍니다."""
+        if not batch:
+            return batch
+        try:
+            start = time.monotonic()
+            crawled = [item[1:] for item in batch if item[0] == 'crawled']
+            job_states = [item[1:] for item in batch if item[0] == 'episode_job']
+            with get_db_connection() as conn:
+                conn.executemany("INSERT OR IGNORE INTO crawled_urls (url, page_title) VALUES (?, ?)", crawled)
+                conn.executemany("""
+                    UPDATE episode_jobs SET
+                        state = ?,
+                        attempts = attempts + CASE WHEN ? = 'failed' THEN 1 ELSE 0 END,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE series_id = ? AND url = ?
+                """, [(state, state, series_id, url) for series_id, url, state in job_states])
+                conn.commit()
+            if self.on_commit:
+                self.on_commit(len(batch), time.monotonic() - start)
+            print(f"데이터베이스에 {len(batch)}건 기록")
+            return []
+        except sqlite3.Error as e:
+            print(f"데이터베이스 기록 실패 ({len(batch)}건, 재시도 예정): {e}")
+            return batch
+
+
+def register_episode_images(page_url, download_dir, images):
+    """에피소드의 (번호, 이미지 URL) 목록을 manifest에 등록합니다. 이미 있는 항목의 진행 상태는 유지됩니다."""
+    with get_db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO image_manifest (page_url, image_index, image_url, download_dir)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (page_url, image_index) DO UPDATE SET
+                image_url = excluded.image_url,
+                download_dir = excluded.download_dir
+        """, [(page_url, index, img_url, download_dir) for index, img_url in images])
+        conn.commit()
+
+def get_image_manifest(page_url):
+    """에피소드의 manifest를 {이미지 번호: 항목 dict} 형태로 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT image_index, image_url, download_dir, file_path, size, sha256, status
+            FROM image_manifest WHERE page_url = ? ORDER BY image_index
+        """, (page_url,))
+        columns = [col[0] for col in cursor.description]
+        return {row[0]: dict(zip(columns, row)) for row in cursor}
+
+def update_image_manifest(page_url, image_index, status, file_path=None, size=None, sha256=None):
+    """manifest 항목의 상태를 갱신합니다. None으로 넘긴 값은 기존 값을 유지합니다."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            UPDATE image_manifest SET
+                status = ?,
+                file_path = COALESCE(?, file_path),
+                size = COALESCE(?, size),
+                sha256 = COALESCE(?, sha256),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE page_url = ? AND image_index = ?
+        """, (status, file_path, size, sha256, page_url, image_index))
+        conn.commit()
+
+def get_image_hashes(image_urls):
+    """이미지 URL 중 내용 해시를 아는 URL을 {URL: {'sha256', 'size', 'ext'}} 형태로 반환합니다."""
+    image_urls = list(dict.fromkeys(image_urls))
+    hashes = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(image_urls), IN_QUERY_CHUNK_SIZE):
+            chunk = image_urls[start:start + IN_QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"SELECT image_url, sha256, size, ext FROM image_hashes WHERE image_url IN ({placeholders})",
+                           chunk)
+            for image_url, sha256, size, ext in cursor:
+                hashes[image_url] = {'sha256': sha256, 'size': size, 'ext': ext}
+    return hashes
+
+def complete_image(page_url, image_index, file_path, size, sha256, image_url=None):
+    """
+    받은 이미지 하나의 기록을 한 번의 커밋으로 남깁니다. page_url이 있으면 manifest 항목을 'complete'로 바꾸고,
+    image_url이 있으면(이미지 저장소에 넣은 이미지) URL별 내용 해시를 저장합니다.
+    """
+    with get_db_connection() as conn:
+        if page_url:
+            conn.execute("""
+                UPDATE image_manifest SET status = 'complete', file_path = ?, size = ?, sha256 = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE page_url = ? AND image_index = ?
+            """, (file_path, size, sha256, page_url, image_index))
+        if image_url:
+            conn.execute("""
+                INSERT INTO image_hashes (image_url, sha256, size, ext) VALUES (?, ?, ?, ?)
+                ON CONFLICT (image_url) DO UPDATE SET
+                    sha256 = excluded.sha256,
+                    size = excluded.size,
+                    ext = excluded.ext,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (image_url, sha256, size, os.path.splitext(file_path)[1]))
+        conn.commit()
+
+def mark_episode_packaged(page_url):
+    """CBZ로 묶은 뒤 이미지를 지운 에피소드의 manifest 항목을 'packaged'로 바꿉니다."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            UPDATE image_manifest SET status = 'packaged', updated_at = CURRENT_TIMESTAMP
+            WHERE page_url = ?
+        """, (page_url,))
+        conn.commit()
+
+def get_packaged_episode_dir(page_url):
+    """manifest 항목이 모두 'packaged'인 에피소드의 다운로드 폴더를 반환합니다. 아니면 None을 반환합니다."""
+    with get_db_connection() as conn:
+        row = conn.execute("""
+            SELECT download_dir FROM image_manifest WHERE page_url = ?
+            GROUP BY page_url HAVING MIN(status = 'packaged') = 1
+        """, (page_url,)).fetchone()
+        return row[0] if row else None
+
+
+HTTP_CACHE_COLUMNS = ('etag', 'last_modified', 'content_hash', 'size', 'headers', 'fetched_at', 'accessed_at')
+
+def get_http_cache_entry(url):
+    """URL의 HTTP 캐시 색인 항목을 dict로 반환합니다. 없으면 None을 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute(f"SELECT {', '.join(HTTP_CACHE_COLUMNS)} FROM http_cache WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        return dict(zip(HTTP_CACHE_COLUMNS, row)) if row else None
+
+def put_http_cache_entry(url, etag, last_modified, content_hash, size, headers):
+    """캐시에 저장한 응답의 색인을 기록합니다. 이전에 기록된 크기(없으면 0)를 반환합니다."""
+    now = time.time()
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT size FROM http_cache WHERE url = ?", (url,)).fetchone()
+        conn.execute("""
+            INSERT OR REPLACE INTO http_cache
+                (url, etag, last_modified, content_hash, size, headers, fetched_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (url, etag, last_modified, content_hash, size, headers, now, now))
+        conn.commit()
+        return row[0] if row else 0
+
+def touch_http_cache_entry(url, revalidated=False):
+    """캐시 항목의 마지막 사용 시각을 갱신합니다. revalidated이면 서버 확인 시각(fetched_at)도 갱신합니다."""
+    now = time.time()
+    with get_db_connection() as conn:
+        if revalidated:
+            conn.execute("UPDATE http_cache SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+        else:
+            conn.execute("UPDATE http_cache SET accessed_at = ? WHERE url = ?", (now, url))
+        conn.commit()
+
+def delete_http_cache_entry(url):
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+        conn.commit()
+
+def get_http_cache_size():
+    """HTTP 캐시에 저장된 본문 크기의 합계(바이트)를 반환합니다."""
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+
+def evict_http_cache(max_bytes):
+    """
+    합계가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 캐시 항목부터 색인에서 지우고,
+    지운 URL 목록과 남은 합계를 반환합니다. (본문 파일은 호출한 쪽에서 지웁니다.)
+    """
+    evicted = []
+    with get_db_connection() as conn:
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total > max_bytes:
+            for url, size in conn.execute("SELECT url, size FROM http_cache ORDER BY accessed_at").fetchall():
+                evicted.append(url)
+                total -= size
+                if total <= max_bytes:
+                    break
+            for start in range(0, len(evicted), IN_QUERY_CHUNK_SIZE):
+                chunk = evicted[start:start + IN_QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' for _ in chunk)
+                conn.execute(f"DELETE FROM http_cache WHERE url IN ({placeholders})", chunk)
+        conn.commit()
+    return evicted, total
+
+
+def add_series_job(list_url, download_path='', priority=0):
+    """
+    만화 목록 URL을 작업 대기열에 추가하고 작업 id를 반환합니다.
+    이미 있는 작업은 경로/우선순위를 갱신하고, 끝난 작업이면 다시 대기 상태로 돌립니다.
+    """
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO series_jobs (list_url, download_path, priority) VALUES (?, ?, ?)
+            ON CONFLICT (list_url) DO UPDATE SET
+                download_path = excluded.download_path,
+                priority = excluded.priority,
+                state = CASE WHEN state = 'in_progress' THEN state ELSE 'pending' END,
+                updated_at = CURRENT_TIMESTAMP
+        """, (list_url, download_path, priority))
+        conn.commit()
+        cursor = conn.execute("SELECT id FROM series_jobs WHERE list_url = ?", (list_url,))
+        return cursor.fetchone()[0]
+
+def reset_interrupted_jobs():
+    """
+    이전 실행이 중단되어 'in_progress'로 남은 작업을 'pending'으로 되돌립니다.
+    다른 프로세스가 임대 중인(만료되지 않은) 에피소드는 그대로 둡니다.
+    """
+    with get_db_connection() as conn:
+        conn.execute("UPDATE series_jobs SET state = 'pending' WHERE state = 'in_progress'")
+        conn.execute("""
+            UPDATE episode_jobs SET state = 'pending', lease_owner = NULL, lease_token = NULL, lease_expires = NULL
+            WHERE state = 'in_progress' AND (lease_expires IS NULL OR lease_expires < ?)
+        """, (time.time(),))
+        conn.commit()
+
+def requeue_finished_series_jobs():
+    """끝난('done', 'failed') 만화 작업을 모두 'pending'으로 되돌려 목록을 다시 확인하게 하고 그 수를 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            UPDATE series_jobs SET state = 'pending', updated_at = CURRENT_TIMESTAMP WHERE state IN ('done', 'failed')
+        """)
+        conn.commit()
+        return cursor.rowcount
+
+def count_pending_series_jobs():
+    with get_db_connection() as conn:
+        cursor = conn.execute("SELECT COUNT(*) FROM series_jobs WHERE state IN ('pending', 'in_progress')")
+        return cursor.fetchone()[0]
+
+def claim_pending_series_jobs():
+    """대기 중인 모든 만화 작업을 우선순위 순으로 'in_progress'로 바꾸고 dict 목록으로 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            SELECT id, list_url, download_path, priority FROM series_jobs
+            WHERE state = 'pending' ORDER BY priority DESC, id
+        """)
+        columns = [col[0] for col in cursor.description]
+        jobs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        conn.executemany("""
+            UPDATE series_jobs SET state = 'in_progress', updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        """, [(job['id'],) for job in jobs])
+        conn.commit()
+        return jobs
+
+def set_series_job_state(series_id, state, last_error=None):
+    with get_db_connection() as conn:
+        conn.execute("""
+            UPDATE series_jobs SET state = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+        """, (state, last_error, series_id))
+        conn.commit()
+
+def add_episode_jobs(series_id, urls):
+    """만화 작업에 에피소드들을 목록 순서대로 추가합니다. 이미 있는 에피소드의 상태는 유지됩니다."""
+    with get_db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO episode_jobs (series_id, url, position) VALUES (?, ?, ?)
+            ON CONFLICT (series_id, url) DO UPDATE SET position = excluded.position
+        """, [(series_id, url, position) for position, url in enumerate(urls)])
+        conn.commit()
+
+def reopen_uncrawled_episode_jobs(series_id):
+    """
+    'done'이지만 crawled_urls에 기록이 없는(수집 기록을 지운) 에피소드를 'pending'으로 되돌리고 그 수를 반환합니다.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            UPDATE episode_jobs SET state = 'pending', claims = 0, not_before = 0, updated_at = CURRENT_TIMESTAMP
+            WHERE series_id = ? AND state = 'done'
+                AND NOT EXISTS (SELECT 1 FROM crawled_urls c WHERE c.url = episode_jobs.url)
+        """, (series_id,))
+        conn.commit()
+        return cursor.rowcount
+
+def get_unfinished_episode_urls(series_id):
+    """아직 끝나지 않은 ('done'이 아닌) 에피소드 URL을 목록 순서대로 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            SELECT url FROM episode_jobs WHERE series_id = ? AND state != 'done' ORDER BY position
+        """, (series_id,))
+        return [row[0] for row in cursor]
+
+def set_episode_job_states(series_id, urls, state):
+    with get_db_connection() as conn:
+        conn.executemany("""
+            UPDATE episode_jobs SET
+                state = ?,
+                attempts = attempts + CASE WHEN ? = 'failed' THEN 1 ELSE 0 END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE series_id = ? AND url = ?
+        """, [(state, state, series_id, url) for url in urls])
+        conn.commit()
+
+
+def requeue_episode_jobs(series_id, urls):
+    """
+    에피소드들을 새로 임대할 수 있는 'pending' 상태로 되돌리고 임대 횟수를 초기화합니다.
+    지난 실행에서 실패한 에피소드도 다시 시도하며, 다른 프로세스가 임대 중인 에피소드는 건드리지 않습니다.
+    """
+    now = time.time()
+    with get_db_connection() as conn:
+        conn.executemany("""
+            UPDATE episode_jobs SET state = 'pending', claims = 0, not_before = 0,
+                lease_owner = NULL, lease_token = NULL, lease_expires = NULL
+            WHERE series_id = ? AND url = ? AND NOT (state = 'in_progress' AND lease_expires >= ?)
+        """, [(series_id, url, now) for url in urls])
+        conn.commit()
+
+def claim_episode_job(owner, lease_seconds):
+    """
+    임대할 수 있는 에피소드 하나를 lease_seconds초 동안 임대하고 dict로 반환합니다. 없으면 None을 반환합니다.
+    'pending'이거나 임대가 만료된(작업하던 프로세스가 죽은) 에피소드를 만화 우선순위, 목록 순서대로 가져가며,
+    이미 crawled_urls에 있는 에피소드는 임대하지 않고 'done'으로 바꿉니다.
+    BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡으므로 여러 프로세스가 같은 에피소드를 임대하지 않습니다.
+    """
+    with get_db_connection() as conn:
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        while True:
+            row = conn.execute("""
+                SELECT e.series_id, e.url, e.claims, s.list_url, s.download_path, s.priority,
+                       EXISTS (SELECT 1 FROM crawled_urls c WHERE c.url = e.url)
+                FROM episode_jobs e JOIN series_jobs s ON s.id = e.series_id
+                WHERE (e.state = 'pending' OR (e.state = 'in_progress' AND e.lease_expires < ?))
+                    AND e.not_before <= ?
+                ORDER BY s.priority DESC, e.series_id, e.position
+                LIMIT 1
+            """, (now, now)).fetchone()
+            if row is None:
+                conn.commit()
+                return None
+            series_id, url, claims, list_url, download_path, priority, crawled = row
+            if crawled:
+                conn.execute("""
+                    UPDATE episode_jobs SET state = 'done', lease_token = NULL, lease_expires = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE series_id = ? AND url = ?
+                """, (series_id, url))
+                continue
+            token = uuid.uuid4().hex
+            conn.execute("""
+                UPDATE episode_jobs SET state = 'in_progress', lease_owner = ?, lease_token = ?, lease_expires = ?,
+                    claims = claims + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE series_id = ? AND url = ?
+            """, (owner, token, now + lease_seconds, series_id, url))
+            conn.commit()
+            return {'series_id': series_id, 'url': url, 'token': token, 'claims': claims + 1,
+                    'id': series_id, 'list_url': list_url, 'download_path': download_path, 'priority': priority}
+
+def renew_episode_leases(tokens, lease_seconds):
+    """임대 중인 에피소드들의 만료 시각을 지금부터 lease_seconds초 뒤로 늘립니다. 늘린 개수를 반환합니다."""
+    tokens = list(tokens)
+    if not tokens:
+        return 0
+    renewed = 0
+    with get_db_connection() as conn:
+        expires = time.time() + lease_seconds
+        for start in range(0, len(tokens), IN_QUERY_CHUNK_SIZE):
+            chunk = tokens[start:start + IN_QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(f"""
+                UPDATE episode_jobs SET lease_expires = ?
+                WHERE state = 'in_progress' AND lease_token IN ({placeholders})
+            """, [expires, *chunk])
+            renewed += cursor.rowcount
+        conn.commit()
+    return renewed
+
+def complete_episode_job(token, url, state, page_title=None):
+    """
+    임대한 에피소드를 'done' 또는 'failed'로 끝냅니다. 임대가 아직 유효할 때만 기록하고 True를 반환하므로
+    같은 에피소드는 한 번만 완료됩니다. 'done'이면 같은 트랜잭션에서 crawled_urls에도 기록합니다.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            UPDATE episode_jobs SET state = ?, lease_token = NULL, lease_expires = NULL,
+                attempts = attempts + CASE WHEN ? = 'failed' THEN 1 ELSE 0 END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE lease_token = ? AND state = 'in_progress'
+        """, (state, state, token))
+        completed = cursor.rowcount == 1
+        if completed and state == 'done':
+            conn.execute("INSERT OR IGNORE INTO crawled_urls (url, page_title) VALUES (?, ?)", (url, page_title))
+        conn.commit()
+        return completed
+
+def retry_episode_job(token, max_attempts, base_backoff):
+    """
+    실패한 에피소드의 임대를 풀고 백오프 후 다시 임대할 수 있게 합니다. 임대 횟수가 max_attempts에 이르렀으면 'failed'로 끝냅니다.
+    바뀐 상태('pending' 또는 'failed')를 반환하며, 임대를 이미 잃었으면 None을 반환합니다.
+    """
+    with get_db_connection() as conn:
+        row = conn.execute("""
+            SELECT claims FROM episode_jobs WHERE lease_token = ? AND state = 'in_progress'
+        """, (token,)).fetchone()
+        if row is None:
+            return None
+        claims = row[0]
+        state = 'failed' if claims >= max_attempts else 'pending'
+        cursor = conn.execute("""
+            UPDATE episode_jobs SET state = ?, not_before = ?, attempts = attempts + 1,
+                lease_token = NULL, lease_expires = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE lease_token = ? AND state = 'in_progress'
+        """, (state, time.time() + base_backoff * (2 ** (claims - 1)), token))
+        conn.commit()
+        return state if cursor.rowcount == 1 else None
+
+def release_episode_job(token):
+    """중지 요청 등으로 처리하지 못한 에피소드의 임대를 시도 횟수에 넣지 않고 풉니다."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            UPDATE episode_jobs SET state = 'pending', claims = MAX(claims - 1, 0),
+                lease_owner = NULL, lease_token = NULL, lease_expires = NULL
+            WHERE lease_token = ? AND state = 'in_progress'
+        """, (token,))
+        conn.commit()
+
+def count_open_episode_jobs():
+    """아직 끝나지 않은('pending' 또는 'in_progress') 에피소드 작업 수를 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("SELECT COUNT(*) FROM episode_jobs WHERE state IN ('pending', 'in_progress')")
+        return cursor.fetchone()[0]
+
+def finish_completed_series_jobs():
+    """
+    'in_progress'인 만화 작업 중 남은 에피소드가 없는 작업을 'done'(실패한 에피소드가 있으면 'failed')으로 바꾸고
+    바꾼 작업의 (목록 URL, 실패한 에피소드 수) 목록을 반환합니다.
+    """
+    with get_db_connection() as conn:
+        rows = conn.execute("""
+            SELECT s.id, s.list_url, SUM(e.state = 'failed') FROM series_jobs s
+            JOIN episode_jobs e ON e.series_id = s.id
+            WHERE s.state = 'in_progress'
+            GROUP BY s.id
+            HAVING SUM(e.state IN ('pending', 'in_progress')) = 0
+        """).fetchall()
+        for series_id, _, failed in rows:
+            conn.execute("""
+                UPDATE series_jobs SET state = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND state = 'in_progress'
+            """, ('failed' if failed else 'done', f"에피소드 {failed}개 실패" if failed else None, series_id))
+        conn.commit()
+        return [(list_url, failed) for _, list_url, failed in rows]
+
+def get_known_episode_urls(series_id):
+    """만화 작업에 이미 등록된 에피소드 URL 집합을 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("SELECT url FROM episode_jobs WHERE series_id = ?", (series_id,))
+        return {row[0] for row in cursor}
+
+def get_series_index(list_url):
+    """목록 URL의 마지막 새로고침 정보(content_hash, last_seen_url, checked_at)를 반환합니다."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("""
+            SELECT content_hash, last_seen_url, checked_at FROM series_index WHERE list_url = ?
+        """, (list_url,))
+        row = cursor.fetchone()
+        return dict(zip(('content_hash', 'last_seen_url', 'checked_at'), row)) if row else None
+
+def update_series_index(list_url, content_hash, last_seen_url=None):
+    """목록 페이지 해시와 최신 에피소드 URL을 저장합니다. last_seen_url이 None이면 기존 값을 유지합니다."""
+    with get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO series_index (list_url, content_hash, last_seen_url) VALUES (?, ?, ?)
+            ON CONFLICT (list_url) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                last_seen_url = COALESCE(excluded.last_seen_url, last_seen_url),
+                checked_at = CURRENT_TIMESTAMP
+        """, (list_url, content_hash, last_seen_url))
+        conn.commit()
+
+
 def delete_crawled_urls_by_ids(ids):
-    """주어진 ID 목록에 해당하는 수집된 URL들을 삭제합니다."""
+    """
+    주어진 ID 목록에 해당하는 수집된 URL들을 삭제합니다.
+    삭제한 URL의 완료된 에피소드 작업은 'pending'으로 되돌려 다음 수집에서 다시 받도록 합니다.
+    """
+    ids = list(ids)
     if not ids:
         return 0
+    deleted = 0
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        placeholders = ','.join('?' for _ in ids)
-        query = f"DELETE FROM crawled_urls WHERE id IN ({placeholders})"
-        cursor.execute(query, ids)
+        for start in range(0, len(ids), IN_QUERY_CHUNK_SIZE):
+            chunk = ids[start:start + IN_QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"""
+                UPDATE episode_jobs SET state = 'pending', claims = 0, not_before = 0, updated_at = CURRENT_TIMESTAMP
+                WHERE state = 'done' AND url IN (SELECT url FROM crawled_urls WHERE id IN ({placeholders}))
+            """, chunk)
+            cursor.execute(f"DELETE FROM crawled_urls WHERE id IN ({placeholders})", chunk)
+            deleted += cursor.rowcount
         conn.commit()
-        print(f"{cursor.rowcount}개의 항목이 데이터베이스에서 삭제되었습니다.")
-        return cursor.rowcount
-
-# 애플리케이션 시작 시 테이블이 없는 경우 생성
-create_tables()
+        print(f"{deleted}개의 항목이 데이터베이스에서 삭제되었습니다.")
+        return deleted
@@ -1,7 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from database import get_db_connection, delete_crawled_urls_by_ids
+from database import (
+    count_crawled_urls, delete_crawled_urls_by_ids, get_crawled_url_ids, get_crawled_urls_page, init_db,
+)
+
+# 한 번에 불러오는 행 수. 스크롤이 끝에 가까워지면 다음 페이지를 불러옵니다.
+PAGE_SIZE = 200
+# 스크롤 위치가 이 비율을 넘으면 다음 페이지를 불러옵니다.
+LOAD_MORE_THRESHOLD = 0.9
 
 class DBViewer(tk.Toplevel):
     def __init__(self, master):
@@ -9,7 +16,14 @@ class DBViewer(tk.Toplevel):
         self.title("DB 확인")
         self.geometry("900x700")
 
-        self.check_vars = {}
+        # 선택된 행 ID. 아직 불러오지 않은 행도 선택될 수 있습니다. (전체 선택)
+        self.selected_ids = set()
+        self.search_term = ""
+        self.total_count = 0
+        self.loaded_count = 0
+        self.last_key = None
+        self.has_more = False
+        self._load_scheduled = False
         self._create_widgets()
         self.load_data()
 
@@ -37,6 +51,8 @@ class DBViewer(tk.Toplevel):
 
         delete_button = ttk.Button(action_frame, text="선택삭제", command=self.delete_selected)
         delete_button.pack(side='left')
+        self.status_label = ttk.Label(action_frame, text="")
+        self.status_label.pack(side='right')
 
         # --- Treeview Frame ---
         tree_frame = ttk.Frame(self)
@@ -57,41 +73,61 @@ class DBViewer(tk.Toplevel):
         self.tree.column("URL", width=400)
 
         # --- Scrollbar ---
-        scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side='right', fill='y')
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscroll=self.on_tree_scroll)
+        self.scrollbar.pack(side='right', fill='y')
         self.tree.pack(side='left', fill='both', expand=True)
 
         # --- Bindings ---
         self.tree.bind("<Button-1>", self.on_tree_click)
 
     def load_data(self, search_term=""):
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.check_vars.clear()
-
-        # Load new data
+        """목록을 비우고 검색 결과의 첫 페이지를 불러옵니다."""
+        self.tree.delete(*self.tree.get_children())
+        self.selected_ids.clear()
+        self.search_term = search_term
+        self.loaded_count = 0
+        self.last_key = None
+        self.has_more = True
         try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                query = "SELECT id, page_title, crawled_at, url FROM crawled_urls"
-                params = []
-                if search_term:
-                    query += " WHERE page_title LIKE ?"
-                    params.append(f"%{search_term}%")
-                query += " ORDER BY crawled_at DESC"
-
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                for row in rows:
-                    item_id = row[0]
-                    self.check_vars[item_id] = tk.BooleanVar(value=False)
-                    # Treeview에 데이터 삽입 (체크박스 상태는 텍스트로 표현)
-                    self.tree.insert("", "end", values=("☐",) + row, tags=(item_id,))
+            self.total_count = count_crawled_urls(search_term)
+        except sqlite3.Error as e:
+            messagebox.showerror("데이터베이스 오류", f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
+            return
+        self.load_next_page()
 
+    def load_next_page(self):
+        """다음 PAGE_SIZE개 행을 불러와 목록 끝에 추가합니다."""
+        self._load_scheduled = False
+        if not self.has_more:
+            return
+        try:
+            rows = get_crawled_urls_page(self.search_term, self.last_key, PAGE_SIZE)
         except sqlite3.Error as e:
+            self.has_more = False
             messagebox.showerror("데이터베이스 오류", f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
+            return
+        for row in rows:
+            item_id = row[0]
+            # Treeview에 데이터 삽입 (체크박스 상태는 텍스트로 표현)
+            mark = "☑" if item_id in self.selected_ids else "☐"
+            self.tree.insert("", "end", iid=str(item_id), values=(mark,) + tuple(row))
+        self.loaded_count += len(rows)
+        self.has_more = len(rows) == PAGE_SIZE
+        if rows:
+            self.last_key = (rows[-1][2], rows[-1][0])
+        self.update_status()
+
+    def on_tree_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.has_more and not self._load_scheduled and float(last) >= LOAD_MORE_THRESHOLD:
+            # 스크롤 콜백 안에서 항목을 추가하지 않도록 다음 유휴 시점에 불러옵니다.
+            self._load_scheduled = True
+            self.after_idle(self.load_next_page)
+
+    def update_status(self):
+        self.status_label.config(
+            text=f"{self.loaded_count}/{self.total_count}건 표시, {len(self.selected_ids)}건 선택")
 
     def on_tree_click(self, event):
         region = self.tree.identify_region(event.x, event.y)
@@ -110,10 +146,14 @@ class DBViewer(tk.Toplevel):
 
         col = self.tree.identify_column(event.x)
         if col == "#1": # "Select" column
-            item_id = self.tree.item(item_iid, "tags")[0]
-            var = self.check_vars[int(item_id)]
-            var.set(not var.get())
-            self.update_checkbox_display(item_iid, var.get())
+            item_id = int(item_iid)
+            is_checked = item_id not in self.selected_ids
+            if is_checked:
+                self.selected_ids.add(item_id)
+            else:
+                self.selected_ids.discard(item_id)
+            self.update_checkbox_display(item_iid, is_checked)
+            self.update_status()
 
     def update_checkbox_display(self, item_iid, is_checked):
         current_values = self.tree.item(item_iid, 'values')
@@ -122,15 +162,20 @@ class DBViewer(tk.Toplevel):
         self.tree.item(item_iid, values=tuple(new_values))
 
     def toggle_all_checkboxes(self):
-        # Determine the new state (if any are unchecked, check all)
-        any_unchecked = any(not var.get() for var in self.check_vars.values())
-        new_state = any_unchecked
-
-        for item_id, var in self.check_vars.items():
-            var.set(new_state)
+        # 하나라도 선택되지 않았으면 검색 결과 전체(아직 불러오지 않은 행 포함)를 선택합니다.
+        new_state = len(self.selected_ids) < self.total_count
+        if new_state:
+            try:
+                self.selected_ids = get_crawled_url_ids(self.search_term)
+            except sqlite3.Error as e:
+                messagebox.showerror("데이터베이스 오류", f"데이터를 불러오는 중 오류가 발생했습니다: {e}")
+                return
+        else:
+            self.selected_ids.clear()
 
         for item_iid in self.tree.get_children():
             self.update_checkbox_display(item_iid, new_state)
+        self.update_status()
 
     def search_data(self, event=None):
         search_term = self.search_entry.get()
@@ -141,7 +186,7 @@ class DBViewer(tk.Toplevel):
         self.load_data()
 
     def delete_selected(self):
-        selected_ids = [item_id for item_id, var in self.check_vars.items() if var.get()]
+        selected_ids = sorted(self.selected_ids)
 
         if not selected_ids:
             messagebox.showinfo("알림", "삭제할 항목을 선택하세요.")
@@ -151,11 +196,12 @@ class DBViewer(tk.Toplevel):
             try:
                 deleted_count = delete_crawled_urls_by_ids(selected_ids)
                 messagebox.showinfo("성공", f"{deleted_count}개의 항목을 삭제했습니다.")
-                self.load_data(self.search_entry.get()) # Refresh the list
+                self.load_data(self.search_term) # Refresh the list
             except sqlite3.Error as e:
                 messagebox.showerror("데이터베이스 오류", f"삭제 중 오류가 발생했습니다: {e}")
 
 if __name__ == '__main__':
+    init_db()
     root = tk.Tk()
     root.withdraw()  # 메인 창 숨기기
     app = DBViewer(root)
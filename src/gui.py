@@ -1,18 +1,47 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
+import logging
 import os
 import queue
+from logging.handlers import RotatingFileHandler
 from db_viewer.db_viewer import DBViewer
 
+QUEUE_POLL_MS = 100
+# 한 번의 확인에서 큐에서 꺼내는 최대 이벤트 수 (남은 이벤트는 바로 다음 확인에서 처리)
+MAX_EVENTS_PER_TICK = 2000
+# 한 번의 확인에서 로그 창에 그리는 최대 줄 수 (나머지는 로그 파일에만 기록)
+MAX_LOG_LINES_PER_TICK = 200
+# 로그 창에 남겨 두는 최근 줄 수
+LOG_VIEW_MAX_LINES = 2000
+
+LOG_FILE = 'crawler.log'
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+
+
+def create_file_logger(path=LOG_FILE):
+    """전체 로그를 기록할 회전 로그 파일 logger를 반환합니다."""
+    logger = logging.getLogger('manatoki.crawler')
+    if not logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUP_COUNT,
+                                      encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
 class CrawlerApp(tk.Toplevel):
-    def __init__(self, master, start_callback, stop_callback, on_close_callback):
+    def __init__(self, master, start_callback, stop_callback, on_close_callback, enqueue_callback=None):
         super().__init__(master)
         self.title("마나토끼 수집기")
         self.geometry("700x500")
 
         self.start_callback = start_callback
         self.stop_callback = stop_callback
+        self.enqueue_callback = enqueue_callback
         self.gui_queue = queue.Queue()
+        self.file_logger = create_file_logger()
 
         self._create_widgets()
         self.protocol("WM_DELETE_WINDOW", on_close_callback)
@@ -69,7 +98,7 @@ class CrawlerApp(tk.Toplevel):
         num_threads_label.pack(side='left', padx=(0, 5))
         self.num_threads_entry = ttk.Entry(control_frame, width=5)
         self.num_threads_entry.pack(side='left')
-        self.num_threads_entry.insert(0, "3")
+        self.num_threads_entry.insert(0, "자동")
 
         # --- Button Frame ---
         button_frame = ttk.Frame(self)
@@ -79,6 +108,9 @@ class CrawlerApp(tk.Toplevel):
         self.start_button.pack(side='left', padx=5)
         self.stop_button = ttk.Button(button_frame, text="중지", command=self.stop_callback, state=tk.DISABLED)
         self.stop_button.pack(side='left', padx=(0, 5))
+        self.enqueue_button = ttk.Button(button_frame, text="대기열에 추가", command=self.enqueue_callback,
+                                         state=tk.NORMAL if self.enqueue_callback else tk.DISABLED)
+        self.enqueue_button.pack(side='left', padx=(0, 5))
 
         # --- Log Frame ---
         log_frame = ttk.Frame(self)
@@ -91,9 +123,27 @@ class CrawlerApp(tk.Toplevel):
         self.progress_bar.pack(pady=10, padx=10, fill='x', expand=False)
 
     def log(self, message):
-        self.log_text.insert(tk.END, message + "\n")
+        self.write_log_lines([message])
+
+    def write_log_lines(self, lines):
+        """
+        로그 줄들을 파일에 모두 기록하고, 로그 창에는 최근 MAX_LOG_LINES_PER_TICK줄만 한 번에 추가합니다.
+        로그 창은 최근 LOG_VIEW_MAX_LINES줄만 유지합니다.
+        """
+        if not lines:
+            return
+        for line in lines:
+            self.file_logger.info(line)
+
+        skipped = len(lines) - MAX_LOG_LINES_PER_TICK
+        if skipped > 0:
+            lines = [f"... {skipped}줄 생략 (전체 로그: {LOG_FILE})"] + lines[-MAX_LOG_LINES_PER_TICK:]
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+
+        line_count = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        if line_count > LOG_VIEW_MAX_LINES:
+            self.log_text.delete('1.0', f'{line_count - LOG_VIEW_MAX_LINES + 1}.0')
         self.log_text.see(tk.END)
-        self.update_idletasks()
 
     def browse_directory(self):
         path = filedialog.askdirectory()
@@ -127,7 +177,6 @@ class CrawlerApp(tk.Toplevel):
 
     def update_progress(self, value):
         self.progress_bar['value'] = value
-        self.update_idletasks()
 
     def set_ui_state(self, state):
         """UI 컨트롤의 상태를 변경합니다 (예: 버튼 활성화/비활성화)"""
@@ -137,6 +186,7 @@ class CrawlerApp(tk.Toplevel):
             self.url_entry.config(state=tk.DISABLED)
             self.num_threads_entry.config(state=tk.DISABLED)
             self.start_button.config(state=tk.DISABLED)
+            self.enqueue_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
 
         elif state == 'stop':
@@ -145,22 +195,39 @@ class CrawlerApp(tk.Toplevel):
             self.url_entry.config(state=tk.NORMAL)
             self.num_threads_entry.config(state=tk.NORMAL)
             self.start_button.config(state=tk.NORMAL)
+            if self.enqueue_callback:
+                self.enqueue_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
 
     def process_queue(self):
-        """GUI 큐를 주기적으로 확인하고 모든 메시지를 처리합니다."""
+        """
+        GUI 큐를 주기적으로 확인하고 메시지를 처리합니다.
+        로그는 모아서 한 번에 그리고, 진행률은 마지막 값만 반영합니다.
+        """
+        pending_lines = []
+        progress = None
+        backlog = False
         try:
-            while not self.gui_queue.empty():
+            for _ in range(MAX_EVENTS_PER_TICK):
                 msg_type, data = self.gui_queue.get_nowait()
                 if msg_type == 'log':
-                    self.log(data)
+                    pending_lines.append(data)
                 elif msg_type == 'progress':
-                    self.update_progress(data)
-                elif msg_type == 'complete':
-                    self.set_ui_state('stop')
-                elif msg_type == 'show_info':
-                    messagebox.showinfo("알림", data)
+                    progress = data
+                elif msg_type in ('complete', 'show_info'):
+                    # 알림 창보다 앞선 로그가 먼저 보이도록 모아 둔 로그를 그립니다.
+                    self.write_log_lines(pending_lines)
+                    pending_lines = []
+                    if msg_type == 'complete':
+                        self.set_ui_state('stop')
+                    else:
+                        messagebox.showinfo("알림", data)
+            backlog = True
         except queue.Empty:
             pass
         finally:
-            self.after(100, self.process_queue)
+            self.write_log_lines(pending_lines)
+            if progress is not None:
+                self.update_progress(progress)
+            # 처리하지 못한 이벤트가 남아 있으면 화면을 갱신할 틈만 두고 바로 이어서 처리합니다.
+            self.after(10 if backlog else QUEUE_POLL_MS, self.process_queue)
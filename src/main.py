@@ -1,8 +1,9 @@
+import multiprocessing
 import threading
 import tkinter as tk
 from tkinter import messagebox
 
-from crawler.crawler import master_crawl_thread
+import database as DB
 from gui import CrawlerApp
 
 
@@ -11,28 +12,48 @@ class MainApplication:
         self.root = root
         self.master_thread = None
         self.stop_event = threading.Event()
-        self.app = CrawlerApp(self.root, self.start_crawling, self.stop_crawling, self.on_closing)
+        # 수집 실행 사이에도 브라우저를 유지하여 다시 시작할 때 바로 사용할 수 있도록 합니다.
+        # 창이 빨리 뜨도록 수집 모듈과 함께 첫 수집 때 만듭니다.
+        self.browser_pool = None
+        self.app = CrawlerApp(self.root, self.start_crawling, self.stop_crawling, self.on_closing,
+                              self.enqueue_series)
 
-    def start_crawling(self):
+    def enqueue_series(self):
+        """입력한 URL을 바로 수집하지 않고 작업 대기열에 추가합니다."""
         params = self.app.get_params()
         if not params['target_url']:
             messagebox.showerror("오류", "URL을 입력하세요.")
             return
+        DB.add_series_job(params['target_url'], params['download_path'])
+        self.app.log(f"대기열에 추가했습니다: {params['target_url']} (대기 중 {DB.count_pending_series_jobs()}개)")
 
-        try:
-            num_threads = int(params['num_threads'])
-            if not 1 <= num_threads <= 4:
-                raise ValueError()
-        except (ValueError, TypeError):
-            messagebox.showerror("오류", "스레드 개수는 1에서 4 사이의 숫자여야 합니다.")
+    def start_crawling(self):
+        params = self.app.get_params()
+        if not params['target_url'] and not DB.count_pending_series_jobs():
+            messagebox.showerror("오류", "URL을 입력하세요.")
+            return
+
+        # '자동'(또는 빈 값)이면 기본 개수로 시작하고, 수집 중 워커 수는 항상 자동으로 조절됩니다.
+        num_threads = str(params['num_threads']).strip()
+        if num_threads.lower() not in ('', 'auto', '자동') and not (num_threads.isdigit() and int(num_threads) >= 1):
+            messagebox.showerror("오류", "스레드 개수는 1 이상의 숫자이거나 '자동'이어야 합니다.")
             return
 
         self.app.set_ui_state('start')
         self.app.log("=" * 90)
 
+        # 수집에 필요한 무거운 모듈(selenium, requests 등)은 처음 수집할 때 가져옵니다.
+        from crawler.browser_pool import BrowserPool
+        from crawler.crawler import master_crawl_thread
+
         self.stop_event.clear()
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool()
+        # 기본 HTTP 우선 경로는 보통 브라우저가 필요 없으므로, 브라우저는 처음 필요할 때(checkout) 띄웁니다.
+        if params.get('page_fetcher') == 'browser':
+            self.browser_pool.warm_up(1)
 
-        args = (params, self.app.gui_queue, self.stop_event)
+        args = (params, self.app.gui_queue, self.stop_event, self.browser_pool)
         self.master_thread = threading.Thread(target=master_crawl_thread, args=args)
         self.master_thread.daemon = True
         self.master_thread.start()
@@ -52,6 +73,9 @@ class MainApplication:
                 self.app.log("백그라운드 작업이 끝날 때까지 기다리는 중...")
                 self.master_thread.join()
 
+            if self.browser_pool:
+                self.browser_pool.close()
+            DB.close_all_connections()
             self.root.destroy()
 
     def run(self):
@@ -59,6 +83,9 @@ class MainApplication:
 
 
 if __name__ == "__main__":
+    # PyInstaller로 묶은 실행 파일에서 후처리 프로세스 풀을 쓰기 위해 필요합니다.
+    multiprocessing.freeze_support()
+    DB.init_db()
     root = tk.Tk()
     root.withdraw()
     app = MainApplication(root)
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 앱과 같이 src 폴더 기준으로 모듈을 가져옵니다. (import database, from crawler.x import ...)
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def fixture_html():
+    return read_fixture
@@ -0,0 +1,111 @@
+"""
+cli.py 테스트: 모의 사이트(benchmarks/mock_site.py)를 수집하며 종료 코드, JSON Lines 이벤트 출력,
+데몬 모드에서 끝난 만화 작업을 다시 확인하는지 검사합니다. 브라우저는 띄우지 않습니다.
+"""
+import json
+import os
+import signal
+import threading
+
+import pytest
+
+import cli
+import database as DB
+from mock_site import MockSite, MockSiteConfig
+
+
+@pytest.fixture(autouse=True)
+def no_browser(monkeypatch):
+    import crawler.browser_pool
+
+    def create_driver(headless=False):
+        raise RuntimeError("테스트에서는 브라우저를 사용하지 않습니다.")
+
+    monkeypatch.setattr(crawler.browser_pool, 'create_driver', create_driver)
+
+
+@pytest.fixture(autouse=True)
+def restore_signal_handlers():
+    # cli.main()이 SIGINT/SIGTERM 처리기를 바꾸므로 테스트가 끝나면 되돌립니다.
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+
+
+@pytest.fixture
+def site():
+    with MockSite(MockSiteConfig(episodes=2, images=2, image_size=1024, filler_blocks=0)) as site:
+        yield site
+
+
+def run_cli(tmp_path, *args):
+    events_path = tmp_path / 'events.jsonl'
+    exit_code = cli.main([*args, '--db', str(tmp_path / 'cli.db'), '-d', str(tmp_path / 'download'),
+                          '--no-http-cache', '--events', 'jsonl', '--output', str(events_path)])
+    with open(events_path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f]
+    return exit_code, events
+
+
+def summaries(events):
+    return [event['data'] for event in events if event['type'] == 'summary']
+
+
+@pytest.mark.parametrize('argv', [['-t', '0'], ['--work-mode', 'lease', 'https://example.com/comic/1']])
+def test_usage_error(tmp_path, argv):
+    assert cli.main(argv + ['--db', str(tmp_path / 'cli.db')]) == cli.EXIT_USAGE
+
+
+def test_success_writes_json_lines(tmp_path, site):
+    exit_code, events = run_cli(tmp_path, site.list_urls()[0])
+
+    assert exit_code == cli.EXIT_OK
+    assert all({'ts', 'type', 'data'} <= event.keys() for event in events)
+    assert summaries(events) == [{"total": 2, "success": 2, "failed": 0, "failed_series": 0, "stopped": False}]
+    assert events[-1] == {**events[-1], 'type': 'complete', 'data': True}
+
+
+def test_unreadable_list_is_a_failure(tmp_path):
+    # 닫힌 포트: HTTP로 받지 못하고 브라우저도 띄울 수 없으므로 목록을 읽지 못합니다.
+    exit_code, events = run_cli(tmp_path, 'http://127.0.0.1:9/comic/1')
+
+    assert exit_code == cli.EXIT_FAILURES
+    assert summaries(events)[0]['failed_series'] == 1
+
+
+def test_daemon_rechecks_finished_series(tmp_path, site, monkeypatch):
+    DB.init_db(str(tmp_path / 'cli.db'))
+    DB.add_series_job(site.list_urls()[0], str(tmp_path / 'download'))
+    DB.close_all_connections()
+
+    run_once = cli.run_once
+    passes = []
+
+    def counting_run_once(*args):
+        exit_code = run_once(*args)
+        passes.append(exit_code)
+        if len(passes) == 2:
+            os.kill(os.getpid(), signal.SIGTERM)
+        return exit_code
+
+    monkeypatch.setattr(cli, 'run_once', counting_run_once)
+    # URL 없이 실행해도 첫 번째에 끝난 만화를 두 번째에 다시 확인합니다.
+    exit_code, events = run_cli(tmp_path, '--daemon', '--interval', '0')
+
+    assert passes == [cli.EXIT_OK, cli.EXIT_OK]
+    assert exit_code == cli.EXIT_OK
+    assert [event['data'] for event in events if event['type'] == 'log'].count("대기열의 만화 1개를 수집합니다.") == 2
+    assert [summary['total'] for summary in summaries(events)] == [2, 0]
+
+
+def test_stop_signal_while_waiting(tmp_path, site):
+    timer = threading.Timer(1.0, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    try:
+        exit_code, events = run_cli(tmp_path, site.list_urls()[0], '--daemon', '--interval', '60')
+    finally:
+        timer.cancel()
+
+    assert exit_code == cli.EXIT_STOPPED
+    assert summaries(events)[0]['success'] == 2
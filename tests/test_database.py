@@ -0,0 +1,52 @@
+"""database.py의 스레드별 연결 관리 테스트: close_all_connections()가 실행 중인 스레드의 연결을 닫지 않는지 확인합니다."""
+import sqlite3
+import threading
+
+import pytest
+
+import database as DB
+
+
+@pytest.fixture
+def db(tmp_path):
+    DB.init_db(str(tmp_path / 'connections.db'))
+    yield DB
+    DB.close_all_connections()
+
+
+def test_close_all_keeps_running_threads_connections(db):
+    opened = threading.Event()
+    closed = threading.Event()
+    results = []
+
+    def worker():
+        conn = db.get_thread_connection()
+        opened.set()
+        closed.wait(5)
+        # 다른 스레드가 close_all_connections()를 호출한 뒤에도 쓰던 연결을 계속 쓸 수 있습니다.
+        results.append(conn.execute("SELECT COUNT(*) FROM crawled_urls").fetchone()[0])
+        db.close_thread_connection()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    opened.wait(5)
+    main_conn = db.get_thread_connection()
+    db.close_all_connections()
+    closed.set()
+    thread.join()
+
+    assert results == [0]
+    with pytest.raises(sqlite3.ProgrammingError):
+        main_conn.execute("SELECT 1")
+
+
+def test_close_all_closes_finished_threads_connections(db):
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(db.get_thread_connection()))
+    thread.start()
+    thread.join()
+
+    db.close_all_connections()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        connections[0].execute("SELECT 1")
@@ -0,0 +1,90 @@
+"""
+이미지 다운로더의 .part 이어받기 테스트 (스레드/async 엔진).
+
+모의 사이트(benchmarks/mock_site.py)는 'Range: bytes=N-'에 206, 범위를 벗어나면 416으로 응답합니다.
+"""
+import os
+import threading
+
+import pytest
+
+import database as DB
+from crawler.downloader import PART_SUFFIX, ImageDownloader
+from mock_site import MockSite, MockSiteConfig
+
+PAGE_URL = "https://example.com/comic/1/1"
+
+
+@pytest.fixture
+def site():
+    with MockSite(MockSiteConfig(episodes=1, images=1, image_size=50 * 1024)) as site:
+        yield site
+
+
+@pytest.fixture
+def db(tmp_path):
+    DB.init_db(str(tmp_path / 'download.db'))
+    yield DB
+    DB.close_all_connections()
+
+
+@pytest.fixture(params=['thread', 'async'])
+def downloader(request, db):
+    if request.param == 'thread':
+        downloader = ImageDownloader(requests_per_second=0, dedup=False)
+    else:
+        pytest.importorskip('aiohttp')
+        from crawler.async_downloader import AsyncImageDownloader
+        downloader = AsyncImageDownloader(requests_per_second=0, dedup=False)
+    yield downloader
+    downloader.close()
+
+
+def leave_part_file(db, site, download_dir, file_name, content):
+    """이전 실행이 file_name을 받다가 멈춘 상태(.part 파일과 manifest 기록)를 만듭니다."""
+    images = [(1, f"{site.base_url}/data/1/1/1.jpg")]
+    db.register_episode_images(PAGE_URL, str(download_dir), images)
+    file_path = os.path.join(str(download_dir), file_name)
+    db.update_image_manifest(PAGE_URL, 1, 'downloading', file_path=file_path)
+    with open(file_path + PART_SUFFIX, 'wb') as f:
+        f.write(content)
+    return images, file_path
+
+
+def download(downloader, images, download_dir):
+    return downloader.download_episode(images, str(download_dir), "https://example.com/", threading.Event(),
+                                       page_url=PAGE_URL)
+
+
+def test_resume_partial_part_file(downloader, db, site, tmp_path):
+    body = site.image_bytes(1, 1, 1)
+    images, file_path = leave_part_file(db, site, tmp_path, '001.jpg', body[:1000])
+
+    assert download(downloader, images, tmp_path) == []
+    with open(file_path, 'rb') as f:
+        assert f.read() == body
+    assert not os.path.exists(file_path + PART_SUFFIX)
+
+
+def test_complete_part_file_restarts_after_416(downloader, db, site, tmp_path):
+    # fsync 후 os.replace 전에 멈추면 .part가 이미 끝까지 받은 상태로 남고, 이어받기 요청은 416을 받습니다.
+    body = site.image_bytes(1, 1, 1)
+    images, file_path = leave_part_file(db, site, tmp_path, '001.jpg', body)
+
+    assert download(downloader, images, tmp_path) == []
+    with open(file_path, 'rb') as f:
+        assert f.read() == body
+    assert not os.path.exists(file_path + PART_SUFFIX)
+    assert db.get_image_manifest(PAGE_URL)[1]['status'] == 'complete'
+
+
+def test_stale_part_with_other_extension_is_removed(downloader, db, site, tmp_path):
+    body = site.image_bytes(1, 1, 1)
+    images, stale_path = leave_part_file(db, site, tmp_path, '001.png', body)
+
+    assert download(downloader, images, tmp_path) == []
+    entry = db.get_image_manifest(PAGE_URL)[1]
+    assert entry['file_path'] != stale_path
+    with open(entry['file_path'], 'rb') as f:
+        assert f.read() == body
+    assert not os.path.exists(stale_path + PART_SUFFIX)
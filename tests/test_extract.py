@@ -0,0 +1,119 @@
+"""
+crawler/extract.py 파서 백엔드 테스트.
+
+저장해 둔 목록/에피소드 HTML을 모든 백엔드(selectolax, lxml, bs4)로 파싱하여 같은 결과가 나오는지 확인합니다.
+설치되지 않은 백엔드는 건너뜁니다.
+"""
+import pytest
+
+from crawler.extract import (
+    BACKEND_PREFERENCE, BACKENDS, SoupBackend, iter_list_page, list_content_hash, parse_episode_page,
+    parse_list_page,
+)
+
+LIST_URLS = [
+    "https://manatoki.example/comic/3003",
+    "https://manatoki.example/comic/3002",
+    "https://manatoki.example/comic/3001",
+]
+
+
+def _create(name):
+    try:
+        return BACKENDS[name]()
+    except ImportError:
+        pytest.skip(f"{name} 백엔드가 설치되어 있지 않습니다.")
+
+
+@pytest.fixture(params=BACKEND_PREFERENCE)
+def backend(request):
+    return _create(request.param)
+
+
+@pytest.fixture
+def backends():
+    """설치된 모든 백엔드. bs4는 lxml 유무와 상관없이 html.parser로도 확인합니다."""
+    created = []
+    for name in BACKEND_PREFERENCE:
+        try:
+            created.append(BACKENDS[name]())
+        except ImportError:
+            continue
+    created.append(SoupBackend(features='html.parser'))
+    return created
+
+
+def test_parse_episode(backend, fixture_html):
+    episode = parse_episode_page(fixture_html('episode.html'), backend)
+    assert episode.title == "테스트 만화 12화"
+    assert episode.has_section
+    assert episode.image_count == 6
+    assert episode.images == [
+        (2, "https://img.example/data/12/001.jpg"),
+        (3, "https://img.example/data/12/002.jpg"),
+        (4, "https://img.example/data/12/003.webp"),
+        (6, "https://img.example/data/12/004.JPG"),
+    ]
+
+
+def test_parse_episode_view_title(backend, fixture_html):
+    episode = parse_episode_page(fixture_html('episode_view_title.html'), backend)
+    assert episode.title == "제목 상자 3화"
+    assert episode.images == [(1, "https://img.example/data/3/001.png")]
+
+
+def test_parse_episode_without_section(backend, fixture_html):
+    episode = parse_episode_page(fixture_html('episode_no_section.html'), backend)
+    assert not episode.has_section
+    assert episode.images == []
+    assert episode.image_count == 0
+
+
+def test_iter_list_page(backend, fixture_html):
+    assert list(iter_list_page(fixture_html('list.html'), backend)) == LIST_URLS
+    assert parse_list_page(fixture_html('list.html'), backend) == LIST_URLS
+
+
+def test_iter_list_page_can_stop_early(backend, fixture_html):
+    links = iter_list_page(fixture_html('list.html'), backend)
+    assert next(links) == LIST_URLS[0]
+
+
+def test_list_page_without_serial_list(backend, fixture_html):
+    assert parse_list_page(fixture_html('list_no_serial.html'), backend) == []
+    assert parse_list_page(fixture_html('episode_no_section.html'), backend) is None
+
+
+@pytest.mark.parametrize('name', [
+    'episode.html', 'episode_view_title.html', 'episode_no_section.html', 'list.html', 'list_no_serial.html',
+    'list_style.html',
+])
+def test_backends_agree(backends, fixture_html, name):
+    html = fixture_html(name)
+    first, *others = backends
+    for backend in others:
+        assert parse_episode_page(html, backend) == parse_episode_page(html, first), backend.name
+        assert parse_list_page(html, backend) == parse_list_page(html, first), backend.name
+
+
+@pytest.mark.parametrize('name', ['list.html', 'list_style.html'])
+def test_list_content_hash_ignores_surrounding_markup(fixture_html, name):
+    html = fixture_html(name)
+    changed_ad = html.replace("광고 A", "광고 B").replace("게시판", "자유게시판")
+    assert list_content_hash(changed_ad) == list_content_hash(html)
+
+
+def test_list_content_hash_skips_style_text(fixture_html):
+    # <style> 안의 'serial-list'가 아니라 목록 요소만 해시하므로 스타일이 있어도 같은 값입니다.
+    assert list_content_hash(fixture_html('list_style.html')) == list_content_hash(fixture_html('list.html'))
+
+
+def test_list_content_hash_changes_with_episodes(fixture_html):
+    html = fixture_html('list.html')
+    new_episode = html.replace(
+        '<ul class="list-body">',
+        '<ul class="list-body"><li><div class="wr-subject">'
+        '<a href="https://manatoki.example/comic/3004">테스트 만화 4화</a></div></li>')
+    assert list_content_hash(new_episode) != list_content_hash(html)
+    # 목록을 읽는 백엔드와 상관없이 해시는 HTML만으로 정해집니다.
+    assert parse_list_page(new_episode, SoupBackend(features='html.parser'))[0].endswith('/3004')
@@ -0,0 +1,146 @@
+"""
+crawler/fetcher.py의 HTTP 우선 경로 테스트.
+
+저장해 둔 HTML을 로컬 HTTP 서버로 제공하고, HTTP로 쓸 수 있는 페이지는 브라우저 없이 받는지,
+지연 로딩/캡챠/스로틀링 응답일 때 브라우저 페처로 넘어가는지 확인합니다.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler.fetcher import FallbackPageFetcher, HttpPageFetcher, has_article_body, has_article_images
+
+
+class FixtureServer:
+    """경로별 (상태 코드, 헤더, 본문)을 응답하는 로컬 HTTP 서버. 받은 요청 경로를 기록합니다."""
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                status, headers, body = server.routes.get(self.path, (404, {}, ''))
+                body = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        daemon=True)
+        self._thread.start()
+
+    def url(self, path):
+        return self.base_url + path
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeBrowserFetcher:
+    """브라우저 페처 대신 미리 정한 HTML을 돌려주고 호출된 URL을 기록합니다."""
+    name = 'browser'
+    last_wait_seconds = 1.5
+    driver = None
+
+    def __init__(self, html):
+        self.html = html
+        self.calls = []
+
+    def fetch(self, url, stop_event, referer=None):
+        self.calls.append(url)
+        return self.html
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FixtureServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def stop_event():
+    return threading.Event()
+
+
+def make_fetcher(browser_html, is_usable=has_article_images):
+    http = HttpPageFetcher(timeout=5)
+    browser = FakeBrowserFetcher(browser_html)
+    return FallbackPageFetcher(http, browser, is_usable), browser
+
+
+def test_usable_page_uses_http_only(server, stop_event, fixture_html):
+    server.routes['/comic/12'] = (200, {}, fixture_html('episode.html'))
+    fetcher, browser = make_fetcher("<html>browser</html>")
+
+    html = fetcher.fetch(server.url('/comic/12'), stop_event)
+
+    assert html == fixture_html('episode.html')
+    assert fetcher.last_fetcher == 'http'
+    assert fetcher.last_wait_seconds == 0.0
+    assert browser.calls == []
+
+
+def test_lazy_src_page_falls_back_to_browser(server, stop_event, fixture_html):
+    server.routes['/comic/12'] = (200, {}, fixture_html('episode_lazy.html'))
+    fetcher, browser = make_fetcher(fixture_html('episode.html'))
+
+    html = fetcher.fetch(server.url('/comic/12'), stop_event)
+
+    assert not has_article_images(fixture_html('episode_lazy.html'))
+    assert html == fixture_html('episode.html')
+    assert fetcher.last_fetcher == 'browser'
+    assert fetcher.last_wait_seconds == FakeBrowserFetcher.last_wait_seconds
+    assert browser.calls == [server.url('/comic/12')]
+
+
+def test_captcha_redirect_returns_none_then_falls_back(server, stop_event, fixture_html):
+    server.routes['/comic/12'] = (302, {'Location': '/bbs/captcha.php?url=/comic/12'}, '')
+    server.routes['/bbs/captcha.php?url=/comic/12'] = (200, {}, fixture_html('episode_no_section.html'))
+    http = HttpPageFetcher(timeout=5)
+    assert http.fetch(server.url('/comic/12'), stop_event) is None
+
+    fetcher, browser = make_fetcher(fixture_html('episode.html'))
+    html = fetcher.fetch(server.url('/comic/12'), stop_event)
+
+    assert html == fixture_html('episode.html')
+    assert fetcher.last_fetcher == 'browser'
+    assert browser.calls == [server.url('/comic/12')]
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_throttled_response_sets_last_status(server, stop_event, fixture_html, status):
+    server.routes['/comic/list'] = (status, {'Retry-After': '1'}, 'slow down')
+    fetcher, browser = make_fetcher(fixture_html('list.html'), is_usable=has_article_body)
+
+    html = fetcher.fetch(server.url('/comic/list'), stop_event)
+
+    assert fetcher.last_status == status
+    assert html == fixture_html('list.html')
+    assert fetcher.last_fetcher == 'browser'
+
+
+def test_stop_event_skips_fetch(server, stop_event, fixture_html):
+    server.routes['/comic/12'] = (200, {}, fixture_html('episode.html'))
+    fetcher, browser = make_fetcher(fixture_html('episode.html'))
+    stop_event.set()
+
+    assert fetcher.fetch(server.url('/comic/12'), stop_event) is None
+    assert server.requests == []
+    assert browser.calls == []
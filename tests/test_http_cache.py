@@ -0,0 +1,116 @@
+"""
+crawler/http_cache.py 테스트: 모의 사이트(benchmarks/mock_site.py)의 ETag/304 응답으로 조건부 요청,
+max_age 안의 재사용, LRU 제거, offline 모드에서 네트워크를 쓰지 않는지 확인합니다.
+"""
+import os
+import threading
+
+import pytest
+
+import database as DB
+from crawler.fetcher import FallbackPageFetcher, HttpPageFetcher, has_article_images
+from crawler.http_cache import EVICT_TARGET_RATIO, CacheMissError, HttpCache
+from mock_site import MockSite, MockSiteConfig
+
+
+class FakeBrowserFetcher:
+    """브라우저 페처 대신 호출된 URL만 기록합니다."""
+    name = 'browser'
+    last_wait_seconds = 0.0
+    driver = None
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, url, stop_event, referer=None):
+        self.calls.append(url)
+        return None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    DB.init_db(str(tmp_path / 'cache.db'))
+    yield DB
+    DB.close_all_connections()
+
+
+@pytest.fixture
+def site():
+    with MockSite(MockSiteConfig(episodes=2, images=2, image_size=1024, filler_blocks=0)) as site:
+        yield site
+
+
+@pytest.fixture
+def stop_event():
+    return threading.Event()
+
+
+def make_cache(tmp_path, mode='revalidate', max_bytes=1024 * 1024):
+    return HttpCache(str(tmp_path / 'http_cache'), max_bytes=max_bytes, mode=mode)
+
+
+def test_etag_revalidation_uses_304(db, tmp_path, site, stop_event):
+    fetcher = HttpPageFetcher(cache=make_cache(tmp_path))
+    url = site.list_urls()[0]
+
+    first = fetcher.fetch(url, stop_event)
+    second = fetcher.fetch(url, stop_event)
+
+    assert second == first
+    assert site.page_requests == 2
+    assert site.not_modified == 1
+    assert fetcher.cache_counts == {'hit': 0, 'revalidated': 1, 'fetched': 1}
+
+
+def test_fresh_entry_skips_request(db, tmp_path, site, stop_event):
+    fetcher = HttpPageFetcher(cache=make_cache(tmp_path))
+    url = f"{site.list_urls()[0]}/1"
+
+    first = fetcher.fetch(url, stop_event, max_age=3600)
+    assert fetcher.fetch(url, stop_event, max_age=3600) == first
+    assert site.page_requests == 1
+    # max_age가 지난 항목은 서버에 다시 확인합니다.
+    assert fetcher.fetch(url, stop_event, max_age=0) == first
+    assert site.page_requests == 2
+    assert fetcher.cache_counts == {'hit': 1, 'revalidated': 1, 'fetched': 1}
+
+
+def test_lru_eviction(db, tmp_path):
+    cache = make_cache(tmp_path, max_bytes=1024 * 1024)
+    pages = {name: os.urandom(4096).hex() for name in ('a', 'b', 'c', 'd')}
+    for name in ('a', 'b', 'c'):
+        cache.store(name, pages[name])
+    cache.touch('a')
+    cache.max_bytes = DB.get_http_cache_size() + 100
+
+    cache.store('d', pages['d'])
+
+    # 가장 오래 사용하지 않은 b, c부터 지워 max_bytes의 90% 이하로 줄입니다.
+    assert DB.get_http_cache_size() <= cache.max_bytes * EVICT_TARGET_RATIO
+    assert [name for name in pages if cache.lookup(name)] == ['a', 'd']
+    assert not os.path.exists(cache.body_path('b'))
+    assert cache.read('a', cache.lookup('a')) == pages['a']
+
+
+def test_offline_miss_makes_no_request(db, tmp_path, site, stop_event):
+    fetcher = HttpPageFetcher(cache=make_cache(tmp_path, mode='offline'))
+
+    with pytest.raises(CacheMissError):
+        fetcher.fetch(site.list_urls()[0], stop_event)
+    assert site.requests == 0
+
+
+def test_offline_never_falls_back_to_browser(db, tmp_path, stop_event, fixture_html):
+    # 지연 로딩으로 src가 비어 있는 에피소드 페이지가 캐시된 경우
+    cache = make_cache(tmp_path, mode='offline')
+    cache.store('https://example.com/comic/1/1', fixture_html('episode_lazy.html'))
+    browser = FakeBrowserFetcher()
+    fetcher = FallbackPageFetcher(HttpPageFetcher(cache=cache), browser, has_article_images)
+
+    for url in ('https://example.com/comic/1/1', 'https://example.com/comic/1/2'):
+        with pytest.raises(CacheMissError):
+            fetcher.fetch(url, stop_event)
+    assert browser.calls == []
@@ -0,0 +1,64 @@
+"""
+crawler/crawler.py의 load_lazy_images 테스트.
+
+브라우저 대신 스크립트 결과를 정해 둔 가짜 드라이버로, 이미지가 없을 때 바로 끝나는지와
+지연 로딩 스크립트가 시간 초과되어도 예외 없이 이미지 상태를 확인하는지 검사합니다.
+"""
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from crawler.crawler import load_lazy_images
+
+
+class FakeDriver:
+    """execute_async_script는 async_result(예외면 발생)를, execute_script는 statuses를 차례로 반환합니다."""
+    def __init__(self, async_result, statuses=()):
+        self.async_result = async_result
+        self.statuses = list(statuses)
+        self.status_calls = 0
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def execute_async_script(self, script, *args):
+        if isinstance(self.async_result, Exception):
+            raise self.async_result
+        return self.async_result
+
+    def execute_script(self, script, *args):
+        self.status_calls += 1
+        if len(self.statuses) > 1:
+            return self.statuses.pop(0)
+        return self.statuses[0]
+
+
+def test_no_images_returns_immediately():
+    driver = FakeDriver(0)
+    started = time.monotonic()
+    assert load_lazy_images(driver, threading.Event(), timeout=5) == (0, 0)
+    assert time.monotonic() - started < 1
+    assert driver.status_calls == 0
+
+
+def test_section_without_images_stops_polling():
+    # 스크립트가 시간 초과된 뒤 확인해 보니 이미지가 없는 경우에도 timeout까지 기다리지 않습니다.
+    driver = FakeDriver(TimeoutException(), [[0, 0]])
+    started = time.monotonic()
+    assert load_lazy_images(driver, threading.Event(), timeout=5) == (0, 0)
+    assert time.monotonic() - started < 1
+    assert driver.status_calls == 1
+
+
+def test_script_timeout_still_checks_images():
+    driver = FakeDriver(TimeoutException(), [[3, 1], [3, 3]])
+    assert load_lazy_images(driver, threading.Event(), timeout=5, poll_interval=0.01) == (3, 3)
+    assert driver.status_calls == 2
+
+
+def test_stops_when_status_is_stable():
+    driver = FakeDriver(3, [[3, 2]])
+    started = time.monotonic()
+    assert load_lazy_images(driver, threading.Event(), timeout=5, poll_interval=0.01, stable_polls=2) == (3, 2)
+    assert time.monotonic() - started < 1
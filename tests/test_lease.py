@@ -0,0 +1,52 @@
+"""database.py의 에피소드 임대 작업 테이블 테스트: 임대가 유효한 작업자만 완료를 기록하는지 확인합니다."""
+import time
+
+import pytest
+
+import database as DB
+
+
+@pytest.fixture
+def db(tmp_path):
+    DB.init_db(str(tmp_path / 'lease.db'))
+    yield DB
+    DB.close_all_connections()
+
+
+def enqueue(db, urls):
+    series_id = db.add_series_job("https://example.com/comic/1", "download")
+    db.add_episode_jobs(series_id, urls)
+    return series_id
+
+
+def test_claim_and_complete(db):
+    enqueue(db, ["https://example.com/comic/1/1"])
+    job = db.claim_episode_job("worker-a", lease_seconds=60)
+
+    assert job['url'] == "https://example.com/comic/1/1"
+    assert db.claim_episode_job("worker-b", lease_seconds=60) is None
+    assert db.complete_episode_job(job['token'], job['url'], 'done', "1화")
+    assert db.is_url_crawled(job['url'])
+    assert db.count_open_episode_jobs() == 0
+
+
+def test_expired_lease_cannot_complete(db):
+    enqueue(db, ["https://example.com/comic/1/1"])
+    stale = db.claim_episode_job("worker-a", lease_seconds=0.01)
+    time.sleep(0.05)
+    fresh = db.claim_episode_job("worker-b", lease_seconds=60)
+
+    assert fresh['url'] == stale['url']
+    assert not db.complete_episode_job(stale['token'], stale['url'], 'done', "1화")
+    assert not db.is_url_crawled(stale['url'])
+    assert db.complete_episode_job(fresh['token'], fresh['url'], 'done', "1화")
+    assert db.is_url_crawled(fresh['url'])
+
+
+def test_crawled_episode_is_not_claimed(db):
+    enqueue(db, ["https://example.com/comic/1/1", "https://example.com/comic/1/2"])
+    db.add_crawled_url("https://example.com/comic/1/1", "1화")
+
+    job = db.claim_episode_job("worker-a", lease_seconds=60)
+
+    assert job['url'] == "https://example.com/comic/1/2"
@@ -0,0 +1,59 @@
+"""
+database.py의 CrawlResultWriter 테스트: 에피소드 작업의 'done' 상태가 crawled_urls 기록과 함께 커밋되어
+기록 전에 중단되어도 완료된 에피소드를 잃지 않는지 확인합니다.
+"""
+import pytest
+
+import database as DB
+
+URL = "https://example.com/comic/1/1"
+
+
+@pytest.fixture
+def db(tmp_path):
+    DB.init_db(str(tmp_path / 'writer.db'))
+    yield DB
+    DB.close_all_connections()
+
+
+@pytest.fixture
+def series_id(db):
+    series_id = db.add_series_job("https://example.com/comic/1", "download")
+    db.add_episode_jobs(series_id, [URL])
+    return series_id
+
+
+def job_state(db, url):
+    with db.get_db_connection() as conn:
+        return conn.execute("SELECT state FROM episode_jobs WHERE url = ?", (url,)).fetchone()[0]
+
+
+def test_done_state_is_committed_with_crawled_url(db, series_id):
+    writer = db.CrawlResultWriter(batch_size=1000, flush_interval=60)
+    writer.add(URL, "1화")
+    writer.set_episode_job_state(series_id, URL, 'done')
+    writer.close()
+
+    assert db.is_url_crawled(URL)
+    assert job_state(db, URL) == 'done'
+    assert db.get_unfinished_episode_urls(series_id) == []
+
+
+def test_unflushed_completion_is_not_lost(db, series_id):
+    # 쓰기 스레드가 커밋하기 전에 프로세스가 죽은 경우: 완료 상태만 남지 않으므로 다음 실행에서 다시 수집합니다.
+    writer = db.CrawlResultWriter(batch_size=1000, flush_interval=60)
+    writer.add(URL, "1화")
+    writer.set_episode_job_state(series_id, URL, 'done')
+
+    assert not db.is_url_crawled(URL)
+    assert job_state(db, URL) != 'done'
+    assert db.get_unfinished_episode_urls(series_id) == [URL]
+    writer.close()
+
+
+def test_reopen_done_job_without_crawled_url(db, series_id):
+    # 'done'만 커밋되고 crawled_urls 기록이 없는 작업은 실행할 때마다 다시 엽니다.
+    db.set_episode_job_states(series_id, [URL], 'done')
+
+    assert db.reopen_uncrawled_episode_jobs(series_id) == 1
+    assert db.get_unfinished_episode_urls(series_id) == [URL]